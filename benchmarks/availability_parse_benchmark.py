@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of availability parsing on recorded MAC payloads.
+
+Compares normalize_availability (precomputed per-date slot labels) with parsing
+every StartDateTime through format_api_time, and checks both give the same result.
+
+Usage (from the repository root):
+    python -m benchmarks.availability_parse_benchmark [--repeat 2000]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import timeit
+
+from src.contextManager import load_context_for_registration_pages
+from src.domain.services.availabilityService import format_api_time, normalize_availability
+
+_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "availability_*.json")
+
+
+def parse_per_slot(data, context):
+    """Reference parse: one isoparse/astimezone/strftime per slot."""
+    availability = {time_slot: [] for time_slot in context["TIME_SLOTS"]}
+    for slot in data["Availability"][0]["AvailableTimes"]:
+        formatted_time = format_api_time(slot["StartDateTime"])
+        if formatted_time in availability:
+            for lane_group in slot.get("PossibleBookSelections", []):
+                for lane in lane_group:
+                    availability[formatted_time].append(lane["Name"])
+    return availability
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=2000, help="Parses per fixture")
+    args = arg_parser.parse_args()
+
+    # The summary record is part of what's measured, but not printed
+    logging.basicConfig(level=logging.WARNING)
+    context = load_context_for_registration_pages()
+
+    for path in sorted(glob.glob(_FIXTURES)):
+        with open(path) as f:
+            fixture = json.load(f)
+        item_id, date, data = fixture["item_id"], fixture["date"], fixture["payload"]
+
+        expected = parse_per_slot(data, context)
+        assert normalize_availability(data, item_id, date, context) == expected, f"{path}: results differ"
+
+        per_slot = timeit.timeit(lambda: parse_per_slot(data, context), number=args.repeat)
+        normalized = timeit.timeit(lambda: normalize_availability(data, item_id, date, context), number=args.repeat)
+        slots = len(data["Availability"][0]["AvailableTimes"])
+        print(f"{os.path.basename(path)} ({slots} times): "
+              f"per-slot parse {per_slot / args.repeat * 1e6:.1f}us, "
+              f"normalize_availability {normalized / args.repeat * 1e6:.1f}us "
+              f"({per_slot / normalized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
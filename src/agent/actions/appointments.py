@@ -35,6 +35,10 @@ class AppointmentsAction(AgentAction):
             "required": []  # At least one parameter should be provided
         }
     
+    @property
+    def is_read_only(self):
+        return True
+    
     @property
     def prompt_instructions(self):
         return (
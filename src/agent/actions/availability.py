@@ -2,9 +2,13 @@ from flask import jsonify, g, send_file
 from src.agent.base import AgentAction
 from src.agent.utils.date_resolver import validate_and_resolve_date
 from src.agent.utils.pool_resolver import normalize_pool_name
-from src.domain.services.availabilityService import get_availability
+from src.domain.services.availabilityRangeService import (
+    get_availability_cached, get_availability_cached_async, get_availability_range
+)
 from src.domain.services.appointmentService import get_appointment_data
 from src.domain.drawing.availabilityVisualGenerator import generate_visualization, combine_visualizations
+from src.agent.utils.result_formatter import extract_result_payload, compress_slot_ranges, result_to_string
+import asyncio
 import logging
 
 class AvailabilityAction(AgentAction):
@@ -22,12 +26,17 @@ class AvailabilityAction(AgentAction):
             "type": "object",
             "properties": {
                 "pool_name": {"type": "string", "description": "The name of the pool (e.g., 'Indoor Pool', 'Outdoor Pool', 'Both Pools'). If not specified, defaults to 'Both Pools'."},
-                "date": {"type": "string", "description": "The date to check availability (YYYY-MM-DD)."},
+                "date": {"type": "string", "description": "The date to check availability (YYYY-MM-DD). For a range of days, the first day."},
+                "end_date": {"type": "string", "description": "Optional last day (YYYY-MM-DD, inclusive) to check several days at once, e.g. the rest of the week. Always returns text."},
                 "format": {"type": "string", "enum": ["visual", "text"], "description": "Response format, either 'visual' (default) for a visualization or 'text' for a text description. Use 'text' for specific queries about times or lanes."}
             },
             "required": ["date"]  # Only date is required, pool_name and format are optional
         }
     
+    @property
+    def is_read_only(self):
+        return True
+    
     @property
     def prompt_instructions(self):
         return (
@@ -42,6 +51,8 @@ class AvailabilityAction(AgentAction):
                 "2. The user is trying to find alternative times for a booked lane "
                 "3. The user is trying to find alternative lanes for a booked time "
                 "4. The user explicitly asks for availability information without visualization "
+                "When the user asks about several days (e.g. 'when can I swim this week?'), make one call with "
+                "date set to the first day and end_date to the last day instead of one call per day. "
         )
     
     @property
@@ -72,6 +83,25 @@ class AvailabilityAction(AgentAction):
             }
         }
 
+    def format_result_for_llm(self, result):
+        """Run-length encode the lane lists, e.g. '6:00–8:30 PM: lanes 2,3,5'."""
+        payload = extract_result_payload(result)
+        if isinstance(payload, dict) and isinstance(payload.get("availability_by_date"), dict):
+            lines = ["Availability by day (slot start times, 30-minute slots):"]
+            for date, pools in payload["availability_by_date"].items():
+                for pool_name, availability in pools.items():
+                    ranges = compress_slot_ranges(availability)
+                    lines.append(f"{date} {pool_name}: " + ("; ".join(ranges) if ranges else "no lanes available"))
+            return "\n".join(lines)
+        if not isinstance(payload, dict) or not isinstance(payload.get("availability"), dict):
+            return result_to_string(result)
+        
+        lines = [f"Availability on {payload.get('date')} (slot start times, 30-minute slots):"]
+        for pool_name, availability in payload["availability"].items():
+            ranges = compress_slot_ranges(availability)
+            lines.append(f"{pool_name}: " + ("; ".join(ranges) if ranges else "no lanes available"))
+        return "\n".join(lines)
+    
     def execute(self, arguments, context, user_input, **kwargs):
         """Execute the availability check action."""
         try:
@@ -86,6 +116,10 @@ class AvailabilityAction(AgentAction):
             # Normalize pool name, defaulting to "Both Pools" if not specified
             pool_name = normalize_pool_name(pool_name)
             
+            # Several days are fetched together and always answered as text
+            if arguments.get("end_date"):
+                return jsonify(self._generate_range_response(pool_name, date, arguments["end_date"], context))
+            
             # Handle different response formats
             if format_type == "text":
                 return jsonify(self._generate_text_response(pool_name, date, context))
@@ -95,45 +129,95 @@ class AvailabilityAction(AgentAction):
             logging.error(f"Error checking availability: {str(e)}", exc_info=True)
             return jsonify({"message": "I couldn't check availability at this time. Please try again later.", "status": "error"}), 500
     
-    def _generate_text_response(self, pool_name, date, context):
-        """Generate text-based availability response."""
+    async def execute_async(self, arguments, context, user_input, **kwargs):
+        """Text availability uses the async MAC gateways; visualizations run in a worker thread."""
+        if arguments.get("format", "visual") != "text" or arguments.get("end_date"):
+            return await super().execute_async(arguments, context, user_input, **kwargs)
+        try:
+            date = validate_and_resolve_date(arguments.get("date"), user_input)
+            pool_name = normalize_pool_name(arguments.get("pool_name", ""))
+            
+            item_ids = self._resolve_item_ids(pool_name, context)
+            if isinstance(item_ids, tuple):
+                return item_ids
+            
+            availabilities = await asyncio.gather(*(
+                get_availability_cached_async(name, date, context) for name in item_ids
+            ))
+            return jsonify(self._format_text_response(pool_name, date, dict(zip(item_ids.keys(), availabilities))))
+        except Exception as e:
+            logging.error(f"Error checking availability: {str(e)}", exc_info=True)
+            return jsonify({"message": "I couldn't check availability at this time. Please try again later.", "status": "error"}), 500
+    
+    def _resolve_item_ids(self, pool_name, context):
+        """Map the requested pool(s) to MAC item ids, or return an error response."""
         if pool_name == "Both Pools":
-            indoor_pool_name = "Indoor Pool"
-            outdoor_pool_name = "Outdoor Pool"
-
             if "ITEMS" not in context:
                 return jsonify({"error": "Context missing ITEMS"}), 500
             
-            indoor_item_id = context["ITEMS"].get(indoor_pool_name)
-            outdoor_item_id = context["ITEMS"].get(outdoor_pool_name)
+            indoor_item_id = context["ITEMS"].get("Indoor Pool")
+            outdoor_item_id = context["ITEMS"].get("Outdoor Pool")
             
             if not indoor_item_id or not outdoor_item_id:
                 return jsonify({"error": "Invalid pool configuration"}), 500
-
-            indoor_availability = get_availability(indoor_item_id, date, context)
-            outdoor_availability = get_availability(outdoor_item_id, date, context)
-            
+            return {"Indoor Pool": indoor_item_id, "Outdoor Pool": outdoor_item_id}
+        
+        # Validate pool_name
+        if "ITEMS" not in context or pool_name not in context["ITEMS"]:
+            return {"error": f"Invalid pool name: {pool_name}"}, 400
+        return {pool_name: context["ITEMS"][pool_name]}
+    
+    def _generate_range_response(self, pool_name, start_date, end_date, context):
+        """Text availability for every day from start_date to end_date."""
+        item_ids = self._resolve_item_ids(pool_name, context)
+        if isinstance(item_ids, tuple):
+            return {"message": f"Invalid pool name: {pool_name}", "status": "error"}
+        
+        try:
+            grid = get_availability_range(start_date, end_date, context, pools=list(item_ids.keys()))
+        except ValueError as e:
+            return {"message": str(e), "status": "error"}
+        
+        message = f"Availability from {start_date} to {end_date}:\n"
+        for date, pools in grid.items():
+            message += f"\n{date}:\n"
+            for name, availability in pools.items():
+                open_slots = [f"{time_slot}: Lanes {', '.join(map(str, lanes))}" for time_slot, lanes in availability.items() if lanes]
+                message += f"{name.upper()}:\n" + ("\n".join(open_slots) if open_slots else "No lanes available") + "\n"
+        
+        return {
+            "message": message,
+            "status": "success",
+            "start_date": start_date,
+            "end_date": end_date,
+            "availability_by_date": grid
+        }
+    
+    def _generate_text_response(self, pool_name, date, context):
+        """Generate text-based availability response."""
+        item_ids = self._resolve_item_ids(pool_name, context)
+        if isinstance(item_ids, tuple):
+            return item_ids
+        
+        availabilities = {name: get_availability_cached(name, date, context) for name in item_ids}
+        return self._format_text_response(pool_name, date, availabilities)
+    
+    def _format_text_response(self, pool_name, date, availabilities):
+        """Build the text availability payload from {pool name: availability}."""
+        if pool_name == "Both Pools":
             # Format text response
             availability_message = f"Availability for pools on {date}:\n\n"
             availability_message += f"INDOOR POOL:\n"
-            for time_slot, lanes in indoor_availability.items():
+            for time_slot, lanes in availabilities["Indoor Pool"].items():
                 if lanes:  # Only show time slots with available lanes
                     availability_message += f"{time_slot}: Lanes {', '.join(map(str, lanes))}\n"
             
             availability_message += f"\nOUTDOOR POOL:\n"
-            for time_slot, lanes in outdoor_availability.items():
+            for time_slot, lanes in availabilities["Outdoor Pool"].items():
                 if lanes:  # Only show time slots with available lanes
                     availability_message += f"{time_slot}: Lanes {', '.join(map(str, lanes))}\n"
-            
-            return {"message": availability_message, "status": "success"}
         else:
-            # Validate pool_name
-            if "ITEMS" not in context or pool_name not in context["ITEMS"]:
-                return {"error": f"Invalid pool name: {pool_name}"}, 400
-
-            # Get item_id and check availability
-            item_id = context["ITEMS"][pool_name]
-            availability = get_availability(item_id, date, context)
+            availability = availabilities[pool_name]
             
             # Log the raw availability data for debugging
             logging.info(f"🔍 Raw availability data for {pool_name} on {date}: {availability}")
@@ -150,7 +234,12 @@ class AvailabilityAction(AgentAction):
             logging.info(f"🔍 Availability summary for {pool_name}: {available_count} total lane slots available")
             logging.info(f"🔍 Formatted availability message: {availability_message}")
 
-            return {"message": availability_message, "status": "success"}
+        return {
+            "message": availability_message,
+            "status": "success",
+            "date": date,
+            "availability": availabilities
+        }
     
     def _generate_visualization(self, pool_name, date, context):
         """Generate visual availability response."""
@@ -168,8 +257,8 @@ class AvailabilityAction(AgentAction):
                 if not indoor_item_id or not outdoor_item_id:
                     return jsonify({"error": "Invalid pool configuration"}), 500
 
-                indoor_availability = get_availability(indoor_item_id, date, context)
-                outdoor_availability = get_availability(outdoor_item_id, date, context)
+                indoor_availability = get_availability_cached(indoor_pool_name, date, context)
+                outdoor_availability = get_availability_cached(outdoor_pool_name, date, context)
 
                 indoor_appt = get_appointment_data(date, date, context)
                 outdoor_appt = get_appointment_data(date, date, context)
@@ -192,7 +281,7 @@ class AvailabilityAction(AgentAction):
 
                 # Get item_id and check availability
                 item_id = context["ITEMS"][pool_name]
-                availability = get_availability(item_id, date, context)
+                availability = get_availability_cached(pool_name, date, context)
                 appt = get_appointment_data(date, date, context)
 
                 img_io = generate_visualization(availability, pool_name, date, appt, context)
@@ -43,6 +43,10 @@ class BookLaneAction(AgentAction):
             "required": ["date", "time", "location", "lane"]
         }
     
+    @property
+    def invalidates(self):
+        return ("check_lane_availability", "find_best_slots", "check_appointments")
+    
     @property
     def prompt_instructions(self):
         return (
@@ -84,97 +88,144 @@ class BookLaneAction(AgentAction):
     def execute(self, arguments, context, user_input, **kwargs):
         """Execute the lane booking action."""
         try:
-            # Extract parameters
-            date = arguments.get("date")
-            time = arguments.get("time")
-            duration = arguments.get("duration", "60")
-            location = arguments.get("location")
-            lane = arguments.get("lane")
-            
-            # Validate and resolve the date
-            date = validate_and_resolve_date(date, user_input)
-            
-            # Normalize location (pool name)
-            location = normalize_pool_name(location)
-            
-            # Convert 24-hour time format to 12-hour if needed
-            if ":" in time and ("AM" not in time.upper() and "PM" not in time.upper()):
-                # Looks like 24-hour format, convert to 12-hour
-                try:
-                    hour, minute = map(int, time.split(':'))
-                    if hour == 0:
-                        time_slot = f"12:{minute:02d} AM"
-                    elif hour < 12:
-                        time_slot = f"{hour}:{minute:02d} AM"
-                    elif hour == 12:
-                        time_slot = f"12:{minute:02d} PM"
-                    else:
-                        time_slot = f"{hour-12}:{minute:02d} PM"
-                except ValueError:
-                    # If conversion fails, use the original time
-                    time_slot = time
-            else:
-                # Assume it's already in 12-hour format or doesn't need conversion
-                time_slot = time
-            
-            # Verify location is valid for booking (not "Both Pools")
-            if location == "Both Pools":
-                return jsonify({
-                    "message": "I'm sorry, but you need to specify which pool (Indoor Pool or Outdoor Pool) you want to book. You can't book 'Both Pools' at once.",
-                    "status": "error"
-                }), 400
-            
-            # Format the lane number if needed
-            if lane and str(lane).isdigit():
-                lane_display = f"Lane {lane}"
-            else:
-                lane_display = lane
-                
-            # Format duration if needed
-            if duration and str(duration).isdigit():
-                duration_display = f"{duration} Min"
-            else:
-                duration_display = duration
-            
-            # Log the booking request
-            logging.info(f"Agent booking request: date={date}, time={time_slot}, duration={duration}, location={location}, lane={lane}")
+            booking = self._resolve_booking(arguments, user_input)
+            if not isinstance(booking, dict):
+                return booking
             
             # Import the function here to avoid circular imports
             from src.domain.services.bookingService import book_swim_lane_action
             
             # Call the booking service with the correct parameter names
             response, status_code = book_swim_lane_action(
-                date=date,
-                time_slot=time_slot,  # Use time_slot instead of time
-                duration=duration_display,
-                location=location,
-                lane=lane_display,
+                date=booking["date"],
+                time_slot=booking["time_slot"],
+                duration=booking["duration_display"],
+                location=booking["location"],
+                lane=booking["lane_display"],
                 context=context
             )
-            
-            # Check if booking was successful
-            if status_code == 200:
-                # Create a friendly success message
-                success_message = (
-                    f"Great news! I've successfully booked {lane_display} at {location} for you.\n\n"
-                    f"📅 Date: {date}\n"
-                    f"⏰ Time: {time_slot}\n"
-                    f"⏱️ Duration: {duration} minutes\n"
-                )
-                
-                # Add confirmation info if available
-                if "message" in response:
-                    success_message += f"\n{response['message']}\n"
-                    
-                success_message += "\nYou can view this booking in your account dashboard."
-                
-                return jsonify({"message": success_message, "booking_details": response, "status": "success"}), 200
-            else:
-                # Get error details
-                error_message = response.get("message", "Unknown error occurred during booking.")
+            return self._booking_response(booking, response, status_code)
                 
-                return jsonify({"message": f"I'm sorry, but I couldn't book this lane. {error_message}", "status": "error"}), status_code
+        except Exception as e:
+            logging.exception("Error in booking lane")
+            return jsonify({"message": "I'm sorry, but I encountered an error while trying to book your lane. Please try again later.", "status": "error"}), 500
+    
+    async def execute_async(self, arguments, context, user_input, **kwargs):
+        """Book through the async MAC gateways."""
+        try:
+            booking = self._resolve_booking(arguments, user_input)
+            if not isinstance(booking, dict):
+                return booking
+            
+            from src.domain.services.bookingService import book_swim_lane_action_async
+            
+            response, status_code = await book_swim_lane_action_async(
+                date=booking["date"],
+                time_slot=booking["time_slot"],
+                duration=booking["duration_display"],
+                location=booking["location"],
+                lane=booking["lane_display"],
+                context=context
+            )
+            return self._booking_response(booking, response, status_code)
                 
         except Exception as e:
             logging.exception("Error in booking lane")
-            return jsonify({"message": "I'm sorry, but I encountered an error while trying to book your lane. Please try again later.", "status": "error"}), 500
\ No newline at end of file
+            return jsonify({"message": "I'm sorry, but I encountered an error while trying to book your lane. Please try again later.", "status": "error"}), 500
+    
+    def _resolve_booking(self, arguments, user_input):
+        """
+        Normalize the booking arguments.
+        
+        Returns:
+            dict with date, time_slot, duration, duration_display, location and lane_display,
+            or an error response when the request can't be booked as given
+        """
+        # Extract parameters
+        date = arguments.get("date")
+        time = arguments.get("time")
+        duration = arguments.get("duration", "60")
+        location = arguments.get("location")
+        lane = arguments.get("lane")
+        
+        # Validate and resolve the date
+        date = validate_and_resolve_date(date, user_input)
+        
+        # Normalize location (pool name)
+        location = normalize_pool_name(location)
+        
+        # Convert 24-hour time format to 12-hour if needed
+        if ":" in time and ("AM" not in time.upper() and "PM" not in time.upper()):
+            # Looks like 24-hour format, convert to 12-hour
+            try:
+                hour, minute = map(int, time.split(':'))
+                if hour == 0:
+                    time_slot = f"12:{minute:02d} AM"
+                elif hour < 12:
+                    time_slot = f"{hour}:{minute:02d} AM"
+                elif hour == 12:
+                    time_slot = f"12:{minute:02d} PM"
+                else:
+                    time_slot = f"{hour-12}:{minute:02d} PM"
+            except ValueError:
+                # If conversion fails, use the original time
+                time_slot = time
+        else:
+            # Assume it's already in 12-hour format or doesn't need conversion
+            time_slot = time
+        
+        # Verify location is valid for booking (not "Both Pools")
+        if location == "Both Pools":
+            return jsonify({
+                "message": "I'm sorry, but you need to specify which pool (Indoor Pool or Outdoor Pool) you want to book. You can't book 'Both Pools' at once.",
+                "status": "error"
+            }), 400
+        
+        # Format the lane number if needed
+        if lane and str(lane).isdigit():
+            lane_display = f"Lane {lane}"
+        else:
+            lane_display = lane
+            
+        # Format duration if needed
+        if duration and str(duration).isdigit():
+            duration_display = f"{duration} Min"
+        else:
+            duration_display = duration
+        
+        # Log the booking request
+        logging.info(f"Agent booking request: date={date}, time={time_slot}, duration={duration}, location={location}, lane={lane}")
+        
+        return {
+            "date": date,
+            "time_slot": time_slot,
+            "duration": duration,
+            "duration_display": duration_display,
+            "location": location,
+            "lane_display": lane_display
+        }
+    
+    def _booking_response(self, booking, response, status_code):
+        """Build the reply for a booking service result."""
+        # Check if booking was successful
+        if status_code == 200:
+            # Create a friendly success message
+            success_message = (
+                f"Great news! I've successfully booked {booking['lane_display']} at {booking['location']} for you.\n\n"
+                f"📅 Date: {booking['date']}\n"
+                f"⏰ Time: {booking['time_slot']}\n"
+                f"⏱️ Duration: {booking['duration']} minutes\n"
+            )
+            
+            # Add confirmation info if available
+            if "message" in response:
+                success_message += f"\n{response['message']}\n"
+                
+            success_message += "\nYou can view this booking in your account dashboard."
+            
+            return jsonify({"message": success_message, "booking_details": response, "status": "success"}), 200
+        else:
+            # Get error details
+            error_message = response.get("message", "Unknown error occurred during booking.")
+            
+            return jsonify({"message": f"I'm sorry, but I couldn't book this lane. {error_message}", "status": "error"}), status_code
@@ -31,6 +31,10 @@ class CancelAppointmentAction(AgentAction):
             "required": ["date", "confirm"]
         }
     
+    @property
+    def invalidates(self):
+        return ("check_lane_availability", "find_best_slots", "check_appointments")
+    
     @property
     def prompt_instructions(self):
         return (
@@ -71,29 +75,11 @@ class CancelAppointmentAction(AgentAction):
     def execute(self, arguments, context, user_input, **kwargs):
         """Execute the appointment cancellation action."""
         try:
-            # Extract parameters
-            date = arguments.get("date")
-            confirm = arguments.get("confirm", False)
-            
-            # Log the parameters for debugging
-            logging.info(f"Cancel appointment parameters: date={date}, confirm={confirm}")
-            
-            # Validate and resolve the date
-            date = validate_and_resolve_date(date, user_input)
-            
-            # Log the resolved date
-            logging.info(f"Resolved date for cancellation: {date}")
+            date = self._resolve_date(arguments, user_input)
             
             # Check if the user has confirmed the cancellation
-            if not confirm:
-                return Response(
-                    jsonify({
-                        "message": "For safety reasons, I need you to confirm that you want to cancel this appointment. Please confirm if you want to proceed with cancellation.",
-                        "status": "needs_confirmation"
-                    }),
-                    status=200,
-                    mimetype="application/json"
-                )
+            if not arguments.get("confirm", False):
+                return self._needs_confirmation()
             
             # Import the function here to avoid circular imports
             from src.domain.services.cancellationService import cancel_appointment_action
@@ -101,63 +87,124 @@ class CancelAppointmentAction(AgentAction):
             
             # First, check if there's actually an appointment for this date
             appointment_response, appointment_status = get_appointments_schedule_action(date, date, context)
-            
-            if appointment_status != 200:
-                return Response(
-                    jsonify({
-                        "message": f"I couldn't check if you have an appointment on {date}. Please try again later.",
-                        "status": "error"
-                    }),
-                    status=appointment_status,
-                    mimetype="application/json"
-                )
-            
-            appointments = appointment_response.get("appointments", [])
-            
-            if not appointments:
-                return Response(
-                    jsonify({
-                        "message": f"You don't have any appointments scheduled for {date} that can be cancelled.",
-                        "status": "error"
-                    }),
-                    status=400,
-                    mimetype="application/json"
-                )
+            appointments = appointment_response.get("appointments", []) if appointment_status == 200 else None
+            early_response = self._check_appointments(date, appointments, appointment_status)
+            if early_response:
+                return early_response
             
             # Format appointment details for the confirmation message
             appointment_details = self._format_appointment_details(appointments[0], date)
             
             # Call the cancellation service
             response, status_code = cancel_appointment_action(date, context)
+            return self._cancellation_response(date, appointment_details, response, status_code)
+                
+        except Exception as e:
+            logging.exception(f"Error in cancel_appointment action: {str(e)}")
+            return self._error_response()
+    
+    async def execute_async(self, arguments, context, user_input, **kwargs):
+        """Look up and cancel through the async MAC gateways."""
+        try:
+            date = self._resolve_date(arguments, user_input)
             
-            if status_code != 200:
-                return Response(
-                    jsonify({
-                        "message": f"I couldn't cancel your appointment. {response.get('message', 'Please try again later.')}",
-                        "status": "error"
-                    }),
-                    status=status_code,
-                    mimetype="application/json"
-                )
+            if not arguments.get("confirm", False):
+                return self._needs_confirmation()
             
-            # Create a success message
-            success_message = f"✅ Success! I've cancelled your appointment for {date}.\n\nDetails of the cancelled appointment:\n{appointment_details}"
-
-            return jsonify({
-                "message": success_message,
-                "status": "success"
-            }), 200
+            from src.domain.services.cancellationService import cancel_appointment_action_async
+            from src.domain.services.appointmentCacheService import get_appointments_cached_async
+            
+            appointments, appointment_status = await get_appointments_cached_async(date, date, context)
+            early_response = self._check_appointments(date, appointments or [], appointment_status)
+            if early_response:
+                return early_response
+            
+            appointment_details = self._format_appointment_details(appointments[0], date)
+            
+            response, status_code = await cancel_appointment_action_async(date, context)
+            return self._cancellation_response(date, appointment_details, response, status_code)
                 
         except Exception as e:
             logging.exception(f"Error in cancel_appointment action: {str(e)}")
+            return self._error_response()
+    
+    def _resolve_date(self, arguments, user_input):
+        """Resolve the date to cancel from the arguments."""
+        date = arguments.get("date")
+        confirm = arguments.get("confirm", False)
+        
+        # Log the parameters for debugging
+        logging.info(f"Cancel appointment parameters: date={date}, confirm={confirm}")
+        
+        # Validate and resolve the date
+        date = validate_and_resolve_date(date, user_input)
+        
+        # Log the resolved date
+        logging.info(f"Resolved date for cancellation: {date}")
+        return date
+    
+    def _needs_confirmation(self):
+        return Response(
+            jsonify({
+                "message": "For safety reasons, I need you to confirm that you want to cancel this appointment. Please confirm if you want to proceed with cancellation.",
+                "status": "needs_confirmation"
+            }),
+            status=200,
+            mimetype="application/json"
+        )
+    
+    def _check_appointments(self, date, appointments, appointment_status):
+        """An error response when the appointments lookup failed or found nothing to cancel, else None."""
+        if appointment_status != 200:
+            return Response(
+                jsonify({
+                    "message": f"I couldn't check if you have an appointment on {date}. Please try again later.",
+                    "status": "error"
+                }),
+                status=appointment_status,
+                mimetype="application/json"
+            )
+        
+        if not appointments:
             return Response(
                 jsonify({
-                    "message": "I'm sorry, but I encountered an error while trying to cancel your appointment. Please try again later.",
+                    "message": f"You don't have any appointments scheduled for {date} that can be cancelled.",
                     "status": "error"
                 }),
-                status=500,
+                status=400,
                 mimetype="application/json"
             )
+        return None
+    
+    def _cancellation_response(self, date, appointment_details, response, status_code):
+        """Build the reply for a cancellation service result."""
+        if status_code != 200:
+            return Response(
+                jsonify({
+                    "message": f"I couldn't cancel your appointment. {response.get('message', 'Please try again later.')}",
+                    "status": "error"
+                }),
+                status=status_code,
+                mimetype="application/json"
+            )
+        
+        # Create a success message
+        success_message = f"✅ Success! I've cancelled your appointment for {date}.\n\nDetails of the cancelled appointment:\n{appointment_details}"
+
+        return jsonify({
+            "message": success_message,
+            "status": "success"
+        }), 200
+    
+    def _error_response(self):
+        return Response(
+            jsonify({
+                "message": "I'm sorry, but I encountered an error while trying to cancel your appointment. Please try again later.",
+                "status": "error"
+            }),
+            status=500,
+            mimetype="application/json"
+        )
     
     def _format_appointment_details(self, appointment, date_str):
         """Format an appointment into a readable string."""
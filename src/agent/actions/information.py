@@ -17,6 +17,10 @@ class InformationAction(AgentAction):
     def description(self):
         return "Retrieve information about pool facilities, policies, or schedules using RAG"
     
+    @property
+    def is_read_only(self):
+        return True
+    
     @property
     def prompt_instructions(self):
         return """
@@ -53,6 +57,13 @@ When answering questions about pool hours or schedules:
             "required": ["question"]
         }
         
+    def format_result_for_llm(self, result):
+        """Only the extracted facts and their sources are needed by the LLM."""
+        if isinstance(result, dict) and "raw_info" in result:
+            sources = ", ".join(result.get("metadata", {}).get("sources_used", []))
+            return f"{result['raw_info']}\n(Sources: {sources})" if sources else result["raw_info"]
+        return super().format_result_for_llm(result)
+        
     def set_admin_action_attempted(self, action_name):
         """Flag that a non-admin user attempted to access an admin-only action"""
         self.admin_action_attempted = action_name
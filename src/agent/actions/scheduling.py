@@ -2,6 +2,7 @@ from flask import jsonify, g
 from src.agent.base import AgentAction
 from src.domain.sql.scheduleGateway import add_or_update_schedule, get_schedule
 from src.domain.sql.authGateway import get_mac_password
+from src.domain.services.bookingPreferenceCompiler import describe_booking_plan
 import logging
 import json
 from datetime import time, datetime
@@ -208,17 +209,23 @@ class ManageScheduleAction(AgentAction):
                 # Update the specific day with command
                 schedule[day] = command
                 
-                # Save to database
-                add_or_update_schedule(username, schedule)
+                # Save to database; the command is compiled into a booking plan on save
+                plans = add_or_update_schedule(username, schedule)
+                plan = plans.get(day)
+                if plan:
+                    plan_message = f" Auto-booking will try: {describe_booking_plan(plan)}."
+                else:
+                    plan_message = " The command will be interpreted by the agent at booking time."
                 
                 # Check if they have a password already (for informational purposes only)
                 has_password = get_mac_password(username) is not None
                 auto_booking_message = " Auto-booking is active." if has_password else " Note: Auto-booking is inactive - MAC password not configured."
                 
                 return jsonify({
-                    "message": f"Successfully scheduled command for {day.capitalize()}: {command}" + auto_booking_message,
+                    "message": f"Successfully scheduled command for {day.capitalize()}: {command}" + plan_message + auto_booking_message,
                     "status": "success",
-                    "auto_booking_enabled": has_password
+                    "auto_booking_enabled": has_password,
+                    "booking_plan": plan
                 }), 200
                     
             elif action == "remove":
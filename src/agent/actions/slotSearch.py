@@ -0,0 +1,87 @@
+from flask import jsonify
+from src.agent.base import AgentAction
+from src.agent.utils.date_resolver import validate_and_resolve_date
+from src.agent.utils.result_formatter import extract_result_payload, result_to_string
+from src.domain.services.slotSearchService import parse_search_preferences, search_best_slots
+import logging
+
+class FindBestSlotsAction(AgentAction):
+    @property
+    def name(self):
+        return "find_best_slots"
+
+    @property
+    def description(self):
+        return ("Find the best bookable swim lane options for a date, ranked against the user's preferred "
+                "pool(s), time, flexibility, durations and lanes.")
+
+    @property
+    def parameters(self):
+        return {
+            "type": "object",
+            "properties": {
+                "date": {"type": "string", "description": "The date to search (YYYY-MM-DD)."},
+                "pools": {"type": "array", "items": {"type": "string"}, "description": "Pools in preference order: 'Indoor Pool', 'Outdoor Pool' or 'Both Pools' (default)."},
+                "target_time": {"type": "string", "description": "Preferred start time as a half-hour slot, e.g. '7:00 PM'. Omit to search the whole day."},
+                "flex_minutes": {"type": "integer", "description": "How many minutes before or after target_time are acceptable (default 60)."},
+                "durations": {"type": "array", "items": {"type": "integer", "enum": [30, 60]}, "description": "Acceptable durations in minutes, in preference order (default [60])."},
+                "lanes": {"type": "array", "items": {"type": "integer"}, "description": "Lane numbers in preference order, e.g. [5, 2, 4]."},
+                "only_preferred_lanes": {"type": "boolean", "description": "Only return the listed lanes (default false: other lanes rank after them)."},
+                "top_k": {"type": "integer", "description": "Number of options to return (default 5)."}
+            },
+            "required": ["date"]
+        }
+
+    @property
+    def is_read_only(self):
+        return True
+
+    @property
+    def prompt_instructions(self):
+        return (
+            "When the user wants to book but their exact slot may not be free, or asks for the best or nearest "
+            "available option, use the find_best_slots function with their preferences instead of reading "
+            "availability yourself. It returns ranked, bookable options; book the top one with book_lane "
+            "unless the user wants to choose. "
+        )
+
+    @property
+    def response_format_instructions(self):
+        return (
+            "Present the options as a short numbered list, best first: pool, lane, time and duration. "
+            "If there are no options, say so and suggest widening the time window or lanes."
+        )
+
+    def format_result_for_llm(self, result):
+        """One line per option, best first."""
+        payload = extract_result_payload(result)
+        if not isinstance(payload, dict) or not isinstance(payload.get("options"), list):
+            return result_to_string(result)
+        if not payload["options"]:
+            return f"No bookable options on {payload.get('date')} match these preferences."
+        lines = [f"Best bookable options on {payload.get('date')} (best first):"]
+        for number, option in enumerate(payload["options"], start=1):
+            lines.append(f"{number}. {option['location']} {option['lane']} at {option['time_slot']} for {option['duration']}")
+        return "\n".join(lines)
+
+    def execute(self, arguments, context, user_input, **kwargs):
+        """Execute the best-slot search."""
+        try:
+            date = validate_and_resolve_date(arguments.get("date"), user_input)
+            try:
+                preferences = parse_search_preferences(arguments, context)
+            except ValueError as e:
+                return jsonify({"message": str(e), "status": "error"}), 400
+
+            result = search_best_slots(date, context, **preferences)
+            options = result["options"]
+            if options:
+                best = options[0]
+                message = (f"Found {len(options)} options on {date}. Best: {best['location']} {best['lane']} "
+                           f"at {best['time_slot']} for {best['duration']}.")
+            else:
+                message = f"No bookable options on {date} match these preferences."
+            return jsonify({"message": message, "status": "success", "date": date, "options": options})
+        except Exception as e:
+            logging.error(f"Error searching for slots: {str(e)}", exc_info=True)
+            return jsonify({"message": "I couldn't search availability at this time. Please try again later.", "status": "error"}), 500
@@ -14,6 +14,10 @@ class WeatherAction:
     def parameters(self):
         return {}
 
+    @property
+    def is_read_only(self):
+        return True
+    
     @property
     def prompt_instructions(self):
         return (
@@ -27,6 +27,10 @@ class WeatherForecastAction:
             "required": []
         }
 
+    @property
+    def is_read_only(self):
+        return True
+    
     @property
     def prompt_instructions(self):
         return (
@@ -1,5 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
 from flask import jsonify
+from src.agent.utils.result_formatter import result_to_string
 
 class AgentAction(ABC):
     """Base class for all agent actions."""
@@ -45,6 +47,28 @@ class AgentAction(ABC):
         """
         pass
         
+    async def execute_async(self, arguments, context, user_input, **kwargs):
+        """
+        Awaitable variant of execute() used by AsyncAgentService.
+        
+        The default runs execute() in a worker thread so blocking gateway calls
+        don't stall the event loop; actions with async gateways override this.
+        """
+        return await asyncio.to_thread(self.execute, arguments, context, user_input, **kwargs)
+    
+    @property
+    def is_read_only(self):
+        """
+        Whether the action only reads data. Read-only results may be reused
+        when the same call is repeated within a single request.
+        """
+        return False
+    
+    @property
+    def invalidates(self):
+        """Names of read-only actions whose results are stale after this action runs."""
+        return ()
+    
     def get_tool_definition(self):
         """Return the tool definition for OpenAI API."""
         return {
@@ -56,6 +80,21 @@ class AgentAction(ABC):
             }
         }
     
+    def format_result_for_llm(self, result):
+        """
+        Compact string representation of an execution result for the LLM context.
+        
+        The full result is still returned to the caller; override this in actions
+        whose raw results are bulky (lane lists, MAC payloads).
+        
+        Args:
+            result: The value returned by execute()
+            
+        Returns:
+            str: Text placed in the tool message and tool call history
+        """
+        return result_to_string(result)
+    
     def handle_error(self, error, friendly_message=None):
         """Handle exceptions in a consistent way."""
         import logging
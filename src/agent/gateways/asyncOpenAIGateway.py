@@ -0,0 +1,44 @@
+import logging
+from typing import List, Dict, Optional
+
+from src.agent.gateways.openAIGateway import OpenAIGateway
+from src.utils.openAIClientService import get_async_openai_client, async_openai_call_slot
+
+class AsyncOpenAIGateway(OpenAIGateway):
+    """OpenAIGateway variant whose completion calls are awaitable."""
+
+    def __init__(self):
+        super().__init__()
+        # The AsyncOpenAI client is bound to the event loop, so completions resolve it per call
+
+    async def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Dict]] = None,
+        tool_choice: str = "auto",
+        temperature: float = None
+    ):
+        """
+        Raw async completion call to OpenAI. See OpenAIGateway.get_completion.
+        """
+        try:
+            kwargs = {
+                "model": "gpt-4.1-mini",
+                "messages": messages
+            }
+
+            if tools:
+                kwargs["tools"] = tools
+                kwargs["tool_choice"] = tool_choice
+
+            if temperature is None:
+                temperature = self._determine_temperature(messages, tools)
+
+            kwargs["temperature"] = temperature
+
+            async with async_openai_call_slot("chat"):
+                response = await get_async_openai_client().chat.completions.create(**kwargs)
+            return response
+        except Exception as e:
+            logging.error(f"OpenAI API error: {e}")
+            raise
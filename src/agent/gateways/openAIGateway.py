@@ -1,12 +1,12 @@
-from openai import OpenAI
-import os
+from src.utils.openAIClientService import get_openai_client, openai_call_slot
 import json
 import logging
 from typing import List, Dict, Any, Optional
 
 class OpenAIGateway:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Process-wide client: pooled connections, timeouts and rate-limit aware retries
+        self.client = get_openai_client()
 
     def get_completion(
         self,
@@ -45,7 +45,8 @@ class OpenAIGateway:
                 
             kwargs["temperature"] = temperature
 
-            response = self.client.chat.completions.create(**kwargs)
+            with openai_call_slot("chat"):
+                response = self.client.chat.completions.create(**kwargs)
             return response
         except Exception as e:
             logging.error(f"OpenAI API error: {e}")
@@ -7,6 +7,7 @@ from src.agent.actions.weather import WeatherAction
 from src.agent.actions.weatherForecast import WeatherForecastAction
 from src.agent.actions.information import InformationAction
 from src.agent.actions.scheduling import ManageScheduleAction
+from src.agent.actions.slotSearch import FindBestSlotsAction
 from src.agent.gateways.openAIGateway import OpenAIGateway
 from typing import Any, List, Dict
 import logging
@@ -16,6 +17,7 @@ class AgentRegistry:
     def __init__(self):
         self._actions = {}
         self._admin_actions = {}  # New dictionary for admin-only actions
+        self._openai_gateway = None
         self._register_actions()
 
     def _register_actions(self):
@@ -30,6 +32,7 @@ class AgentRegistry:
             WeatherAction(),
             WeatherForecastAction(),
             InformationAction(),
+            FindBestSlotsAction(),
         ]
         
         # Admin-only actions
@@ -108,8 +111,9 @@ Respond with ONLY the function name, nothing else.
         ]
         
         try:
-            openai_gateway = OpenAIGateway()
-            response = openai_gateway.get_completion(messages)
+            if self._openai_gateway is None:
+                self._openai_gateway = OpenAIGateway()
+            response = self._openai_gateway.get_completion(messages)
             action_name = response.choices[0].message.content.strip().lower()
             
             # Log the suggested action name for debugging
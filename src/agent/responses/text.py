@@ -42,12 +42,19 @@ class TextResponse(ActionResponse):
         return self.message
     
     def to_http_response(self) -> Tuple[Dict[str, Any], int]:
-        return {
+        response = {
             "message": self.message,
             "status": self.status,
             "content_type": self.content_type,
             "is_conversation_over": self.is_conversation_over
-        }, self.status_code
+        }
+        
+        # Full structured tool result, kept out of the LLM context
+        data = self.get_metadata("data")
+        if data is not None:
+            response["data"] = data
+            
+        return response, self.status_code
     
     def to_string(self) -> str:
         return self.message
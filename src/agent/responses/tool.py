@@ -15,6 +15,8 @@ class ToolCallHistoryItem:
     tool_name: str
     tool_args: Dict[str, Any]
     tool_result: str
+    tokens_before: int = 0  # Prompt tokens of the default (uncompacted) result string
+    tokens_after: int = 0   # Prompt tokens of the compact LLM-facing result
 
 
 class ToolSelectionResponse(ActionResponse):
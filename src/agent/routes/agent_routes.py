@@ -9,45 +9,104 @@ import uuid
 agent_bp = Blueprint('agent', __name__)
 agent_service = AgentService()
 
+def _request_logging_enabled():
+    return os.getenv('REQUEST_LOGGING', 'false').lower() == 'true' or g.context.get('REQUEST_LOGGING', False)
+
+def parse_chat_request(data):
+    """
+    Validate a chat request body.
+
+    Returns:
+        Tuple of (user_input, response_format, session_id, early_response). early_response is
+        set when the request can be answered without the agent (blank input ends the conversation).
+    """
+    user_input = data.get('user_input', '').strip()  # Strip whitespace
+
+    # Log raw request body if REQUEST_LOGGING is enabled
+    if _request_logging_enabled():
+        logging.info(f"RAW REQUEST: {json.dumps(data)}")
+
+    # Handle blank input as a conversation end signal
+    if not user_input:
+        # Get session_id for consistency
+        session_id = data.get('session_id', str(uuid.uuid4()))
+
+        return user_input, None, session_id, (jsonify({
+            "message": "Thank you for chatting! If you have any more questions, feel free to ask.",
+            "status": "success",
+            "conversation_ended": True,
+            "session_id": session_id,
+            "content_type": "application/json"
+        }), 200)
+
+    # Extract optional parameters
+    response_format = data.get('response_format', 'auto')
+
+    # Get session_id or generate a new one
+    session_id = data.get('session_id')
+    if not session_id:
+        session_id = str(uuid.uuid4())
+        logging.info(f"Generated new session ID: {session_id}")
+
+    # Log the incoming request
+    logging.info(f"Processing agent request: '{user_input[:50]}{'...' if len(user_input) > 50 else ''}' with session ID: {session_id}")
+
+    return user_input, response_format, session_id, None
+
+def build_chat_response(result, status_code, session_id):
+    """Turn the agent service result into the HTTP response returned to the client."""
+    # Prepare and log response safely
+    if _request_logging_enabled():
+        # Handle different response types for logging
+        if isinstance(result, Response):
+            # Safely log Response objects without trying to access content
+            logging.info(f"RAW RESPONSE: [Flask Response Object] Content-Type: {result.content_type}, Status: {status_code}")
+        elif isinstance(result, dict):
+            # For dictionaries, we can safely log the JSON
+            response_dict = result.copy()
+            logging.info(f"RAW RESPONSE: {json.dumps(response_dict)}")
+        else:
+            # For other types just convert to string
+            logging.info(f"RAW RESPONSE: {str(result)}")
+
+    # Check if the result is a Flask Response object
+    if isinstance(result, Response):
+        response = result
+    else:
+        # Add session_id to the response
+        if isinstance(result, dict):
+            logging.info(f"Adding session_id {session_id} to response dict")
+            result['session_id'] = session_id
+            logging.info(f"Response dict after adding session_id: {result}")
+        else:
+            logging.warning(f"Result is not a dict, it's a {type(result)}: {result}")
+
+        # Otherwise, jsonify the dictionary result
+        response = jsonify(result)
+        logging.info(f"Final response object: {response}")
+
+    # Return the response
+    return response, status_code
+
+def chat_error_response():
+    return jsonify({
+        "status": "error",
+        "message": "An error occurred while processing your request",
+        "content_type": "application/json"
+    }), 500
+
 @agent_bp.route('/chat', methods=['POST'])
 @require_api_key
 def chat():
     try:
         data = request.get_json() or {}
-        user_input = data.get('user_input', '').strip()  # Strip whitespace
-        
-        # Log raw request body if REQUEST_LOGGING is enabled
-        if os.getenv('REQUEST_LOGGING', 'false').lower() == 'true' or g.context.get('REQUEST_LOGGING', False):
-            logging.info(f"RAW REQUEST: {json.dumps(data)}")
-        
-        # Handle blank input as a conversation end signal
-        if not user_input:
-            # Get session_id for consistency
-            session_id = data.get('session_id', str(uuid.uuid4()))
-            
-            return jsonify({
-                "message": "Thank you for chatting! If you have any more questions, feel free to ask.",
-                "status": "success",
-                "conversation_ended": True,
-                "session_id": session_id,
-                "content_type": "application/json"
-            }), 200
-        
-        # Extract optional parameters
-        response_format = data.get('response_format', 'auto')
-        
-        # Get session_id or generate a new one
-        session_id = data.get('session_id')
-        if not session_id:
-            session_id = str(uuid.uuid4())
-            logging.info(f"Generated new session ID: {session_id}")
-        
+        user_input, response_format, session_id, early_response = parse_chat_request(data)
+        if early_response:
+            return early_response
+
         # Get context from Flask g if available
         context = getattr(g, 'context', {})
-        
-        # Log the incoming request
-        logging.info(f"Processing agent request: '{user_input[:50]}{'...' if len(user_input) > 50 else ''}' with session ID: {session_id}")
-        
+
         # Process the request through the service layer
         result, status_code = agent_service.process_chat(
             user_input=user_input,
@@ -55,44 +114,9 @@ def chat():
             response_format=response_format,
             session_id=session_id
         )
-        
-        # Prepare and log response safely
-        if os.getenv('REQUEST_LOGGING', 'false').lower() == 'true' or g.context.get('REQUEST_LOGGING', False):
-            # Handle different response types for logging
-            if isinstance(result, Response):
-                # Safely log Response objects without trying to access content
-                logging.info(f"RAW RESPONSE: [Flask Response Object] Content-Type: {result.content_type}, Status: {status_code}")
-            elif isinstance(result, dict):
-                # For dictionaries, we can safely log the JSON
-                response_dict = result.copy()
-                logging.info(f"RAW RESPONSE: {json.dumps(response_dict)}")
-            else:
-                # For other types just convert to string
-                logging.info(f"RAW RESPONSE: {str(result)}")
-        
-        # Check if the result is a Flask Response object
-        if isinstance(result, Response):
-            response = result
-        else:
-            # Add session_id to the response
-            if isinstance(result, dict):
-                logging.info(f"Adding session_id {session_id} to response dict")
-                result['session_id'] = session_id
-                logging.info(f"Response dict after adding session_id: {result}")
-            else:
-                logging.warning(f"Result is not a dict, it's a {type(result)}: {result}")
-            
-            # Otherwise, jsonify the dictionary result
-            response = jsonify(result)
-            logging.info(f"Final response object: {response}")
-        
-        # Return the response
-        return response, status_code
-    
+
+        return build_chat_response(result, status_code, session_id)
+
     except Exception as e:
         logging.error(f"Error in agent route: {e}", exc_info=True)
-        return jsonify({
-            "status": "error", 
-            "message": "An error occurred while processing your request",
-            "content_type": "application/json"
-        }), 500
\ No newline at end of file
+        return chat_error_response()
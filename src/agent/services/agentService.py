@@ -10,12 +10,16 @@ from src.agent.registry import registry
 from src.domain.services.ragQueryingService import query_rag
 from src.agent.services.promptService import PromptService
 from src.agent.services.memoryService import MemoryService, ConversationMemory
+from src.agent.services.historyService import ConversationHistoryManager, log_compaction
+from src.agent.services.toolMemoService import ToolResultMemo
+from src.agent.utils.token_counter import count_messages_tokens, count_tokens
+from src.agent.utils.result_formatter import result_to_string, record_encoding_stats, extract_result_payload
 
 # Import new response objects
 from src.agent.responses.base import ActionResponse
 from src.agent.responses.text import TextResponse, ErrorResponse, DirectResponse
 from src.agent.responses.special import ImageResponse, FileResponse
-from src.agent.responses.tool import ToolSelectionResponse, ToolExecutionResponse, ToolCallHistoryItem
+from src.agent.responses.tool import ToolExecutionResponse, ToolCallHistoryItem
 
 @dataclass
 class InformationResponse:
@@ -29,6 +33,7 @@ class AgentService:
         self.openai_gateway = OpenAIGateway()
         self.prompt_service = PromptService()
         self.memory_service = MemoryService()
+        self.history_manager = ConversationHistoryManager()
         self.max_tool_calls = 10  # Maximum number of tool calls in a single request
 
     def process_chat(self, user_input: str, context: Dict[str, Any] = None, 
@@ -48,68 +53,102 @@ class AgentService:
             - Status code (int)
         """
         try:
-            # Normalize parameters
-            context = context or {}
-            
-            # Generate a session ID if not provided
-            if not session_id:
-                session_id = str(uuid.uuid4())
-            
-            # Retrieve conversation memory for this session
-            memory = self.memory_service.get_conversation_memory(session_id)
-            conversation_history = memory.messages.copy()
-            
-            # Store context in flask g for action execution if it's not already there
-            if context and not hasattr(g, 'context'):
-                g.context = context
-            
-            # Store session_id in context
-            context['session_id'] = session_id
-            
-            # Add user message to history
-            conversation_history.append({
-                "role": "user", 
-                "content": user_input
-            })
-            
-            # Update conversation memory with new user message
-            self.memory_service.update_conversation_memory(session_id, conversation_history)
+            session_id, conversation_history, conversation_summary = self._prepare_conversation(
+                user_input, context, session_id
+            )
             
             # Run the tool chaining process
-            result = self._process_with_tool_chaining(user_input, conversation_history, response_format, session_id)
-            
-            # The result contains both the final response and updated conversation history
-            response_data, status_code = result.response.to_http_response()
+            result = self._process_with_tool_chaining(user_input, conversation_history, response_format, session_id,
+                                                      conversation_summary=conversation_summary)
             
-            # Add final assistant response to history
-            if hasattr(result.response, 'content'):
-                final_history = conversation_history.copy()
-                final_history.append({
-                    "role": "assistant",
-                    "content": result.response.content
-                })
-                
-                # Update conversation memory with the complete conversation
-                self.memory_service.update_conversation_memory(session_id, final_history)
-                
-                # Store tool call history as episodic memory
-                if result.tool_calls_history:
-                    self.memory_service.store_episodic_memory(
-                        session_id=session_id,
-                        event_type="tool_calls",
-                        content={
-                            "original_input": user_input,
-                            "tool_calls": [item.__dict__ for item in result.tool_calls_history]
-                        }
-                    )
-            
-            return response_data, status_code
+            return self._finalize_conversation(session_id, user_input, result)
             
         except Exception as e:
             logging.error(f"Error in agent service: {e}", exc_info=True)
             error_response = ErrorResponse("Failed to process request", str(e))
             response_data, status_code = error_response.to_http_response()
             return response_data, status_code
+    
+    def _prepare_conversation(self, user_input: str, context: Dict[str, Any],
+                              session_id: str = None) -> Tuple[str, List[Dict], str]:
+        """
+        Load the session's memory, append the user message and compact the history.
+        
+        Returns:
+            Tuple[str, List[Dict], str]: (session_id, conversation_history, conversation_summary)
+        """
+        # Normalize parameters
+        context = context or {}
+        
+        # Generate a session ID if not provided
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        # Store context in flask g for action execution if it's not already there
+        if context and not hasattr(g, 'context'):
+            g.context = context
+
+        # Store session_id in context
+        context['session_id'] = session_id
+
+        reserved_tokens = count_messages_tokens(
+            self.prompt_service.generate_initial_tool_selection_prompt(user_input)
+        )
+        compactions = []
+
+        def append_and_compact(memory: ConversationMemory):
+            # Rebuilt from the stored copy on every attempt, so turns saved by another worker are kept
+            compaction = self.history_manager.compact(
+                memory.messages + [{"role": "user", "content": user_input}],
+                summary=memory.summary,
+                reserved_tokens=reserved_tokens
+            )
+            memory.messages = compaction.messages
+            memory.summary = compaction.summary
+            memory.metadata["last_history_compaction"] = compaction.to_metadata()
+            memory.metadata["tokens_saved_total"] = memory.metadata.get("tokens_saved_total", 0) + compaction.tokens_saved
+            compactions.append(compaction)
+
+        # Add the user message and keep the history within the prompt budget,
+        # folding older turns into the rolling summary
+        self.memory_service.modify_conversation_memory(session_id, append_and_compact)
+        compaction = compactions[-1]
+        log_compaction(session_id, compaction)
+        conversation_history = compaction.messages
+        conversation_summary = compaction.summary
+        
+        return session_id, conversation_history, conversation_summary
+    
+    def _finalize_conversation(self, session_id: str, user_input: str, result: "AgentService.ToolChainResult"
+                               ) -> Tuple[Union[Dict, Response], int]:
+        """Persist the final assistant message and tool calls, and build the HTTP response."""
+        # The result contains both the final response and updated conversation history
+        response_data, status_code = result.response.to_http_response()
+
+        # Add final assistant response to history
+        if hasattr(result.response, 'content'):
+            try:
+                self.memory_service.add_to_conversation_memory(
+                    session_id, {"role": "assistant", "content": result.response.content}
+                )
+            except Exception as e:
+                # Any action has already run, so report its result, but flag the lost turn
+                logging.error(f"Failed to save assistant reply for session {session_id}: {e}")
+                if isinstance(response_data, dict):
+                    response_data["warning"] = "This reply could not be saved to the conversation history."
+
+            # Store tool call history as episodic memory
+            if result.tool_calls_history:
+                self.memory_service.store_episodic_memory(
+                    session_id=session_id,
+                    event_type="tool_calls",
+                    content={
+                        "original_input": user_input,
+                        "tool_calls": [item.__dict__ for item in result.tool_calls_history]
+                    }
+                )
+
+        return response_data, status_code
             
     @dataclass
     class ToolChainResult:
@@ -120,7 +159,8 @@ class AgentService:
 
     def _process_with_tool_chaining(self, user_input: str, conversation_history: List[Dict], 
                                    response_format: str = "auto",
-                                   session_id: str = None) -> ToolChainResult:
+                                   session_id: str = None,
+                                   conversation_summary: str = "") -> ToolChainResult:
         """
         Core tool chaining implementation that handles multiple sequential tool calls.
         
@@ -128,12 +168,15 @@ class AgentService:
             user_input: The original user input
             conversation_history: The conversation history including the latest user input
             response_format: The desired response format
+            conversation_summary: Rolling summary of turns compacted out of the history
             
         Returns:
             ToolChainResult: Container with final response and updated conversation
         """
         # Initialize tracking variables
         tool_calls_history = []
+        tool_data = None  # Full structured result of the last tool, returned alongside the final message
+        tool_memo = ToolResultMemo()  # Reuses read-only tool results across iterations of this request
         iterations = 0
         current_input = user_input
         current_history = conversation_history.copy()
@@ -148,7 +191,9 @@ class AgentService:
                 user_input=current_input,
                 conversation_history=current_history,
                 response_format=response_format,
-                tool_calls_history=tool_calls_history
+                tool_calls_history=tool_calls_history,
+                conversation_summary=conversation_summary,
+                tool_memo=tool_memo
             )
             
             # Case 1: If it's a direct response or error, return immediately
@@ -160,23 +205,9 @@ class AgentService:
                     tool_calls_history=tool_calls_history
                 )
             
-            # Case 2: It's a tool call response - extract details
-            tool_call = selection_response.tool_call
-            action = selection_response.action
-            tool_result = selection_response.result
-            
-            # Add to tool calls history
-            tool_calls_history.append(ToolCallHistoryItem(
-                tool_name=tool_call.function.name,
-                tool_args=json.loads(tool_call.function.arguments),
-                tool_result=self._get_result_as_string(tool_result)
-            ))
-            
-            # Update conversation history with this tool call
-            current_history = self._add_tool_interaction_to_messages(
-                current_history, 
-                tool_call, 
-                self._get_result_as_string(tool_result)
+            # Case 2: It's a tool call response - record it in the history
+            current_history, tool_data = self._record_tool_execution(
+                selection_response, tool_calls_history, current_history
             )
             
             # Evaluate if we need more tool calls
@@ -194,12 +225,18 @@ class AgentService:
             current_input = next_input
         
         # After tool chain completes, generate final response
+        if tool_memo.hits:
+            logging.info(f"♻️ Tool memo saved {tool_memo.hits} repeated tool call(s) in this request")
+        
         final_response = self._perform_response_generation_stage(
             action=selection_response.action,
             messages=current_history,
             tool_calls_history=tool_calls_history,
-            original_input=user_input
+            original_input=user_input,
+            conversation_summary=conversation_summary
         )
+        if tool_data is not None:
+            final_response.set_metadata("data", tool_data)
         
         return self.ToolChainResult(
             response=final_response,
@@ -207,9 +244,46 @@ class AgentService:
             tool_calls_history=tool_calls_history
         )
     
+    def _record_tool_execution(self, selection_response: ToolExecutionResponse,
+                               tool_calls_history: List[ToolCallHistoryItem],
+                               conversation_history: List[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Append an executed tool call to the tool call history and the conversation.
+        
+        Returns:
+            Tuple[List[Dict], Optional[Dict]]: (updated conversation history, structured tool payload)
+        """
+        tool_call = selection_response.tool_call
+        action = selection_response.action
+        tool_result = selection_response.result
+        
+        # Encode the result compactly for the LLM; the full result stays on the response
+        llm_result, tokens_before, tokens_after = self._get_result_for_llm(action, tool_call.function.name, tool_result)
+        payload = extract_result_payload(tool_result)
+        tool_data = payload if isinstance(payload, dict) else None
+        
+        # Add to tool calls history
+        tool_calls_history.append(ToolCallHistoryItem(
+            tool_name=tool_call.function.name,
+            tool_args=json.loads(tool_call.function.arguments),
+            tool_result=llm_result,
+            tokens_before=tokens_before,
+            tokens_after=tokens_after
+        ))
+        
+        # Update conversation history with this tool call
+        conversation_history = self._add_tool_interaction_to_messages(
+            conversation_history, 
+            tool_call, 
+            llm_result
+        )
+        return conversation_history, tool_data
+    
     def _perform_tool_selection_stage(self, user_input: str, conversation_history: List[Dict], 
                                      response_format: str = "auto", 
-                                     tool_calls_history: List[ToolCallHistoryItem] = None) -> ActionResponse:
+                                     tool_calls_history: List[ToolCallHistoryItem] = None,
+                                     conversation_summary: str = "",
+                                     tool_memo: Optional[ToolResultMemo] = None) -> ActionResponse:
         """
         Enhanced tool selection stage that includes tool chaining context
         """
@@ -217,7 +291,8 @@ class AgentService:
         messages = self._prepare_tool_selection_prompt(
             user_input=user_input, 
             conversation_history=conversation_history,
-            tool_calls_history=tool_calls_history or []
+            tool_calls_history=tool_calls_history or [],
+            conversation_summary=conversation_summary
         )
         
         # Get available tools
@@ -234,6 +309,30 @@ class AgentService:
             )
             
         # Process AI response (execute tool or return direct text)
+        selected = self._resolve_selected_action(response)
+        if isinstance(selected, ActionResponse):
+            return selected
+        tool_call, action = selected
+        
+        # Execute the action
+        try:
+            action_result = self._execute_action(action, tool_call, user_input, response_format, tool_memo)
+        except Exception as e:
+            logging.error(f"Error executing action {tool_call.function.name}: {e}", exc_info=True)
+            return ErrorResponse(
+                f"I encountered an error while trying to {tool_call.function.name}.",
+                str(e)
+            )
+        
+        return self._wrap_action_result(tool_call, action, action_result, messages)
+    
+    def _resolve_selected_action(self, response: Any) -> Union[ActionResponse, Tuple[Any, Any]]:
+        """
+        Resolve the tool call chosen by the model to a registered action.
+        
+        Returns:
+            Either (tool_call, action), or a DirectResponse/ErrorResponse when no action should run
+        """
         message = response.choices[0].message
         tool_calls = message.tool_calls
 
@@ -260,20 +359,11 @@ class AgentService:
                 f"I don't know how to {function_name} yet.",
                 status_code=400
             )
-        
-        # Create tool selection response
-        tool_selection = ToolSelectionResponse(tool_call, messages, user_input)
-        
-        # Execute the action
-        try:
-            action_result = self._execute_action(action, tool_call, user_input, response_format)
-        except Exception as e:
-            logging.error(f"Error executing action {function_name}: {e}", exc_info=True)
-            return ErrorResponse(
-                f"I encountered an error while trying to {function_name}.",
-                str(e)
-            )
-        
+        return tool_call, action
+    
+    def _wrap_action_result(self, tool_call: Any, action: Any, action_result: Any,
+                            messages: List[Dict]) -> ActionResponse:
+        """Wrap an action's result in the matching response object."""
         # Check for special response types
         if isinstance(action_result, Response) and action_result.mimetype == "image/png":
             return ImageResponse(action_result)
@@ -302,18 +392,37 @@ class AgentService:
         Returns:
             Tuple[bool, str]: (needs_more_tools, next_input_if_needed)
         """
+        if self._should_stop_tool_chain(tool_calls_history):
+            return False, ""
+       
+        # Make a dedicated AI call to determine if more tools are needed
+        messages = self._build_tool_evaluation_messages(tool_calls_history, original_input)
+        
+        try:
+            # Using a lower temperature for more consistent decision-making
+            decision_response = self.openai_gateway.get_completion(messages, temperature=0.1)
+            return self._parse_tool_evaluation(messages, decision_response)
+        except Exception as e:
+            logging.error(f"Error in tool chain evaluation: {e}")
+            return False, ""
+    
+    def _should_stop_tool_chain(self, tool_calls_history: List[ToolCallHistoryItem]) -> bool:
+        """Stop conditions checked before asking the model whether more tools are needed."""
         # If we've reached the maximum number of tool calls, stop
         if len(tool_calls_history) >= self.max_tool_calls:
             logging.info(f"Reached maximum tool call limit ({self.max_tool_calls})")
-            return False, ""
+            return True
 
         # If the last tool call was unsuccessful, stop to prevent error loops
         if tool_calls_history and "error" in tool_calls_history[-1].tool_result.lower():
             logging.info("Last tool call had an error - stopping tool chain")
-            return False, ""
-       
-        # Make a dedicated AI call to determine if more tools are needed
-        messages = [
+            return True
+        return False
+    
+    def _build_tool_evaluation_messages(self, tool_calls_history: List[ToolCallHistoryItem],
+                                        original_input: str) -> List[Dict]:
+        """Prompt for the tool chain evaluation call."""
+        return [
             {
                 "role": "system", 
                 "content": self.prompt_service.generate_tool_evaluation_prompt()
@@ -328,42 +437,39 @@ class AgentService:
                            ])
             }
         ]
-        
-        try:
-            # Using a lower temperature for more consistent decision-making
-            decision_response = self.openai_gateway.get_completion(messages, temperature=0.1)
-            decision_text = decision_response.choices[0].message.content.strip()
-            
-            # Log the full evaluation prompt and response for debugging
-            logging.info(f"🔍 Tool chain evaluation prompt (last message): {messages[-1]['content'][:200]}...")
-            logging.info(f"🔍 Tool chain evaluation full response: {decision_text}")
-            
-            if decision_text.startswith("COMPLETE:"):
-                completion_reason = decision_text[9:].strip()
-                logging.info(f"Tool chain evaluation: Complete - {completion_reason}")
-                return False, ""
-            elif decision_text.startswith("MORE_TOOLS_NEEDED:"):
-                # Extract the reasoning part after MORE_TOOLS_NEEDED
-                next_input = decision_text[17:].strip()
-                logging.info(f"Tool chain evaluation: More tools needed - {next_input}")
-                return True, next_input
-            else:
-                logging.warning(f"Unclear tool chain evaluation result: {decision_text}")
-                # Default to ending the chain if the response is unclear
-                return False, ""
-                
-        except Exception as e:
-            logging.error(f"Error in tool chain evaluation: {e}")
+    
+    def _parse_tool_evaluation(self, messages: List[Dict], decision_response: Any) -> Tuple[bool, str]:
+        """Interpret the COMPLETE / MORE_TOOLS_NEEDED decision of the evaluation call."""
+        decision_text = decision_response.choices[0].message.content.strip()
+
+        # Log the full evaluation prompt and response for debugging
+        logging.info(f"🔍 Tool chain evaluation prompt (last message): {messages[-1]['content'][:200]}...")
+        logging.info(f"🔍 Tool chain evaluation full response: {decision_text}")
+
+        if decision_text.startswith("COMPLETE:"):
+            completion_reason = decision_text[9:].strip()
+            logging.info(f"Tool chain evaluation: Complete - {completion_reason}")
+            return False, ""
+        elif decision_text.startswith("MORE_TOOLS_NEEDED:"):
+            # Extract the reasoning part after MORE_TOOLS_NEEDED
+            next_input = decision_text[17:].strip()
+            logging.info(f"Tool chain evaluation: More tools needed - {next_input}")
+            return True, next_input
+        else:
+            logging.warning(f"Unclear tool chain evaluation result: {decision_text}")
+            # Default to ending the chain if the response is unclear
             return False, ""
 
     def _prepare_tool_selection_prompt(self, user_input: str, conversation_history: List[Dict], 
-                                      tool_calls_history: List[ToolCallHistoryItem] = None) -> List[Dict]:
+                                      tool_calls_history: List[ToolCallHistoryItem] = None,
+                                      conversation_summary: str = "") -> List[Dict]:
         """Prepares the prompt for tool selection with tool chaining context"""
         # Use the new enhanced PromptService method that incorporates tool chain context
         return self.prompt_service.generate_tool_selection_prompt_with_context(
             user_input=user_input, 
             conversation_history=conversation_history,
-            tool_calls_history=tool_calls_history
+            tool_calls_history=tool_calls_history,
+            conversation_summary=conversation_summary
         )
     
     def _get_available_tools(self) -> List[Dict]:
@@ -383,30 +489,39 @@ class AgentService:
         return response
     
     def _execute_action(self, action: Any, tool_call: Any, user_input: str, 
-                       response_format: str = "auto") -> Any:
+                       response_format: str = "auto",
+                       tool_memo: Optional[ToolResultMemo] = None) -> Any:
         """Executes the selected action with the provided parameters"""
-        try:
-            arguments = json.loads(tool_call.function.arguments)
-        except json.JSONDecodeError:
-            logging.error("Failed to parse tool arguments as JSON")
-            raise ValueError("Failed to parse tool arguments as JSON")
+        arguments = self._parse_tool_arguments(tool_call)
 
         # Get context from Flask g if available
         context = getattr(g, 'context', {})
 
         # Execute the action
         logging.info(f"Executing action: {tool_call.function.name}")
-        return action.execute(
+        run = lambda: action.execute(
             arguments=arguments,
             context=context,
             user_input=user_input,
             response_format=response_format
         )
+        if tool_memo is None:
+            return run()
+        return tool_memo.execute(action, arguments, context, run)
+    
+    def _parse_tool_arguments(self, tool_call: Any) -> Dict[str, Any]:
+        """Parse the JSON arguments of a tool call."""
+        try:
+            return json.loads(tool_call.function.arguments)
+        except json.JSONDecodeError:
+            logging.error("Failed to parse tool arguments as JSON")
+            raise ValueError("Failed to parse tool arguments as JSON")
     
     def _perform_response_generation_stage(self, action: Any = None, messages: List[Dict] = None, 
                                           tool_calls_history: List[ToolCallHistoryItem] = None,
                                           original_input: str = None, 
-                                          tool_execution_response: ToolExecutionResponse = None) -> ActionResponse:
+                                          tool_execution_response: ToolExecutionResponse = None,
+                                          conversation_summary: str = "") -> ActionResponse:
         """
         Enhanced response generation stage that works with either a single tool execution
         or the results of a tool chaining sequence.
@@ -417,16 +532,42 @@ class AgentService:
             tool_calls_history: History of all tool calls in the sequence (optional)
             original_input: Original user input (optional)
             tool_execution_response: Single tool execution response from previous code path (optional)
+            conversation_summary: Rolling summary of turns compacted out of the history (optional)
             
         Returns:
             ActionResponse: Final response to send to the user
         """
+        final_response_messages = self._build_final_response_messages(
+            action, messages, tool_calls_history, original_input,
+            tool_execution_response, conversation_summary
+        )
+        
+        # Make final AI call
+        try:
+            logging.info("Making AI call for final response generation")
+            final_ai_response = self.openai_gateway.get_completion(final_response_messages)
+            logging.info("Final response generation complete")
+            
+            return self._parse_final_response(final_ai_response)
+            
+        except Exception as e:
+            logging.error(f"Error in final response generation: {e}")
+            return ErrorResponse("Error processing the response", str(e))
+    
+    def _build_final_response_messages(self, action: Any, messages: List[Dict],
+                                       tool_calls_history: List[ToolCallHistoryItem],
+                                       original_input: str,
+                                       tool_execution_response: ToolExecutionResponse = None,
+                                       conversation_summary: str = "") -> List[Dict]:
+        """Prompt for the final response generation call."""
         # Handle backward compatibility with the old method signature
         if tool_execution_response:
             # Extract from the single tool execution response
             action = tool_execution_response.action
             messages = tool_execution_response.messages
-            tool_result = self._get_result_as_string(tool_execution_response.result)
+            tool_result, _, _ = self._get_result_for_llm(
+                action, tool_execution_response.tool_call.function.name, tool_execution_response.result
+            )
             
             # Update conversation with single tool interaction
             messages = self._add_tool_interaction_to_messages(
@@ -436,52 +577,45 @@ class AgentService:
             )
         
         # Prepare final response prompt using the PromptService - this preserves all context relevance instructions
-        final_response_messages = self.prompt_service.generate_final_response_prompt_with_context(
+        return self.prompt_service.generate_final_response_prompt_with_context(
             messages=messages, 
             action=action, 
             tool_calls_history=tool_calls_history,
-            original_input=original_input
+            original_input=original_input,
+            conversation_summary=conversation_summary
         )
-        
-        # Make final AI call
-        try:
-            logging.info("Making AI call for final response generation")
-            final_ai_response = self.openai_gateway.get_completion(final_response_messages)
-            logging.info("Final response generation complete")
-            
-            # Parse the content for conversation end marker if present
-            content = final_ai_response.choices[0].message.content
-            is_conversation_over = False
-            
-            # Log the raw response content
-            logging.debug(f"Final response raw content: {content}")
-            
-            # Check for JSON with is_conversation_over flag
-            if content.strip().startswith('{') and content.strip().endswith('}'):
-                try:
-                    response_json = json.loads(content)
-                    logging.debug(f"Successfully parsed JSON from response: {response_json}")
-                    
-                    if 'is_conversation_over' in response_json:
-                        is_conversation_over = bool(response_json.get('is_conversation_over'))
-                        logging.info(f"Set conversation_over flag to: {is_conversation_over}")
-                    
-                    if 'message' in response_json:
-                        content = response_json.get('message')
-                        logging.debug(f"Extracted message from JSON: {content}")
-                except json.JSONDecodeError as e:
-                    logging.warning(f"Failed to parse response as JSON: {e}")
-            
-            # Create text response
-            response = TextResponse(content)
-            if is_conversation_over:
-                response.mark_conversation_over()
-                
-            return response
-            
-        except Exception as e:
-            logging.error(f"Error in final response generation: {e}")
-            return ErrorResponse("Error processing the response", str(e))
+    
+    def _parse_final_response(self, final_ai_response: Any) -> ActionResponse:
+        """Build the TextResponse from the final completion, honoring the conversation end marker."""
+        # Parse the content for conversation end marker if present
+        content = final_ai_response.choices[0].message.content
+        is_conversation_over = False
+
+        # Log the raw response content
+        logging.debug(f"Final response raw content: {content}")
+
+        # Check for JSON with is_conversation_over flag
+        if content.strip().startswith('{') and content.strip().endswith('}'):
+            try:
+                response_json = json.loads(content)
+                logging.debug(f"Successfully parsed JSON from response: {response_json}")
+
+                if 'is_conversation_over' in response_json:
+                    is_conversation_over = bool(response_json.get('is_conversation_over'))
+                    logging.info(f"Set conversation_over flag to: {is_conversation_over}")
+
+                if 'message' in response_json:
+                    content = response_json.get('message')
+                    logging.debug(f"Extracted message from JSON: {content}")
+            except json.JSONDecodeError as e:
+                logging.warning(f"Failed to parse response as JSON: {e}")
+
+        # Create text response
+        response = TextResponse(content)
+        if is_conversation_over:
+            response.mark_conversation_over()
+
+        return response
         
     def _add_tool_interaction_to_messages(self, messages: List[Dict], tool_call: Any, tool_result: str) -> List[Dict]:
         """Adds the tool interaction to the conversation history"""
@@ -512,29 +646,28 @@ class AgentService:
         Convert any result type to a string representation.
         This replaces the old _extract_tool_result method.
         """
-        if isinstance(result, Response):
-            try:
-                response_data = result.get_data(as_text=True)
-                if response_data.strip().startswith('{'):
-                    try:
-                        json_data = json.loads(response_data)
-                        return json_data.get("message", response_data)
-                    except json.JSONDecodeError:
-                        return response_data
-                return response_data
-            except Exception as e:
-                logging.error(f"Error extracting data from Response: {e}")
-                return "Error retrieving data from response"
-        
-        if isinstance(result, tuple) and len(result) == 2:
-            response_obj = result[0]
-            if isinstance(response_obj, dict):
-                return response_obj.get("message", json.dumps(response_obj))
-            if isinstance(response_obj, Response):
-                return self._get_result_as_string(response_obj)
-            return str(response_obj)
-        
-        return str(result)
+        return result_to_string(result)
+    
+    def _get_result_for_llm(self, action: Any, tool_name: str, result: Any) -> Tuple[str, int, int]:
+        """
+        Get the compact LLM-facing encoding of a tool result and measure its prompt cost.
+        
+        Returns:
+            Tuple[str, int, int]: (compact_result, tokens_before, tokens_after)
+        """
+        default_result = self._get_result_as_string(result)
+        try:
+            compact_result = action.format_result_for_llm(result) if hasattr(action, "format_result_for_llm") else default_result
+        except Exception as e:
+            logging.warning(f"Compact encoding failed for {tool_name}, using default: {e}")
+            compact_result = default_result
+        
+        tokens_before = count_tokens(default_result)
+        tokens_after = count_tokens(compact_result)
+        record_encoding_stats(tool_name, tokens_before, tokens_after)
+        logging.info(f"📉 Tool result encoding for {tool_name}: {tokens_before} → {tokens_after} tokens")
+        
+        return compact_result, tokens_before, tokens_after
 
     def get_information_response(self, question: str, context: dict) -> InformationResponse:
         """
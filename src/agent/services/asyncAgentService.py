@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from flask import g, Response
+
+from src.agent.gateways.asyncOpenAIGateway import AsyncOpenAIGateway
+from src.agent.services.agentService import AgentService
+from src.agent.services.toolMemoService import ToolResultMemo
+from src.agent.responses.base import ActionResponse
+from src.agent.responses.text import ErrorResponse
+from src.agent.responses.tool import ToolCallHistoryItem
+
+
+class AsyncAgentService(AgentService):
+    """
+    asyncio variant of AgentService for the ASGI entry point.
+
+    Model calls go through AsyncOpenAI and actions run via execute_async, so a
+    single process can hold many in-flight chats. Prompt building, tool result
+    encoding and response parsing are shared with AgentService; memory reads and
+    writes run in worker threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.openai_gateway = AsyncOpenAIGateway()
+
+    async def process_chat_async(self, user_input: str, context: Dict[str, Any] = None,
+                                 response_format: str = "auto",
+                                 session_id: str = None) -> Tuple[Union[Dict, Response], int]:
+        """
+        Async counterpart of AgentService.process_chat.
+
+        Must run inside a Flask app context with g.context set to the caller's context.
+
+        Returns:
+            Tuple containing:
+            - The response data (Dict or Response object)
+            - Status code (int)
+        """
+        try:
+            session_id, conversation_history, conversation_summary = await asyncio.to_thread(
+                self._prepare_conversation, user_input, context, session_id
+            )
+
+            result = await self._process_with_tool_chaining_async(
+                user_input, conversation_history, response_format, session_id,
+                conversation_summary=conversation_summary
+            )
+
+            return await asyncio.to_thread(
+                self._finalize_conversation, session_id, user_input, result
+            )
+
+        except Exception as e:
+            logging.error(f"Error in async agent service: {e}", exc_info=True)
+            error_response = ErrorResponse("Failed to process request", str(e))
+            response_data, status_code = error_response.to_http_response()
+            return response_data, status_code
+
+    async def _process_with_tool_chaining_async(self, user_input: str, conversation_history: List[Dict],
+                                                response_format: str = "auto",
+                                                session_id: str = None,
+                                                conversation_summary: str = "") -> AgentService.ToolChainResult:
+        """Async counterpart of AgentService._process_with_tool_chaining."""
+        tool_calls_history = []
+        tool_data = None
+        iterations = 0
+        current_input = user_input
+        current_history = conversation_history.copy()
+        tool_memo = ToolResultMemo()
+
+        while iterations < self.max_tool_calls:
+            iterations += 1
+            logging.info(f"Tool chaining iteration {iterations}/{self.max_tool_calls}")
+
+            selection_response = await self._perform_tool_selection_stage_async(
+                user_input=current_input,
+                conversation_history=current_history,
+                response_format=response_format,
+                tool_calls_history=tool_calls_history,
+                conversation_summary=conversation_summary,
+                tool_memo=tool_memo
+            )
+
+            if not selection_response.requires_second_ai_call or selection_response.response_type == "error":
+                logging.info(f"Tool chain ended with direct response after {iterations} iterations")
+                return self.ToolChainResult(
+                    response=selection_response,
+                    conversation_history=current_history,
+                    tool_calls_history=tool_calls_history
+                )
+
+            current_history, tool_data = self._record_tool_execution(
+                selection_response, tool_calls_history, current_history
+            )
+
+            needs_more_tools, next_input = await self._evaluate_need_for_more_tools_async(
+                tool_calls_history=tool_calls_history,
+                original_input=user_input
+            )
+
+            if not needs_more_tools:
+                logging.info(f"Tool chain complete after {iterations} iterations - proceeding to response generation")
+                break
+
+            current_input = next_input
+
+        if tool_memo.hits:
+            logging.info(f"♻️ Tool memo saved {tool_memo.hits} repeated tool call(s) in this request")
+
+        final_response = await self._perform_response_generation_stage_async(
+            action=selection_response.action,
+            messages=current_history,
+            tool_calls_history=tool_calls_history,
+            original_input=user_input,
+            conversation_summary=conversation_summary
+        )
+        if tool_data is not None:
+            final_response.set_metadata("data", tool_data)
+
+        return self.ToolChainResult(
+            response=final_response,
+            conversation_history=current_history,
+            tool_calls_history=tool_calls_history
+        )
+
+    async def _perform_tool_selection_stage_async(self, user_input: str, conversation_history: List[Dict],
+                                                  response_format: str = "auto",
+                                                  tool_calls_history: List[ToolCallHistoryItem] = None,
+                                                  conversation_summary: str = "",
+                                                  tool_memo: Optional[ToolResultMemo] = None) -> ActionResponse:
+        """Async counterpart of AgentService._perform_tool_selection_stage."""
+        messages = self._prepare_tool_selection_prompt(
+            user_input=user_input,
+            conversation_history=conversation_history,
+            tool_calls_history=tool_calls_history or [],
+            conversation_summary=conversation_summary
+        )
+        tools = self._get_available_tools()
+
+        try:
+            response = await self.openai_gateway.get_completion(messages, tools, tool_choice="auto")
+        except Exception as e:
+            logging.error(f"Tool selection failed: {e}")
+            return ErrorResponse(
+                "I'm sorry, I encountered a problem while processing your request.",
+                str(e)
+            )
+
+        selected = self._resolve_selected_action(response)
+        if isinstance(selected, ActionResponse):
+            return selected
+        tool_call, action = selected
+
+        try:
+            action_result = await self._execute_action_async(action, tool_call, user_input, response_format, tool_memo)
+        except Exception as e:
+            logging.error(f"Error executing action {tool_call.function.name}: {e}", exc_info=True)
+            return ErrorResponse(
+                f"I encountered an error while trying to {tool_call.function.name}.",
+                str(e)
+            )
+
+        return self._wrap_action_result(tool_call, action, action_result, messages)
+
+    async def _execute_action_async(self, action: Any, tool_call: Any, user_input: str,
+                                    response_format: str = "auto",
+                                    tool_memo: Optional[ToolResultMemo] = None) -> Any:
+        """Async counterpart of AgentService._execute_action."""
+        arguments = self._parse_tool_arguments(tool_call)
+        context = getattr(g, 'context', {})
+
+        logging.info(f"Executing action: {tool_call.function.name}")
+
+        async def run():
+            if hasattr(action, "execute_async"):
+                return await action.execute_async(
+                    arguments=arguments,
+                    context=context,
+                    user_input=user_input,
+                    response_format=response_format
+                )
+            # Actions that don't extend AgentAction only have the blocking execute()
+            return await asyncio.to_thread(
+                action.execute,
+                arguments=arguments,
+                context=context,
+                user_input=user_input,
+                response_format=response_format
+            )
+
+        if tool_memo is None:
+            return await run()
+        return await tool_memo.execute_async(action, arguments, context, run)
+
+    async def _evaluate_need_for_more_tools_async(self, tool_calls_history: List[ToolCallHistoryItem],
+                                                  original_input: str) -> Tuple[bool, str]:
+        """Async counterpart of AgentService._evaluate_need_for_more_tools."""
+        if self._should_stop_tool_chain(tool_calls_history):
+            return False, ""
+
+        messages = self._build_tool_evaluation_messages(tool_calls_history, original_input)
+        try:
+            decision_response = await self.openai_gateway.get_completion(messages, temperature=0.1)
+            return self._parse_tool_evaluation(messages, decision_response)
+        except Exception as e:
+            logging.error(f"Error in tool chain evaluation: {e}")
+            return False, ""
+
+    async def _perform_response_generation_stage_async(self, action: Any = None, messages: List[Dict] = None,
+                                                       tool_calls_history: List[ToolCallHistoryItem] = None,
+                                                       original_input: str = None,
+                                                       conversation_summary: str = "") -> ActionResponse:
+        """Async counterpart of AgentService._perform_response_generation_stage."""
+        final_response_messages = self._build_final_response_messages(
+            action, messages, tool_calls_history, original_input,
+            conversation_summary=conversation_summary
+        )
+
+        try:
+            logging.info("Making AI call for final response generation")
+            final_ai_response = await self.openai_gateway.get_completion(final_response_messages)
+            logging.info("Final response generation complete")
+
+            return self._parse_final_response(final_ai_response)
+
+        except Exception as e:
+            logging.error(f"Error in final response generation: {e}")
+            return ErrorResponse("Error processing the response", str(e))
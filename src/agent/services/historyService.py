@@ -0,0 +1,186 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.agent.utils.token_counter import (
+    count_messages_tokens,
+    count_tokens,
+    truncate_to_tokens,
+)
+
+# Number of most recent user turns that are always sent verbatim
+DEFAULT_KEEP_TURNS = int(os.getenv("AGENT_HISTORY_KEEP_TURNS", "4"))
+# Token budget for a single completion prompt (system prompt + summary + history)
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("AGENT_PROMPT_TOKEN_BUDGET", "12000"))
+# Tool results in older kept turns are truncated to this many tokens
+DEFAULT_TOOL_RESULT_MAX_TOKENS = int(os.getenv("AGENT_TOOL_RESULT_MAX_TOKENS", "300"))
+# Upper bound for the rolling summary stored in ConversationMemory
+DEFAULT_SUMMARY_MAX_TOKENS = int(os.getenv("AGENT_HISTORY_SUMMARY_MAX_TOKENS", "800"))
+
+# Per-line limits used when collapsing a turn into the rolling summary
+_SUMMARY_USER_TOKENS = 60
+_SUMMARY_ASSISTANT_TOKENS = 80
+_SUMMARY_TOOL_TOKENS = 40
+
+
+@dataclass
+class CompactionResult:
+    """Result of compacting a conversation history for one request"""
+    messages: List[Dict[str, Any]]
+    summary: str
+    tokens_before: int
+    tokens_after: int
+    turns_summarized: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_before - self.tokens_after, 0)
+
+    def to_metadata(self) -> Dict[str, int]:
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+            "turns_summarized": self.turns_summarized
+        }
+
+
+class ConversationHistoryManager:
+    """
+    Keeps conversation history within a token budget.
+
+    The last N user turns are kept verbatim. Older turns are collapsed into a
+    rolling text summary that is stored alongside the conversation, and bulky
+    tool results outside the current turn are truncated.
+    """
+
+    def __init__(self, keep_turns: Optional[int] = None,
+                 prompt_token_budget: Optional[int] = None,
+                 tool_result_max_tokens: Optional[int] = None,
+                 summary_max_tokens: Optional[int] = None):
+        self.keep_turns = max(keep_turns if keep_turns is not None else DEFAULT_KEEP_TURNS, 1)
+        self.prompt_token_budget = prompt_token_budget or DEFAULT_PROMPT_TOKEN_BUDGET
+        self.tool_result_max_tokens = tool_result_max_tokens or DEFAULT_TOOL_RESULT_MAX_TOKENS
+        self.summary_max_tokens = summary_max_tokens or DEFAULT_SUMMARY_MAX_TOKENS
+
+    def compact(self, messages: List[Dict[str, Any]], summary: str = "",
+                reserved_tokens: int = 0) -> CompactionResult:
+        """
+        Compact a conversation so that reserved_tokens + summary + history fits the prompt budget.
+
+        Args:
+            messages: Full conversation history, oldest first, ending with the latest user message
+            summary: Rolling summary of turns that were compacted on earlier requests
+            reserved_tokens: Tokens already used by the system prompt
+
+        Returns:
+            CompactionResult: The messages to send, the updated summary and token accounting
+        """
+        summary = summary or ""
+        tokens_before = count_messages_tokens(messages) + count_tokens(summary)
+
+        turns = self._split_turns(messages)
+        older_turns = turns[:-self.keep_turns]
+        recent_turns = turns[-self.keep_turns:]
+
+        summary_lines = [self._summarize_turn(turn) for turn in older_turns]
+
+        # Tool output only matters verbatim for the turn currently being answered
+        recent_turns = [
+            turn if i == len(recent_turns) - 1 else self._shrink_tool_results(turn)
+            for i, turn in enumerate(recent_turns)
+        ]
+
+        summary = self._merge_summary(summary, summary_lines)
+        turns_summarized = len(older_turns)
+
+        # Enforce the prompt budget by folding the oldest kept turns into the summary
+        budget = self.prompt_token_budget - reserved_tokens
+        while len(recent_turns) > 1 and self._turns_tokens(recent_turns) + count_tokens(summary) > budget:
+            summary = self._merge_summary(summary, [self._summarize_turn(recent_turns.pop(0))])
+            turns_summarized += 1
+
+        remaining = budget - self._turns_tokens(recent_turns)
+        if count_tokens(summary) > remaining:
+            summary = self._trim_summary(summary, max(remaining, 0))
+
+        compacted = [message for turn in recent_turns for message in turn]
+        tokens_after = count_messages_tokens(compacted) + count_tokens(summary)
+
+        return CompactionResult(
+            messages=compacted,
+            summary=summary,
+            tokens_before=tokens_before,
+            tokens_after=tokens_after,
+            turns_summarized=turns_summarized
+        )
+
+    def _split_turns(self, messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group messages into turns, each starting at a user message."""
+        turns = []
+        for message in messages:
+            if not isinstance(message, dict):
+                continue
+            if message.get("role") == "user" or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _turns_tokens(self, turns: List[List[Dict[str, Any]]]) -> int:
+        return sum(count_messages_tokens(turn) for turn in turns)
+
+    def _shrink_tool_results(self, turn: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Truncate bulky tool results while keeping tool call/result pairs intact."""
+        shrunk = []
+        for message in turn:
+            if message.get("role") == "tool" and count_tokens(message.get("content")) > self.tool_result_max_tokens:
+                message = dict(message)
+                message["content"] = truncate_to_tokens(str(message.get("content")), self.tool_result_max_tokens)
+            shrunk.append(message)
+        return shrunk
+
+    def _summarize_turn(self, turn: List[Dict[str, Any]]) -> str:
+        """Collapse one turn into a single summary line."""
+        parts = []
+        for message in turn:
+            role = message.get("role")
+            content = message.get("content")
+            if role == "user" and content:
+                parts.append(f"User: {truncate_to_tokens(str(content), _SUMMARY_USER_TOKENS)}")
+            elif role == "assistant" and message.get("tool_calls"):
+                for tool_call in message["tool_calls"]:
+                    function = tool_call.get("function", {})
+                    parts.append(f"Called {function.get('name')}({function.get('arguments', '')})")
+            elif role == "assistant" and content:
+                parts.append(f"Assistant: {truncate_to_tokens(str(content), _SUMMARY_ASSISTANT_TOKENS)}")
+            elif role == "tool" and content:
+                parts.append(f"Result: {truncate_to_tokens(str(content), _SUMMARY_TOOL_TOKENS)}")
+        return "- " + " | ".join(parts) if parts else ""
+
+    def _merge_summary(self, summary: str, lines: List[str]) -> str:
+        lines = [line for line in lines if line]
+        if not lines:
+            return summary
+        merged = "\n".join(([summary] if summary else []) + lines)
+        return self._trim_summary(merged, self.summary_max_tokens)
+
+    def _trim_summary(self, summary: str, max_tokens: int) -> str:
+        """Drop the oldest summary lines until the summary fits max_tokens."""
+        lines = summary.split("\n")
+        while lines and count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+
+def log_compaction(session_id: str, result: CompactionResult):
+    """Log the token accounting for a compaction."""
+    if result.tokens_saved or result.turns_summarized:
+        logging.info(
+            f"📉 History compaction for session {session_id}: {result.tokens_before} → "
+            f"{result.tokens_after} tokens (saved {result.tokens_saved}, "
+            f"{result.turns_summarized} turn(s) summarized)"
+        )
+    else:
+        logging.debug(f"History for session {session_id} within budget ({result.tokens_after} tokens)")
@@ -0,0 +1,218 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Cache bounds; evicted entries are reloaded from the persistent store on access
+DEFAULT_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# Entries are dropped from the cache this long after their last write
+DEFAULT_TTL_SECONDS = float(os.getenv("MEMORY_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_SWEEP_INTERVAL_SECONDS = float(os.getenv("MEMORY_CACHE_SWEEP_INTERVAL_SECONDS", "30"))
+
+_caches = weakref.WeakSet()
+# Caches swept by the one process-wide sweeper thread
+_swept_caches = weakref.WeakSet()
+_sweeper: Optional[threading.Thread] = None
+_sweeper_lock = threading.Lock()
+
+
+class BoundedMemoryCache:
+    """
+    LRU cache for memory items bounded by entry count and approximate bytes.
+
+    Every entry has a deadline: the earlier of its own "expiry" field (semantic
+    memories) and write time + ttl. Deadlines live in a min-heap so a sweep only
+    touches entries that are due. Entries whose data has expired are passed to
+    on_expire so the owner can delete them from persistence; entries that only
+    reached the cache TTL are just dropped and reloaded on the next access.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 on_expire: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_expire = on_expire
+
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._deadlines: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        _caches.add(self)
+
+    def __contains__(self, key: str) -> bool:
+        # A membership check isn't a lookup: no hit/miss counting or LRU reordering
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.time()
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        data = self.get(key)
+        if data is None:
+            raise KeyError(key)
+        return data
+
+    def __setitem__(self, key: str, data: Dict[str, Any]):
+        self.set(key, data)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached data for key, marking it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            data, _, deadline = entry
+            if deadline > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self._remove_expired(key)
+            self.misses += 1
+        self._handle_expired([(key, data)])
+        return default
+
+    def set(self, key: str, data: Dict[str, Any]):
+        """Insert or replace an entry and evict least recently used entries over the bounds."""
+        size = self._estimate_size(data)
+        deadline = time.time() + self.ttl_seconds
+        if data.get("expiry"):
+            deadline = min(deadline, data["expiry"])
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (data, size, deadline)
+            self._bytes += size
+            heapq.heappush(self._deadlines, (deadline, key))
+            self._evict_over_bounds()
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Snapshot of the cached (key, data) pairs."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every entry whose deadline has passed. Cost is O(due entries · log n)."""
+        now = now or time.time()
+        expired = []
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, key = heapq.heappop(self._deadlines)
+                entry = self._entries.get(key)
+                # Heap entries of overwritten or removed keys are stale; skip them
+                if entry is None or entry[2] != deadline:
+                    continue
+                self._remove_expired(key)
+                expired.append((key, entry[0]))
+            # Rebuild the heap if stale deadlines dominate it
+            if len(self._deadlines) > 2 * len(self._entries) + 64:
+                self._deadlines = [(entry[2], key) for key, entry in self._entries.items()]
+                heapq.heapify(self._deadlines)
+        self._handle_expired(expired)
+        if expired:
+            logging.debug(f"Memory cache sweep dropped {len(expired)} entries")
+        return len(expired)
+
+    def start_sweeper(self, interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS):
+        """
+        Have the process-wide sweeper thread run sweep() on this cache.
+
+        One daemon thread serves every cache; it is started by the first call, at that call's interval.
+        """
+        global _sweeper
+        _swept_caches.add(self)
+        with _sweeper_lock:
+            if _sweeper and _sweeper.is_alive():
+                return
+            _sweeper = threading.Thread(target=_sweep_caches, args=(interval_seconds,),
+                                        name="memory-cache-sweeper", daemon=True)
+            _sweeper.start()
+
+    def stop_sweeper(self):
+        _swept_caches.discard(self)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "pending_deadlines": len(self._deadlines),
+            }
+
+    def _remove_expired(self, key: str):
+        if self.pop(key) is not None:
+            self.expirations += 1
+
+    def _handle_expired(self, expired: List[Tuple[str, Dict[str, Any]]]):
+        """Notify the owner about entries whose data (not just the cache TTL) has expired."""
+        if not self.on_expire:
+            return
+        now = time.time()
+        for key, data in expired:
+            if data.get("expiry") and data["expiry"] <= now:
+                try:
+                    self.on_expire(key, data)
+                except Exception as e:
+                    logging.error(f"Error handling expiry of {key}: {e}")
+
+    def _evict_over_bounds(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _estimate_size(self, data: Dict[str, Any]) -> int:
+        try:
+            return len(json.dumps(data, default=str))
+        except (TypeError, ValueError):
+            return 1024
+
+
+def _sweep_caches(interval_seconds: float):
+    while True:
+        time.sleep(interval_seconds)
+        for cache in list(_swept_caches):
+            try:
+                cache.sweep()
+            except Exception as e:
+                logging.error(f"Memory cache sweep failed: {e}")
+
+
+def get_memory_cache_stats() -> List[Dict[str, Any]]:
+    """Stats for every live memory cache in the process."""
+    return [cache.stats() for cache in list(_caches)]
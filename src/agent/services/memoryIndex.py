@@ -0,0 +1,109 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Number of sessions/categories tracked; least recently queried buckets are dropped
+MEMORY_INDEX_MAX_BUCKETS = int(os.getenv("MEMORY_INDEX_MAX_BUCKETS", "2000"))
+# Buckets are re-read from the store after this long to pick up other workers' writes
+MEMORY_INDEX_HYDRATE_TTL_SECONDS = float(os.getenv("MEMORY_INDEX_HYDRATE_TTL_SECONDS", "60"))
+# Upper bound on the keys loaded into one bucket from the store
+MEMORY_INDEX_HYDRATE_LIMIT = int(os.getenv("MEMORY_INDEX_HYDRATE_LIMIT", "1000"))
+
+
+class _Bucket:
+    """Time-ordered memory keys for one session or category."""
+
+    __slots__ = ("entries", "hydrated_at")
+
+    def __init__(self):
+        self.entries: List[Tuple[float, str]] = []
+        self.hydrated_at: Optional[float] = None
+
+
+class MemoryIndex:
+    """
+    Secondary index from a field value (session_id, category) to memory keys.
+
+    Keys are kept ordered by created_at so the newest N can be read without
+    scanning. A bucket is only authoritative once it has been hydrated from the
+    persistent store; writes made in this process are added as they happen.
+    """
+
+    def __init__(self, max_buckets: int = MEMORY_INDEX_MAX_BUCKETS,
+                 hydrate_ttl_seconds: float = MEMORY_INDEX_HYDRATE_TTL_SECONDS):
+        self.max_buckets = max_buckets
+        self.hydrate_ttl_seconds = hydrate_ttl_seconds
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._key_bucket: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def add(self, value: Optional[str], key: str, created_at: float):
+        """Index key under value, replacing any previous position of the key."""
+        if not value:
+            return
+        with self._lock:
+            self._discard(key)
+            bucket = self._buckets.get(value)
+            if bucket is None:
+                bucket = self._buckets[value] = _Bucket()
+                self._evict_over_bounds()
+            bisect.insort(bucket.entries, (created_at, key))
+            self._key_bucket[key] = value
+
+    def remove(self, key: str):
+        with self._lock:
+            self._discard(key)
+
+    def newest(self, value: str, hydrate: Callable[[], List[Tuple[str, float]]]) -> List[str]:
+        """
+        Keys indexed under value, newest first.
+
+        Args:
+            value: The session id or category to look up
+            hydrate: Loads (key, created_at) pairs for value from the store; called
+                when the bucket has not been hydrated recently
+
+        Returns:
+            Memory keys ordered by created_at descending
+        """
+        with self._lock:
+            bucket = self._buckets.get(value)
+            fresh = (bucket is not None and bucket.hydrated_at is not None
+                     and time.time() - bucket.hydrated_at < self.hydrate_ttl_seconds)
+            if fresh:
+                self._buckets.move_to_end(value)
+                return [key for _, key in reversed(bucket.entries)]
+
+        # Hydrate outside the lock; store reads can be slow
+        loaded = hydrate()
+        with self._lock:
+            for key, created_at in loaded:
+                self.add(value, key, created_at)
+            bucket = self._buckets.get(value)
+            if bucket is None:
+                bucket = self._buckets[value] = _Bucket()
+                self._evict_over_bounds()
+            bucket.hydrated_at = time.time()
+            self._buckets.move_to_end(value)
+            return [key for _, key in reversed(bucket.entries)]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"buckets": len(self._buckets), "keys": len(self._key_bucket)}
+
+    def _discard(self, key: str):
+        value = self._key_bucket.pop(key, None)
+        if value is None:
+            return
+        bucket = self._buckets.get(value)
+        if bucket is not None:
+            bucket.entries = [entry for entry in bucket.entries if entry[1] != key]
+
+    def _evict_over_bounds(self):
+        while len(self._buckets) > self.max_buckets:
+            _, bucket = self._buckets.popitem(last=False)
+            for _, key in bucket.entries:
+                self._key_bucket.pop(key, None)
@@ -0,0 +1,359 @@
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.agent.services.memoryStores import MemoryRecord, MemoryStore
+
+# Check if we have Redis support
+try:
+    import redis
+    HAS_REDIS = True
+    WatchError = redis.WatchError
+except ImportError:
+    HAS_REDIS = False
+
+    class WatchError(Exception):
+        """Raised when a watched key changes before the transaction executes."""
+
+# Conversations and episodic memories expire this long after their last write
+MEMORY_REDIS_TTL_SECONDS = int(os.getenv("MEMORY_REDIS_TTL_SECONDS", str(7 * 24 * 3600)))
+MEMORY_REDIS_PREFIX = os.getenv("MEMORY_REDIS_PREFIX", "memory")
+# Attempts at an optimistic update before giving up
+MEMORY_REDIS_UPDATE_RETRIES = int(os.getenv("MEMORY_REDIS_UPDATE_RETRIES", "10"))
+
+
+class RedisMemoryStore(MemoryStore):
+    """
+    Store shared by every worker process through Redis.
+
+    Each memory item is a hash ({prefix}:item:<key>) holding the JSON data and a
+    version counter, so a conversation is one hash per session. Sorted sets index
+    episodic keys by session and semantic keys by category and expiry. Items
+    expire through Redis TTLs; update() is an optimistic WATCH/MULTI transaction
+    retried when another worker changes the item first.
+
+    Pass url="memory://" to use InMemoryRedis instead of a server.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str = MEMORY_REDIS_PREFIX,
+                 ttl_seconds: int = MEMORY_REDIS_TTL_SECONDS):
+        if url.startswith("memory://"):
+            self._client = InMemoryRedis()
+        elif HAS_REDIS:
+            self._client = redis.Redis.from_url(url, decode_responses=True)
+        else:
+            raise RuntimeError("redis package is not installed")
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.conflicts = 0
+        logging.info(f"Redis memory store ready ({'in-process' if url.startswith('memory://') else 'server'})")
+
+    def _item_key(self, key: str) -> str:
+        return f"{self.prefix}:item:{key}"
+
+    def _index_key(self, name: str, value: str) -> str:
+        return f"{self.prefix}:idx:{name}:{value}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._client.hget(self._item_key(key), "data")
+        return json.loads(raw) if raw else None
+
+    def put_many(self, records: List[MemoryRecord]) -> None:
+        if not records:
+            return
+        pipe = self._client.pipeline(transaction=True)
+        for record in records:
+            self._queue_write(pipe, record)
+        pipe.execute()
+
+    def update(self, key: str, memory_type: str,
+               mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        item_key = self._item_key(key)
+        for _ in range(MEMORY_REDIS_UPDATE_RETRIES):
+            pipe = self._client.pipeline(transaction=True)
+            try:
+                pipe.watch(item_key)
+                raw = pipe.hget(item_key, "data")
+                data = mutate(json.loads(raw) if raw else None)
+                pipe.multi()
+                self._queue_write(pipe, (key, memory_type, data.get("created_at", time.time()), data))
+                pipe.execute()
+                return data
+            except WatchError:
+                # Another worker wrote the item between our read and write; re-read and retry
+                self.conflicts += 1
+                continue
+            finally:
+                pipe.reset()
+        raise RuntimeError(f"Gave up updating {key} after {MEMORY_REDIS_UPDATE_RETRIES} conflicting writes")
+
+    def _queue_write(self, pipe, record: MemoryRecord):
+        key, memory_type, created_at, data = record
+        item_key = self._item_key(key)
+        pipe.hset(item_key, mapping={
+            "data": json.dumps(data),
+            "memory_type": memory_type,
+            "created_at": created_at,
+        })
+        pipe.hincrby(item_key, "version", 1)
+
+        if memory_type == "semantic":
+            if data.get("expiry"):
+                pipe.expireat(item_key, int(data["expiry"]) + 1)
+                pipe.zadd(self._index_key("expiry", "semantic"), {key: data["expiry"]})
+            else:
+                pipe.persist(item_key)
+            pipe.zadd(self._index_key("category", data.get("category", "general")), {key: created_at})
+        else:
+            pipe.expire(item_key, self.ttl_seconds)
+        if memory_type == "episodic":
+            pipe.zadd(self._index_key("episodic", "all"), {key: created_at})
+            if data.get("session_id"):
+                pipe.zadd(self._index_key("session", data["session_id"]), {key: created_at})
+                pipe.expire(self._index_key("session", data["session_id"]), self.ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        existing = [(key, self.get(key)) for key in keys]
+        pipe = self._client.pipeline(transaction=True)
+        for key, data in existing:
+            pipe.delete(self._item_key(key))
+            for index_key in self._index_keys_for(data or {}):
+                pipe.zrem(index_key, key)
+        pipe.execute()
+
+    def _index_keys_for(self, data: Dict[str, Any]) -> List[str]:
+        memory_type = data.get("memory_type")
+        if memory_type == "episodic":
+            keys = [self._index_key("episodic", "all")]
+            if data.get("session_id"):
+                keys.append(self._index_key("session", data["session_id"]))
+            return keys
+        if memory_type == "semantic":
+            return [self._index_key("category", data.get("category", "general")),
+                    self._index_key("expiry", "semantic")]
+        return []
+
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        item_prefix = self._item_key("")
+        for item_key in self._client.scan_iter(match=f"{item_prefix}{_escape_glob(prefix)}*", count=500):
+            key = item_key[len(item_prefix):]
+            data = self.get(key)
+            if data is not None:
+                yield key, data
+
+    def _newest(self, index_key: str, limit: int,
+                accept: Callable[[Dict[str, Any]], bool]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Walk an index newest first, dropping members whose item has expired."""
+        results, stale = [], []
+        for key in self._client.zrevrange(index_key, 0, -1):
+            data = self.get(key)
+            if data is None:
+                stale.append(key)
+                continue
+            if accept(data):
+                results.append((key, data))
+                if len(results) >= limit:
+                    break
+        if stale:
+            self._client.zrem(index_key, *stale)
+        return results
+
+    def query_episodic(self, session_id: Optional[str] = None, event_type: Optional[str] = None,
+                       user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        index_key = self._index_key("session", session_id) if session_id else self._index_key("episodic", "all")
+        return self._newest(index_key, limit, lambda data: (
+            (not event_type or data.get("event_type") == event_type)
+            and (not user_id or data.get("user_id") == user_id)
+        ))
+
+    def query_semantic(self, category: str, limit: int = 20,
+                       now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        now = now or time.time()
+        return self._newest(self._index_key("category", category), limit, lambda data: (
+            data.get("category") == category and not (data.get("expiry") and data["expiry"] <= now)
+        ))
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        expired = self._client.zrangebyscore(self._index_key("expiry", "semantic"), 0, now or time.time())
+        if expired:
+            self.delete_many(list(expired))
+        return len(expired)
+
+    def close(self) -> None:
+        close = getattr(self._client, "close", None)
+        if close:
+            close()
+
+
+def _escape_glob(value: str) -> str:
+    return "".join(f"\\{char}" if char in "*?[]\\" else char for char in value)
+
+
+class InMemoryRedis:
+    """
+    In-process stand-in for the subset of redis.Redis used by RedisMemoryStore.
+
+    Values are decoded strings, TTLs are checked on access, and pipelines
+    implement WATCH/MULTI/EXEC semantics with per-key versions, so the store
+    behaves the same without a Redis server (tests, single-process development).
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, name: str) -> bool:
+        deadline = self._expires.get(name)
+        if deadline is not None and deadline <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+            self._touch(name)
+        return name in self._data
+
+    def _touch(self, name: str):
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def _container(self, name: str, kind: type):
+        if not self._alive(name):
+            self._data[name] = kind()
+        return self._data[name]
+
+    def hget(self, name: str, field: str) -> Optional[str]:
+        with self._lock:
+            return self._data[name].get(field) if self._alive(name) else None
+
+    def hset(self, name: str, mapping: Dict[str, Any]) -> int:
+        with self._lock:
+            self._container(name, dict).update({field: str(value) for field, value in mapping.items()})
+            self._touch(name)
+            return len(mapping)
+
+    def hincrby(self, name: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            container = self._container(name, dict)
+            container[field] = str(int(container.get(field, 0)) + amount)
+            self._touch(name)
+            return int(container[field])
+
+    def expire(self, name: str, seconds: int) -> bool:
+        return self.expireat(name, time.time() + seconds)
+
+    def expireat(self, name: str, when: float) -> bool:
+        with self._lock:
+            if not self._alive(name):
+                return False
+            self._expires[name] = when
+            return True
+
+    def persist(self, name: str) -> bool:
+        with self._lock:
+            return self._expires.pop(name, None) is not None
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._alive(name):
+                    deleted += 1
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+                self._touch(name)
+            return deleted
+
+    def zadd(self, name: str, mapping: Dict[str, float]) -> int:
+        with self._lock:
+            container = self._container(name, dict)
+            added = len(set(mapping) - set(container))
+            container.update({member: float(score) for member, score in mapping.items()})
+            self._touch(name)
+            return added
+
+    def zrem(self, name: str, *members: str) -> int:
+        with self._lock:
+            if not self._alive(name):
+                return 0
+            removed = sum(1 for member in members if self._data[name].pop(member, None) is not None)
+            self._touch(name)
+            return removed
+
+    def zrevrange(self, name: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            if not self._alive(name):
+                return []
+            members = sorted(self._data[name], key=lambda member: self._data[name][member], reverse=True)
+            return members[start:None if end == -1 else end + 1]
+
+    def zrangebyscore(self, name: str, low: float, high: float) -> List[str]:
+        with self._lock:
+            if not self._alive(name):
+                return []
+            scores = self._data[name]
+            return sorted((member for member in scores if low <= scores[member] <= high), key=scores.get)
+
+    def scan_iter(self, match: str = "*", count: int = None) -> Iterator[str]:
+        with self._lock:
+            names = [name for name in list(self._data) if self._alive(name)]
+        pattern = match.replace("\\", "")
+        return iter([name for name in names if fnmatch.fnmatchcase(name, pattern)])
+
+    def pipeline(self, transaction: bool = True) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    """Buffers commands after multi() and runs them atomically in execute()."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._watched: Dict[str, int] = {}
+        self._commands: List[Tuple[str, tuple, dict]] = []
+        self._buffering = True
+
+    def watch(self, *names: str):
+        # Commands run immediately between watch() and multi(), as with redis-py
+        self._buffering = False
+        with self._client._lock:
+            for name in names:
+                self._watched[name] = self._client._versions.get(name, 0)
+
+    def multi(self):
+        self._buffering = True
+
+    def __getattr__(self, command: str):
+        method = getattr(self._client, command)
+
+        def call(*args, **kwargs):
+            if not self._buffering:
+                return method(*args, **kwargs)
+            self._commands.append((command, args, kwargs))
+            return self
+        return call
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            for name, version in self._watched.items():
+                if self._client._versions.get(name, 0) != version:
+                    self.reset()
+                    raise WatchError(f"Watched key {name} changed")
+            results = [getattr(self._client, command)(*args, **kwargs) for command, args, kwargs in self._commands]
+        self.reset()
+        return results
+
+    def reset(self):
+        self._watched = {}
+        self._commands = []
+        self._buffering = True
@@ -6,13 +6,13 @@ from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 import os
 
-# Check if we have PostgreSQL support
-try:
-    import psycopg2
-    import psycopg2.extras
-    HAS_POSTGRES = True
-except ImportError:
-    HAS_POSTGRES = False
+from src.agent.services.memoryCache import BoundedMemoryCache
+from src.agent.services.memoryIndex import MemoryIndex, MEMORY_INDEX_HYDRATE_LIMIT
+from src.agent.services.memoryStores import MemoryStore, SqliteMemoryStore, PostgresMemoryStore, HAS_POSTGRES
+from src.agent.services.memoryWriteBehind import WriteBehindMemoryStore
+from src.agent.services.memoryRedisStore import RedisMemoryStore
+
+if not HAS_POSTGRES:
     logging.info("PostgreSQL support not available. Using file-based memory storage.")
 
 @dataclass
@@ -32,12 +32,19 @@ class ConversationMemory:
     user_id: Optional[str] = None
     messages: List[Dict[str, Any]] = field(default_factory=list)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    summary: str = ""
+    # Bumped on every write, so a caller can tell whether it read the latest copy
+    version: int = 0
     memory_type: str = "conversation"
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
     created_at: float = field(default_factory=time.time)
     
     def to_dict(self):
         return asdict(self)
+
+
+class ConversationConflictError(RuntimeError):
+    """A conversation changed after the caller read it"""
     
 @dataclass
 class EpisodicMemory:
@@ -72,119 +79,127 @@ class SemanticMemory:
 class MemoryService:
     """Service for managing different types of memory"""
     
-    def __init__(self, persistence_type="file"):
-        self.persistence_type = persistence_type
-        self._file_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "memory_store.json")
+    def __init__(self, persistence_type=None):
+        # "file" (SQLite), "postgres" or "redis"; redis is shared by all web workers
+        self.persistence_type = persistence_type or os.getenv("MEMORY_BACKEND", "file")
+        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        self._file_path = os.getenv("MEMORY_DB_PATH", os.path.join(root_dir, "memory_store.db"))
+        self._legacy_file_path = os.path.join(root_dir, "memory_store.json")
         
-        # Initialize DB connection if using PostgreSQL
-        self._db_conn = None
-        if persistence_type == "postgres" and HAS_POSTGRES:
-            self._setup_postgres()
+        # Persistent backend: per-key writes to SQLite (WAL), PostgreSQL or Redis
+        self._store: MemoryStore = self._create_store()
         
-        # In-memory cache for active sessions
-        self._memory_cache = {}
+        # Bounded LRU cache for active sessions; evicted items are reloaded from the store
+        self._memory_cache = BoundedMemoryCache(on_expire=self._on_memory_expired)
+        self._memory_cache.start_sweeper()
         
-        # Load memory from persistence on startup
-        self._load_memory()
+        # Secondary indexes: session_id -> episodic keys, category -> semantic keys
+        self._session_index = MemoryIndex()
+        self._category_index = MemoryIndex()
     
-    def _setup_postgres(self):
-        """Set up PostgreSQL connection and tables"""
-        try:
-            conn_string = os.getenv("DATABASE_URL")
-            if not conn_string:
+    def _create_store(self) -> MemoryStore:
+        """Create the persistent backend for the configured persistence type"""
+        if self.persistence_type == "redis":
+            # memory:// selects the in-process fake
+            redis_url = os.getenv("MEMORY_REDIS_URL") or os.getenv("REDIS_URL")
+            if not redis_url:
+                logging.warning("MEMORY_REDIS_URL/REDIS_URL not set. Using file-based storage instead.")
+            else:
+                try:
+                    return RedisMemoryStore(redis_url)
+                except Exception as e:
+                    logging.error(f"Failed to initialize Redis memory store: {e}")
+                    logging.info("Falling back to file-based storage")
+        
+        if self.persistence_type == "postgres" and HAS_POSTGRES:
+            if not os.getenv("DATABASE_URL"):
                 logging.warning("DATABASE_URL not set. Using file-based storage instead.")
-                self.persistence_type = "file"
-                return
-                
-            self._db_conn = psycopg2.connect(conn_string)
-            
-            # Create tables if they don't exist
-            with self._db_conn.cursor() as cur:
-                cur.execute("""
-                CREATE TABLE IF NOT EXISTS memory_items (
-                    id TEXT PRIMARY KEY,
-                    memory_type TEXT NOT NULL,
-                    created_at FLOAT NOT NULL,
-                    data JSONB NOT NULL
-                );
-                
-                CREATE INDEX IF NOT EXISTS idx_memory_type ON memory_items(memory_type);
-                CREATE INDEX IF NOT EXISTS idx_created_at ON memory_items(created_at);
-                """)
-            
-            self._db_conn.commit()
-            logging.info("PostgreSQL connection and tables set up successfully")
+            else:
+                try:
+                    # Batch and coalesce writes instead of one upsert per mutation
+                    return WriteBehindMemoryStore(PostgresMemoryStore())
+                except Exception as e:
+                    logging.error(f"Failed to initialize PostgreSQL: {e}")
+                    logging.info("Falling back to file-based storage")
         
+        self.persistence_type = "file"
+        return SqliteMemoryStore(self._file_path, legacy_json_path=self._legacy_file_path)
+    
+    def _load_from_store(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a memory item from the persistent backend into the cache"""
+        try:
+            data = self._store.get(key)
         except Exception as e:
-            logging.error(f"Failed to initialize PostgreSQL: {e}")
-            self.persistence_type = "file"
-            logging.info("Falling back to file-based storage")
+            logging.error(f"Error retrieving memory {key} from {self._store.name} store: {e}")
+            return None
+        if data is not None:
+            self._memory_cache[key] = data
+        return data
+    
+    def _read_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a memory item; shared stores are authoritative since other workers may have written it"""
+        if self._store.shared:
+            return self._load_from_store(key) or self._memory_cache.get(key)
+        return self._memory_cache.get(key) or self._load_from_store(key)
     
-    def _load_memory(self):
-        """Load memory from persistence"""
-        if self.persistence_type == "file":
-            try:
-                if os.path.exists(self._file_path):
-                    with open(self._file_path, 'r') as f:
-                        data = json.load(f)
-                        self._memory_cache = data
-                        logging.info(f"Loaded {len(data)} memory items from file")
-            except Exception as e:
-                logging.error(f"Failed to load memory from file: {e}")
-                self._memory_cache = {}
+    def _update_conversation(self, session_id: str, mutate) -> ConversationMemory:
+        """Atomically apply mutate to a conversation in a shared store (optimistic retry on conflict)"""
+        key = f"conversation:{session_id}"
+        
+        def apply(data):
+            memory = ConversationMemory(**data) if data else ConversationMemory(session_id=session_id)
+            mutate(memory)
+            memory.version += 1
+            return memory.to_dict()
+        
+        try:
+            data = self._store.update(key, "conversation", apply)
+        except ConversationConflictError:
+            raise
+        except Exception as e:
+            # Writing only to this worker's cache would silently drop the turn for every other worker
+            logging.error(f"Error updating memory {key} in {self._store.name} store: {e}")
+            raise
+        self._memory_cache[key] = data
+        return ConversationMemory(**data)
     
-    def _save_memory(self):
-        """Save memory to persistence"""
-        if self.persistence_type == "file":
-            try:
-                with open(self._file_path, 'w') as f:
-                    json.dump(self._memory_cache, f)
-                logging.debug("Memory saved to file")
-            except Exception as e:
-                logging.error(f"Failed to save memory to file: {e}")
+    def _on_memory_expired(self, key: str, data: Dict[str, Any]):
+        """Called by the cache sweeper when a cached item's own expiry has passed"""
+        self._delete_memory(key)
     
     def get_conversation_memory(self, session_id: str) -> ConversationMemory:
         """Get conversation memory for a session"""
         key = f"conversation:{session_id}"
         
-        # Try to get from cache first
-        if key in self._memory_cache:
-            data = self._memory_cache[key]
+        data = self._read_memory(key)
+        if data is not None:
             return ConversationMemory(**data)
         
-        # If not in cache, check persistence
-        if self.persistence_type == "postgres" and self._db_conn:
-            try:
-                with self._db_conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-                    cur.execute(
-                        "SELECT data FROM memory_items WHERE id = %s AND memory_type = 'conversation'",
-                        (key,)
-                    )
-                    result = cur.fetchone()
-                    if result:
-                        data = result[0]
-                        self._memory_cache[key] = data
-                        return ConversationMemory(**data)
-            except Exception as e:
-                logging.error(f"Error retrieving conversation memory from PostgreSQL: {e}")
-        
         # Create new conversation memory if not found
         memory = ConversationMemory(session_id=session_id)
         self._memory_cache[key] = memory.to_dict()
         return memory
     
-    def update_conversation_memory(self, session_id: str, messages: List[Dict[str, Any]],
-                                  user_id: Optional[str] = None,
-                                  metadata: Optional[Dict[str, Any]] = None) -> ConversationMemory:
-        """Update conversation memory for a session"""
-        memory = self.get_conversation_memory(session_id)
+    def modify_conversation_memory(self, session_id: str, mutate) -> ConversationMemory:
+        """
+        Apply mutate to the latest stored copy of a conversation and save it.
+        
+        In a shared store mutate may run more than once (on every write conflict),
+        so it should derive the new state from the memory it is given.
         
-        # Update fields
-        memory.messages = messages
-        if user_id:
-            memory.user_id = user_id
-        if metadata:
-            memory.metadata.update(metadata)
+        Args:
+            session_id: Conversation to change
+            mutate: Function that edits a ConversationMemory in place
+            
+        Returns:
+            ConversationMemory: The saved conversation
+        """
+        if self._store.shared:
+            return self._update_conversation(session_id, mutate)
+        
+        memory = self.get_conversation_memory(session_id)
+        mutate(memory)
+        memory.version += 1
         
         # Save to cache and persistence
         key = f"conversation:{session_id}"
@@ -193,22 +208,41 @@ class MemoryService:
         
         return memory
     
+    def update_conversation_memory(self, session_id: str, messages: List[Dict[str, Any]],
+                                  user_id: Optional[str] = None,
+                                  metadata: Optional[Dict[str, Any]] = None,
+                                  summary: Optional[str] = None,
+                                  expected_version: Optional[int] = None) -> ConversationMemory:
+        """
+        Replace a conversation's messages.
+        
+        Pass the version of the copy the messages were built from as expected_version;
+        ConversationConflictError is raised if another write landed since.
+        """
+        def mutate(memory: ConversationMemory):
+            if expected_version is not None and memory.version != expected_version:
+                raise ConversationConflictError(
+                    f"Conversation {session_id} is at version {memory.version}, expected {expected_version}"
+                )
+            memory.messages = messages
+            if summary is not None:
+                memory.summary = summary
+            if user_id:
+                memory.user_id = user_id
+            if metadata:
+                memory.metadata.update(metadata)
+        
+        return self.modify_conversation_memory(session_id, mutate)
+    
     def add_to_conversation_memory(self, session_id: str, message: Dict[str, Any],
                                   user_id: Optional[str] = None) -> ConversationMemory:
         """Add a single message to conversation memory"""
-        memory = self.get_conversation_memory(session_id)
-        
-        # Update fields
-        memory.messages.append(message)
-        if user_id:
-            memory.user_id = user_id
+        def mutate(memory: ConversationMemory):
+            memory.messages.append(message)
+            if user_id:
+                memory.user_id = user_id
         
-        # Save to cache and persistence
-        key = f"conversation:{session_id}"
-        self._memory_cache[key] = memory.to_dict()
-        self._persist_memory(key, memory)
-        
-        return memory
+        return self.modify_conversation_memory(session_id, mutate)
     
     def store_episodic_memory(self, session_id: str, event_type: str, 
                              content: Dict[str, Any],
@@ -227,6 +261,7 @@ class MemoryService:
         key = f"episodic:{memory.id}"
         self._memory_cache[key] = memory.to_dict()
         self._persist_memory(key, memory)
+        self._session_index.add(session_id, key, memory.created_at)
         
         return memory
     
@@ -234,36 +269,31 @@ class MemoryService:
                              event_type: Optional[str] = None,
                              user_id: Optional[str] = None,
                              limit: int = 10) -> List[EpisodicMemory]:
-        """Get episodic memories matching filters"""
-        results = []
-        count = 0
+        """Get episodic memories matching filters, newest first"""
+        if not session_id or self._store.shared:
+            # No session to index on, or other workers write to the store: it runs a bounded, ordered query
+            rows = self._query_store("query_episodic", session_id=session_id, event_type=event_type,
+                                     user_id=user_id, limit=limit)
+            return [EpisodicMemory(**data) for _, data in rows]
         
-        # Filter memories from cache
-        for key, data in self._memory_cache.items():
-            if not key.startswith("episodic:"):
-                continue
-                
-            if data.get("memory_type") != "episodic":
-                continue
-                
-            if session_id and data.get("session_id") != session_id:
+        def hydrate():
+            rows = self._query_store("query_episodic", session_id=session_id, limit=MEMORY_INDEX_HYDRATE_LIMIT)
+            return self._cache_rows(rows)
+        
+        results = []
+        for key in self._session_index.newest(session_id, hydrate):
+            data = self._memory_cache.get(key) or self._load_from_store(key)
+            if data is None:
+                self._session_index.remove(key)
                 continue
-                
             if event_type and data.get("event_type") != event_type:
                 continue
-                
             if user_id and data.get("user_id") != user_id:
                 continue
-                
             results.append(EpisodicMemory(**data))
-            count += 1
-            
-            if count >= limit:
+            if len(results) >= limit:
                 break
         
-        # Sort by creation time (newest first)
-        results.sort(key=lambda x: x.created_at, reverse=True)
-        
         return results
     
     def store_semantic_memory(self, key: str, value: Any, 
@@ -283,6 +313,7 @@ class MemoryService:
         cache_key = f"semantic:{key}"
         self._memory_cache[cache_key] = memory.to_dict()
         self._persist_memory(cache_key, memory)
+        self._category_index.add(category, cache_key, memory.created_at)
         
         return memory
     
@@ -290,101 +321,97 @@ class MemoryService:
         """Get semantic memory by key"""
         cache_key = f"semantic:{key}"
         
-        # Try to get from cache first
-        if cache_key in self._memory_cache:
-            data = self._memory_cache[cache_key]
-            
-            # Check expiry
-            if data.get("expiry") and time.time() > data["expiry"]:
-                del self._memory_cache[cache_key]
-                self._delete_memory(cache_key)
-                return None
-                
-            return SemanticMemory(**data)
+        data = self._read_memory(cache_key)
+        if data is None:
+            return None
         
-        return None
+        # Check expiry
+        if data.get("expiry") and time.time() > data["expiry"]:
+            self._memory_cache.pop(cache_key, None)
+            self._delete_memory(cache_key)
+            return None
+            
+        return SemanticMemory(**data)
     
     def get_semantic_memories_by_category(self, category: str, limit: int = 20) -> List[SemanticMemory]:
         """Get semantic memories by category"""
-        results = []
-        count = 0
+        if self._store.shared:
+            return [SemanticMemory(**data) for _, data in
+                    self._query_store("query_semantic", category=category, limit=limit)]
         
-        # Filter memories from cache
-        for key, data in self._memory_cache.items():
-            if not key.startswith("semantic:"):
-                continue
-                
-            if data.get("memory_type") != "semantic":
-                continue
-                
-            if data.get("category") != category:
+        def hydrate():
+            rows = self._query_store("query_semantic", category=category, limit=MEMORY_INDEX_HYDRATE_LIMIT)
+            return self._cache_rows(rows)
+        
+        results = []
+        for key in self._category_index.newest(category, hydrate):
+            data = self._memory_cache.get(key) or self._load_from_store(key)
+            # Re-stored under another category since it was indexed
+            if data is None or data.get("category") != category:
+                self._category_index.remove(key)
                 continue
                 
             # Check expiry
             if data.get("expiry") and time.time() > data["expiry"]:
-                del self._memory_cache[key]
+                self._memory_cache.pop(key, None)
                 self._delete_memory(key)
                 continue
                 
             results.append(SemanticMemory(**data))
-            count += 1
             
-            if count >= limit:
+            if len(results) >= limit:
                 break
         
         return results
     
+    def _query_store(self, method: str, **filters):
+        """Run an indexed store query, falling back to filtering the cache if the store fails"""
+        try:
+            return getattr(self._store, method)(**filters)
+        except Exception as e:
+            logging.error(f"Error querying {self._store.name} memory store: {e}")
+        
+        prefix = "episodic:" if method == "query_episodic" else "semantic:"
+        limit = filters.pop("limit")
+        rows = [
+            (key, data) for key, data in self._memory_cache.items()
+            if key.startswith(prefix) and all(not value or data.get(field) == value for field, value in filters.items())
+        ]
+        rows.sort(key=lambda row: row[1].get("created_at", 0), reverse=True)
+        return rows[:limit]
+    
+    def _cache_rows(self, rows):
+        """Warm the cache with store rows and return their (key, created_at) pairs for the index"""
+        for key, data in rows:
+            if key not in self._memory_cache:
+                self._memory_cache[key] = data
+        return [(key, data.get("created_at", 0)) for key, data in rows]
+    
     def _persist_memory(self, key: str, memory: Union[ConversationMemory, EpisodicMemory, SemanticMemory]):
         """Persist memory to storage"""
-        if self.persistence_type == "file":
-            self._save_memory()
-        elif self.persistence_type == "postgres" and self._db_conn:
-            try:
-                data = memory.to_dict()
-                
-                with self._db_conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        INSERT INTO memory_items (id, memory_type, created_at, data)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (id) DO UPDATE
-                        SET data = %s, created_at = %s
-                        """,
-                        (key, memory.memory_type, memory.created_at, 
-                         json.dumps(data), json.dumps(data), memory.created_at)
-                    )
-                
-                self._db_conn.commit()
-            except Exception as e:
-                logging.error(f"Error persisting memory to PostgreSQL: {e}")
+        try:
+            self._store.put(key, memory.memory_type, memory.created_at, memory.to_dict())
+        except Exception as e:
+            logging.error(f"Error persisting memory to {self._store.name} store: {e}")
     
     def _delete_memory(self, key: str):
         """Delete memory from storage"""
-        if self.persistence_type == "file":
-            self._save_memory()
-        elif self.persistence_type == "postgres" and self._db_conn:
-            try:
-                with self._db_conn.cursor() as cur:
-                    cur.execute("DELETE FROM memory_items WHERE id = %s", (key,))
-                self._db_conn.commit()
-            except Exception as e:
-                logging.error(f"Error deleting memory from PostgreSQL: {e}")
+        self._session_index.remove(key)
+        self._category_index.remove(key)
+        try:
+            self._store.delete(key)
+        except Exception as e:
+            logging.error(f"Error deleting memory from {self._store.name} store: {e}")
     
     def cleanup_expired_memories(self):
         """Clean up expired memories"""
-        current_time = time.time()
-        keys_to_delete = []
-        
-        # Find expired memories
-        for key, data in self._memory_cache.items():
-            if data.get("memory_type") == "semantic" and data.get("expiry"):
-                if current_time > data["expiry"]:
-                    keys_to_delete.append(key)
-        
-        # Delete expired memories
-        for key in keys_to_delete:
-            del self._memory_cache[key]
-            self._delete_memory(key)
+        # Cached copies and index entries of expired items are dropped by the
+        # cache sweeper and lazily on read; the store deletes via its expires_at index
+        try:
+            deleted = self._store.delete_expired(time.time())
+        except Exception as e:
+            logging.error(f"Error cleaning up expired memories in {self._store.name} store: {e}")
+            return
         
-        if keys_to_delete:
-            logging.info(f"Cleaned up {len(keys_to_delete)} expired memories")
\ No newline at end of file
+        if deleted:
+            logging.info(f"Cleaned up {deleted} expired memories")
\ No newline at end of file
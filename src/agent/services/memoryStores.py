@@ -0,0 +1,444 @@
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Check if we have PostgreSQL support
+try:
+    import psycopg2
+    import psycopg2.extras
+    from src.domain.sql.connectionPool import get_db_connection
+    HAS_POSTGRES = True
+except ImportError:
+    HAS_POSTGRES = False
+
+# A record is (key, memory_type, created_at, data)
+MemoryRecord = Tuple[str, str, float, Dict[str, Any]]
+
+
+class MemoryStore(ABC):
+    """
+    Persistent key/value storage for MemoryService.
+
+    Keys look like "conversation:<session_id>", "episodic:<id>" or "semantic:<key>";
+    values are the memory dataclasses serialized with to_dict(). Writes are per key.
+    """
+
+    name = "base"
+    # True when every worker process sees the same data without going through this process
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The data stored under key, or None."""
+        pass
+
+    def put(self, key: str, memory_type: str, created_at: float, data: Dict[str, Any]) -> None:
+        self.put_many([(key, memory_type, created_at, data)])
+
+    @abstractmethod
+    def put_many(self, records: List[MemoryRecord]) -> None:
+        """Upsert every record."""
+        pass
+
+    def update(self, key: str, memory_type: str,
+               mutate: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Read-modify-write a single item.
+
+        Args:
+            key: Memory key
+            memory_type: Memory type stored with the item
+            mutate: Receives the current data (None if missing) and returns the new data
+
+        Returns:
+            The data that was written
+        """
+        data = mutate(self.get(key))
+        self.put(key, memory_type, data.get("created_at", time.time()), data)
+        return data
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+        pass
+
+    def delete_many(self, keys: List[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    @abstractmethod
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over (key, data) for all keys starting with prefix."""
+        pass
+
+    def query_episodic(self, session_id: Optional[str] = None, event_type: Optional[str] = None,
+                       user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        """Newest-first episodic memories matching the filters (fallback: full scan)."""
+        matches = [
+            (key, data) for key, data in self.scan("episodic:")
+            if (not session_id or data.get("session_id") == session_id)
+            and (not event_type or data.get("event_type") == event_type)
+            and (not user_id or data.get("user_id") == user_id)
+        ]
+        matches.sort(key=lambda item: item[1].get("created_at", 0), reverse=True)
+        return matches[:limit]
+
+    def query_semantic(self, category: str, limit: int = 20,
+                       now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Unexpired semantic memories in a category (fallback: full scan)."""
+        now = now or time.time()
+        matches = [
+            (key, data) for key, data in self.scan("semantic:")
+            if data.get("category") == category and not (data.get("expiry") and data["expiry"] <= now)
+        ]
+        matches.sort(key=lambda item: item[1].get("created_at", 0), reverse=True)
+        return matches[:limit]
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        """Delete semantic memories whose expiry has passed. Returns the number deleted."""
+        now = now or time.time()
+        expired = [key for key, data in self.scan("semantic:") if data.get("expiry") and data["expiry"] <= now]
+        for key in expired:
+            self.delete(key)
+        return len(expired)
+
+    def close(self) -> None:
+        pass
+
+
+def _index_columns(data: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Values of the indexed columns (session_id, user_id, event_type, category, expires_at)."""
+    return (
+        data.get("session_id"),
+        data.get("user_id"),
+        data.get("event_type"),
+        data.get("category"),
+        data.get("expiry"),
+    )
+
+
+# Indexed columns added alongside the JSON payload
+_INDEX_COLUMNS = (
+    ("session_id", "TEXT"),
+    ("user_id", "TEXT"),
+    ("event_type", "TEXT"),
+    ("category", "TEXT"),
+    ("expires_at", "{float}"),
+)
+
+
+class SqliteMemoryStore(MemoryStore):
+    """
+    SQLite store in WAL mode.
+
+    Each write is a single-row upsert in its own transaction, so write cost is
+    O(record) and several worker processes can share one database file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None):
+        self.path = path
+        self._local = threading.local()
+        self._setup()
+        if legacy_json_path:
+            self._migrate_legacy_json(legacy_json_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _setup(self):
+        self._connection().executescript("""
+        CREATE TABLE IF NOT EXISTS memory_items (
+            id TEXT PRIMARY KEY,
+            memory_type TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            data TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_memory_type ON memory_items(memory_type);
+        CREATE INDEX IF NOT EXISTS idx_created_at ON memory_items(created_at);
+        """)
+        self._ensure_index_columns()
+        logging.info(f"SQLite memory store ready at {self.path}")
+
+    def _ensure_index_columns(self):
+        """Add and backfill the indexed columns on databases created before they existed."""
+        conn = self._connection()
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(memory_items)")}
+        added = [(name, kind.format(float="REAL")) for name, kind in _INDEX_COLUMNS if name not in existing]
+        for name, kind in added:
+            conn.execute(f"ALTER TABLE memory_items ADD COLUMN {name} {kind}")
+        if added:
+            conn.execute("""
+            UPDATE memory_items SET
+                session_id = json_extract(data, '$.session_id'),
+                user_id = json_extract(data, '$.user_id'),
+                event_type = json_extract(data, '$.event_type'),
+                category = json_extract(data, '$.category'),
+                expires_at = json_extract(data, '$.expiry')
+            """)
+            logging.info(f"Backfilled memory index columns: {', '.join(name for name, _ in added)}")
+        conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_memory_session ON memory_items(session_id, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_event_type ON memory_items(event_type, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_user ON memory_items(user_id, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_category ON memory_items(category) WHERE memory_type = 'semantic';
+        CREATE INDEX IF NOT EXISTS idx_memory_expires_at ON memory_items(expires_at) WHERE expires_at IS NOT NULL;
+        """)
+
+    def _migrate_legacy_json(self, legacy_json_path: str):
+        """Import the old whole-file memory_store.json once, then rename it."""
+        if not os.path.exists(legacy_json_path):
+            return
+        try:
+            with open(legacy_json_path, "r") as f:
+                data = json.load(f)
+            self.put_many([
+                (key, item.get("memory_type", "base"), item.get("created_at", 0.0), item)
+                for key, item in data.items() if isinstance(item, dict)
+            ])
+            os.replace(legacy_json_path, legacy_json_path + ".migrated")
+            logging.info(f"Migrated {len(data)} memory items from {legacy_json_path}")
+        except Exception as e:
+            logging.error(f"Failed to migrate legacy memory file {legacy_json_path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT data FROM memory_items WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, records: List[MemoryRecord]) -> None:
+        if not records:
+            return
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                """
+                INSERT INTO memory_items
+                    (id, memory_type, created_at, data, session_id, user_id, event_type, category, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE
+                SET data = excluded.data, created_at = excluded.created_at,
+                    session_id = excluded.session_id, user_id = excluded.user_id,
+                    event_type = excluded.event_type, category = excluded.category,
+                    expires_at = excluded.expires_at
+                """,
+                [(key, memory_type, created_at, json.dumps(data)) + _index_columns(data)
+                 for key, memory_type, created_at, data in records]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM memory_items WHERE id = ?", (key,))
+
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        rows = self._connection().execute(
+            "SELECT id, data FROM memory_items WHERE id >= ? AND id < ?",
+            (prefix, prefix + "\uffff")
+        ).fetchall()
+        for key, data in rows:
+            yield key, json.loads(data)
+
+    def query_episodic(self, session_id: Optional[str] = None, event_type: Optional[str] = None,
+                       user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        where, params = _episodic_filters(session_id, event_type, user_id, "?")
+        rows = self._connection().execute(
+            f"SELECT id, data FROM memory_items WHERE {where} ORDER BY created_at DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def query_semantic(self, category: str, limit: int = 20,
+                       now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self._connection().execute(
+            """
+            SELECT id, data FROM memory_items
+            WHERE memory_type = 'semantic' AND category = ? AND (expires_at IS NULL OR expires_at > ?)
+            ORDER BY created_at DESC LIMIT ?
+            """,
+            (category, now or time.time(), limit)
+        ).fetchall()
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM memory_items WHERE expires_at IS NOT NULL AND expires_at <= ?", (now or time.time(),)
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class PostgresMemoryStore(MemoryStore):
+    """Store backed by the memory_items table in DATABASE_URL, using the shared connection pool."""
+
+    name = "postgres"
+
+    def __init__(self):
+        self._setup()
+
+    @contextlib.contextmanager
+    def _cursor(self):
+        """Borrow a pooled connection for one transaction."""
+        with get_db_connection() as conn, conn.cursor() as cur:
+            yield cur
+
+    def _setup(self):
+        with self._cursor() as cur:
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS memory_items (
+                id TEXT PRIMARY KEY,
+                memory_type TEXT NOT NULL,
+                created_at FLOAT NOT NULL,
+                data JSONB NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_memory_type ON memory_items(memory_type);
+            CREATE INDEX IF NOT EXISTS idx_created_at ON memory_items(created_at);
+            """)
+            self._ensure_index_columns(cur)
+        logging.info("PostgreSQL connection and tables set up successfully")
+
+    def _ensure_index_columns(self, cur):
+        """Add and backfill the indexed columns on tables created before they existed."""
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'memory_items'"
+        )
+        existing = {row[0] for row in cur.fetchall()}
+        added = [(name, kind.format(float="FLOAT")) for name, kind in _INDEX_COLUMNS if name not in existing]
+        for name, kind in added:
+            cur.execute(f"ALTER TABLE memory_items ADD COLUMN IF NOT EXISTS {name} {kind}")
+        if added:
+            cur.execute("""
+            UPDATE memory_items SET
+                session_id = data->>'session_id',
+                user_id = data->>'user_id',
+                event_type = data->>'event_type',
+                category = data->>'category',
+                expires_at = (data->>'expiry')::float
+            """)
+            logging.info(f"Backfilled memory index columns: {', '.join(name for name, _ in added)}")
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_memory_session ON memory_items(session_id, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_event_type ON memory_items(event_type, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_user ON memory_items(user_id, created_at DESC) WHERE memory_type = 'episodic';
+        CREATE INDEX IF NOT EXISTS idx_memory_category ON memory_items(category) WHERE memory_type = 'semantic';
+        CREATE INDEX IF NOT EXISTS idx_memory_expires_at ON memory_items(expires_at) WHERE expires_at IS NOT NULL;
+        """)
+
+    def _execute(self, query: str, params=None, fetch: str = None):
+        with self._cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchone() if fetch == "one" else cur.fetchall() if fetch == "all" else None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._execute("SELECT data FROM memory_items WHERE id = %s", (key,), fetch="one")
+        return row[0] if row else None
+
+    def put_many(self, records: List[MemoryRecord]) -> None:
+        if not records:
+            return
+        # A single upsert statement can't touch the same row twice; keep the last write per key
+        records = list({record[0]: record for record in records}.values())
+        with self._cursor() as cur:
+            psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO memory_items
+                    (id, memory_type, created_at, data, session_id, user_id, event_type, category, expires_at)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE
+                SET data = EXCLUDED.data, created_at = EXCLUDED.created_at,
+                    session_id = EXCLUDED.session_id, user_id = EXCLUDED.user_id,
+                    event_type = EXCLUDED.event_type, category = EXCLUDED.category,
+                    expires_at = EXCLUDED.expires_at
+                """,
+                [(key, memory_type, created_at, json.dumps(data)) + _index_columns(data)
+                 for key, memory_type, created_at, data in records],
+                page_size=500
+            )
+
+    def delete(self, key: str) -> None:
+        self._execute("DELETE FROM memory_items WHERE id = %s", (key,))
+
+    def delete_many(self, keys: List[str]) -> None:
+        if keys:
+            self._execute("DELETE FROM memory_items WHERE id = ANY(%s)", (list(keys),))
+
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        rows = self._execute(
+            "SELECT id, data FROM memory_items WHERE id LIKE %s",
+            (prefix.replace("%", r"\%").replace("_", r"\_") + "%",),
+            fetch="all"
+        )
+        for key, data in rows or []:
+            yield key, data
+
+    def query_episodic(self, session_id: Optional[str] = None, event_type: Optional[str] = None,
+                       user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        where, params = _episodic_filters(session_id, event_type, user_id, "%s")
+        rows = self._execute(
+            f"SELECT id, data FROM memory_items WHERE {where} ORDER BY created_at DESC LIMIT %s",
+            params + [limit],
+            fetch="all"
+        )
+        return [(key, data) for key, data in rows or []]
+
+    def query_semantic(self, category: str, limit: int = 20,
+                       now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self._execute(
+            """
+            SELECT id, data FROM memory_items
+            WHERE memory_type = 'semantic' AND category = %s AND (expires_at IS NULL OR expires_at > %s)
+            ORDER BY created_at DESC LIMIT %s
+            """,
+            (category, now or time.time(), limit),
+            fetch="all"
+        )
+        return [(key, data) for key, data in rows or []]
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        with self._cursor() as cur:
+            cur.execute(
+                "DELETE FROM memory_items WHERE expires_at IS NOT NULL AND expires_at <= %s",
+                (now or time.time(),)
+            )
+            return cur.rowcount
+
+    def close(self) -> None:
+        # Connections belong to the shared pool
+        pass
+
+
+def _episodic_filters(session_id: Optional[str], event_type: Optional[str], user_id: Optional[str],
+                      placeholder: str) -> Tuple[str, List[Any]]:
+    """WHERE clause over the indexed episodic columns."""
+    clauses = ["memory_type = 'episodic'"]
+    params: List[Any] = []
+    for column, value in (("session_id", session_id), ("event_type", event_type), ("user_id", user_id)):
+        if value:
+            clauses.append(f"{column} = {placeholder}")
+            params.append(value)
+    return " AND ".join(clauses), params
@@ -0,0 +1,180 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.agent.services.memoryStores import MemoryRecord, MemoryStore
+
+# Writes to the same key within this window are coalesced into one upsert
+WRITE_BEHIND_FLUSH_INTERVAL_SECONDS = float(os.getenv("MEMORY_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS", "0.5"))
+# Flush immediately once this many keys are pending
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("MEMORY_WRITE_BEHIND_MAX_PENDING", "500"))
+
+_stores = weakref.WeakSet()
+
+
+class WriteBehindMemoryStore(MemoryStore):
+    """
+    Queues writes for another MemoryStore and flushes them in batches.
+
+    Pending writes are keyed by memory key, so repeated writes to the same key
+    between flushes collapse into the latest one. Reads of a pending key are
+    served from the queue, or from the batch being flushed until its write succeeds;
+    scans and queries flush first so they see every write.
+    A daemon thread flushes every flush_interval_seconds, and the queue is
+    flushed once more at interpreter exit.
+    """
+
+    def __init__(self, store: MemoryStore,
+                 flush_interval_seconds: float = WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING):
+        self._store = store
+        self.name = f"{store.name} (write-behind)"
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+
+        # key -> record to upsert, or None for a pending delete
+        self._pending: Dict[str, Optional[MemoryRecord]] = {}
+        # The batch a flush is writing, so reads of its keys don't fall through to stale rows
+        self._inflight: Dict[str, Optional[MemoryRecord]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+        self.writes = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.flushed_records = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+        self._flusher = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        _stores.add(self)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for queued in (self._pending, self._inflight):
+                if key in queued:
+                    record = queued[key]
+                    return record[3] if record else None
+        return self._store.get(key)
+
+    def put_many(self, records: List[MemoryRecord]) -> None:
+        self._enqueue({record[0]: record for record in records})
+
+    def delete(self, key: str) -> None:
+        self._enqueue({key: None})
+
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+        self.flush()
+        return self._store.scan(prefix)
+
+    def query_episodic(self, *args, **kwargs) -> List[Tuple[str, Dict[str, Any]]]:
+        self.flush()
+        return self._store.query_episodic(*args, **kwargs)
+
+    def query_semantic(self, *args, **kwargs) -> List[Tuple[str, Dict[str, Any]]]:
+        self.flush()
+        return self._store.query_semantic(*args, **kwargs)
+
+    def delete_expired(self, now: Optional[float] = None) -> int:
+        self.flush()
+        return self._store.delete_expired(now)
+
+    def flush(self) -> int:
+        """
+        Write every pending record to the underlying store.
+
+        Returns:
+            Number of keys flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            upserts = [record for record in batch.values() if record is not None]
+            deletes = [key for key, record in batch.items() if record is None]
+            start = time.monotonic()
+            try:
+                self._store.put_many(upserts)
+                self._store.delete_many(deletes)
+            except Exception as e:
+                # Requeue unless a newer write for the key arrived meanwhile
+                with self._lock:
+                    for key, record in batch.items():
+                        self._pending.setdefault(key, record)
+                    self._inflight = {}
+                    self.failed_flushes += 1
+                logging.error(f"Error flushing {len(batch)} memory writes to {self._store.name} store: {e}")
+                return 0
+
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._inflight = {}
+                self.flushes += 1
+                self.flushed_records += len(batch)
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                self.total_flush_seconds += elapsed
+            logging.debug(f"Flushed {len(batch)} memory writes in {elapsed * 1000:.1f}ms")
+            return len(batch)
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self._store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "store": self._store.name,
+                "queue_depth": len(self._pending),
+                "writes": self.writes,
+                "coalesced": self.coalesced,
+                "flushes": self.flushes,
+                "flushed_records": self.flushed_records,
+                "failed_flushes": self.failed_flushes,
+                "last_flush_ms": round(self.last_flush_seconds * 1000, 2),
+                "avg_flush_ms": round(self.total_flush_seconds / self.flushes * 1000, 2) if self.flushes else 0.0,
+                "max_flush_ms": round(self.max_flush_seconds * 1000, 2),
+            }
+
+    def _enqueue(self, records: Dict[str, Optional[MemoryRecord]]):
+        with self._lock:
+            for key, record in records.items():
+                self.writes += 1
+                if key in self._pending:
+                    self.coalesced += 1
+                self._pending[key] = record
+            depth = len(self._pending)
+        if depth >= self.max_pending:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Memory write-behind flush failed: {e}")
+
+
+def get_write_behind_stats() -> List[Dict[str, Any]]:
+    """Queue stats for every live write-behind memory store in the process."""
+    return [store.stats() for store in list(_stores)]
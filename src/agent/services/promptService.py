@@ -23,7 +23,8 @@ class PromptService:
     # PUBLIC AI-1 METHODS (TOOL SELECTION)
     # =========================================================================
     
-    def generate_initial_tool_selection_prompt(self, user_input: str, conversation_history=None) -> List[Dict]:
+    def generate_initial_tool_selection_prompt(self, user_input: str, conversation_history=None,
+                                               conversation_summary: str = "") -> List[Dict]:
         """
         Builds the messages array for AI-1 (tool selection) with system prompt and conversation history.
         This is the main entry point for AI-1 prompt generation.
@@ -33,6 +34,7 @@ class PromptService:
         Args:
             user_input: The user's current input
             conversation_history: Conversation history (provided by memory service)
+            conversation_summary: Rolling summary of older turns (provided by memory service)
         """
         # Build system prompt directly
         system_prompt = self._get_base_identity_prompt()
@@ -52,6 +54,7 @@ class PromptService:
             "   Examples: 'You're welcome! Have a great day!' or 'Goodbye! Take care!'\n"
             "   Avoid long messages about future help availability.\n"
         )
+        system_prompt += self._get_conversation_summary_prompt(conversation_summary)
         messages = [{"role": "system", "content": system_prompt}]
         
         # Add conversation history if provided
@@ -84,7 +87,8 @@ class PromptService:
         return messages
 
     def generate_tool_selection_prompt_with_context(self, user_input: str, conversation_history: List[Dict], 
-                                                   tool_calls_history: Optional[List] = None) -> List[Dict]:
+                                                   tool_calls_history: Optional[List] = None,
+                                                   conversation_summary: str = "") -> List[Dict]:
         """
         Enhanced version of generate_initial_tool_selection_prompt that incorporates tool call history
         and context management instructions for multi-step reasoning.
@@ -93,16 +97,18 @@ class PromptService:
             user_input: The user's current input
             conversation_history: Conversation history
             tool_calls_history: History of previous tool calls (optional)
+            conversation_summary: Rolling summary of older turns (optional)
             
         Returns:
             List[Dict]: Enhanced messages with tool chain context
         """
         # Get base conversation history
-        messages = self.generate_initial_tool_selection_prompt(user_input, conversation_history)
+        messages = self.generate_initial_tool_selection_prompt(user_input, conversation_history, conversation_summary)
         
         # Check if we have either tool call history or multiple conversation turns
         has_tool_history = tool_calls_history and len(tool_calls_history) > 0
-        has_conversation_history = len(conversation_history) > 1  # More than just the current user message
+        # More than just the current user message, or earlier turns folded into the summary
+        has_conversation_history = len(conversation_history) > 1 or bool(conversation_summary)
         
         # Apply context management if we have either type of history
         if has_tool_history or has_conversation_history:
@@ -147,7 +153,8 @@ class PromptService:
     # PUBLIC AI-2 METHODS (RESPONSE FORMATTING)
     # =========================================================================
     
-    def generate_final_response_prompt(self, messages: List[Dict], action: Any) -> List[Dict]:
+    def generate_final_response_prompt(self, messages: List[Dict], action: Any,
+                                       conversation_summary: str = "") -> List[Dict]:
         """
         Adds action-specific response formatting instructions for AI-2 (final response).
         This is the main entry point for AI-2 prompt enhancement.
@@ -194,6 +201,7 @@ class PromptService:
             "   Examples: 'You're welcome! Have a great day!' or 'Goodbye! Take care!'\n"
             "   Avoid long messages about future help availability.\n"
         )
+        prompt += self._get_conversation_summary_prompt(conversation_summary)
         
         # Add the new system message for formatting guidance
         messages.append({
@@ -205,7 +213,8 @@ class PromptService:
     
     def generate_final_response_prompt_with_context(self, messages: List[Dict], action: Any = None,
                                                    tool_calls_history: Optional[List] = None,
-                                                   original_input: Optional[str] = None) -> List[Dict]:
+                                                   original_input: Optional[str] = None,
+                                                   conversation_summary: str = "") -> List[Dict]:
         """
         Enhanced prompt preparation for the final response generation
         that includes tool chain context when available and improved context relevance
@@ -215,12 +224,13 @@ class PromptService:
             action: The last action executed (optional)
             tool_calls_history: History of all tool calls in the sequence (optional)
             original_input: Original user input (optional)
+            conversation_summary: Rolling summary of older turns (optional)
             
         Returns:
             List[Dict]: Enhanced messages with tool chain context
         """
         # Get base prompt
-        final_messages = self.generate_final_response_prompt(messages, action)
+        final_messages = self.generate_final_response_prompt(messages, action, conversation_summary)
         
         # Add tool chain context if available with improved context management
         if tool_calls_history and len(tool_calls_history) > 0:
@@ -365,6 +375,20 @@ class PromptService:
     # SHARED HELPER METHODS
     # =========================================================================
     
+    def _get_conversation_summary_prompt(self, conversation_summary: str) -> str:
+        """
+        Renders the rolling summary of compacted conversation turns.
+        
+        [Shared Helper called by AI 1 and AI 2 prompt methods]
+        """
+        if not conversation_summary:
+            return ""
+        return (
+            "\n\nEARLIER CONVERSATION SUMMARY (older turns, oldest first):\n"
+            f"{conversation_summary}\n"
+            "Use this only as background; the messages that follow are more recent.\n"
+        )
+    
     def _get_base_identity_prompt(self) -> str:
         """
         Generates the base identity prompt with common information and date context.
@@ -0,0 +1,119 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from flask import Response
+
+
+class ToolResultMemo:
+    """
+    Request-scoped memo table for tool results within one tool chaining run.
+
+    Read-only actions are served from the memo when they are called again with the
+    same (tool name, canonicalized arguments, user). Mutating actions invalidate the
+    entries of the tools they affect for that user.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def execute(self, action: Any, arguments: Dict[str, Any], context: Dict[str, Any],
+                run: Callable[[], Any]) -> Any:
+        """
+        Execute an action through the memo.
+
+        Args:
+            action: The AgentAction being executed
+            arguments: Parsed tool call arguments
+            context: The user context
+            run: Callable that actually executes the action
+
+        Returns:
+            The action result, possibly from the memo
+        """
+        user = self._user_key(context)
+
+        if not getattr(action, "is_read_only", False):
+            result = run()
+            self.invalidate(user, getattr(action, "invalidates", ()))
+            return result
+
+        key = (action.name, self._canonicalize(arguments), user)
+        if key in self._entries:
+            self.hits += 1
+            logging.info(f"♻️ Reusing {action.name} result from earlier in this request")
+            return self._entries[key]
+
+        self.misses += 1
+        result = run()
+        if self._is_cacheable(result):
+            self._entries[key] = result
+        return result
+
+    async def execute_async(self, action: Any, arguments: Dict[str, Any], context: Dict[str, Any],
+                            run: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of execute(); run returns an awaitable."""
+        user = self._user_key(context)
+
+        if not getattr(action, "is_read_only", False):
+            result = await run()
+            self.invalidate(user, getattr(action, "invalidates", ()))
+            return result
+
+        key = (action.name, self._canonicalize(arguments), user)
+        if key in self._entries:
+            self.hits += 1
+            logging.info(f"♻️ Reusing {action.name} result from earlier in this request")
+            return self._entries[key]
+
+        self.misses += 1
+        result = await run()
+        if self._is_cacheable(result):
+            self._entries[key] = result
+        return result
+
+    def invalidate(self, user: str, tool_names) -> None:
+        """Drop memoized results of the given tools for a user."""
+        if not tool_names:
+            return
+        stale = [key for key in self._entries if key[0] in tool_names and key[2] == user]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logging.info(f"Invalidated {len(stale)} memoized result(s) for {', '.join(sorted(tool_names))}")
+
+    def _user_key(self, context: Optional[Dict[str, Any]]) -> str:
+        context = context or {}
+        return str(context.get("USERNAME") or context.get("CUSTOMER_ID") or "")
+
+    def _canonicalize(self, arguments: Dict[str, Any]) -> str:
+        """Stable representation of arguments so formatting differences don't defeat the memo."""
+        def normalize(value):
+            if isinstance(value, str):
+                return value.strip().casefold()
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [normalize(v) for v in value]
+            return value
+
+        return json.dumps(normalize(arguments or {}), sort_keys=True, separators=(",", ":"))
+
+    def _is_cacheable(self, result: Any) -> bool:
+        """Only successful, replayable results are memoized."""
+        response = result
+        if isinstance(result, tuple) and len(result) == 2:
+            response, status_code = result
+            if isinstance(status_code, int) and status_code >= 400:
+                return False
+
+        if isinstance(response, Response):
+            # Streamed files (images) can only be read once; errors should be retried
+            return not response.direct_passthrough and response.status_code < 400
+
+        if isinstance(response, dict):
+            return response.get("status") not in ("error", "needs_confirmation")
+
+        return True
@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import Response
+
+# Per-tool token accounting for LLM-facing tool results
+_encoding_stats: Dict[str, Dict[str, int]] = {}
+_encoding_stats_lock = threading.Lock()
+
+
+def extract_result_payload(result: Any) -> Any:
+    """
+    Extract the structured payload from an action result.
+
+    Actions return Flask Responses, (response, status_code) tuples or plain dicts.
+    Returns the parsed JSON dict when possible, otherwise the raw text.
+    """
+    if isinstance(result, tuple) and len(result) == 2:
+        return extract_result_payload(result[0])
+
+    if isinstance(result, Response):
+        try:
+            if result.direct_passthrough:
+                return None  # File responses (images) can only be streamed once
+            response_data = result.get_data(as_text=True)
+        except Exception as e:
+            logging.error(f"Error extracting data from Response: {e}")
+            return None
+        if response_data.strip().startswith('{'):
+            try:
+                return json.loads(response_data)
+            except json.JSONDecodeError:
+                return response_data
+        return response_data
+
+    return result
+
+
+def result_to_string(result: Any) -> str:
+    """
+    Convert any action result to its default string representation.
+    JSON payloads are reduced to their "message" field when one is present.
+    """
+    if isinstance(result, Response) or (isinstance(result, tuple) and len(result) == 2):
+        payload = extract_result_payload(result)
+        if payload is None:
+            return "Error retrieving data from response"
+        if isinstance(payload, dict):
+            return payload.get("message", json.dumps(payload))
+        return str(payload)
+
+    return str(result)
+
+
+def compress_slot_ranges(availability: Dict[str, List[str]], time_slots: Optional[List[str]] = None) -> List[str]:
+    """
+    Run-length encode an availability dict into lines like "6:00–8:30 PM: lanes 2,3,5".
+
+    Consecutive slots with the same set of free lanes are merged; times are slot start times.
+    Without time_slots the labels are ordered chronologically (JSON round trips sort keys).
+    """
+    slots = time_slots or sorted(availability.keys(), key=_slot_sort_key)
+    lines = []
+    run_start = None
+    run_end = None
+    run_lanes = None
+
+    def flush():
+        if run_lanes:
+            lines.append(f"{_format_time_range(run_start, run_end)}: lanes {','.join(run_lanes)}")
+
+    for slot in slots:
+        lanes = [_short_lane_name(lane) for lane in availability.get(slot, [])]
+        if lanes == run_lanes:
+            run_end = slot
+            continue
+        flush()
+        run_start, run_end, run_lanes = slot, slot, lanes
+
+    flush()
+    return lines
+
+
+def _slot_sort_key(slot: str):
+    try:
+        return datetime.strptime(slot, "%I:%M %p")
+    except ValueError:
+        return datetime.max
+
+
+def _short_lane_name(lane: Any) -> str:
+    """'Outdoor Lane 2' -> '2'"""
+    return str(lane).split()[-1]
+
+
+def _format_time_range(start: str, end: str) -> str:
+    """'6:00 PM', '8:30 PM' -> '6:00–8:30 PM'"""
+    if start == end:
+        return start
+    start_time, _, start_period = start.partition(" ")
+    end_time, _, end_period = end.partition(" ")
+    if start_period == end_period:
+        return f"{start_time}–{end_time} {end_period}"
+    return f"{start}–{end}"
+
+
+def record_encoding_stats(tool_name: str, tokens_before: int, tokens_after: int):
+    """Accumulate prompt-token accounting for a tool's LLM-facing result."""
+    with _encoding_stats_lock:
+        stats = _encoding_stats.setdefault(tool_name, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["calls"] += 1
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens_after
+
+
+def get_encoding_stats() -> Dict[str, Dict[str, int]]:
+    """Return a snapshot of the per-tool token accounting."""
+    with _encoding_stats_lock:
+        return {name: dict(stats) for name, stats in _encoding_stats.items()}
@@ -0,0 +1,72 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+import tiktoken
+
+# Model used by OpenAIGateway; token counts are estimates for budgeting only
+TOKEN_COUNT_MODEL = "gpt-4.1-mini"
+FALLBACK_ENCODING = "o200k_base"
+
+# Per-message framing overhead used by the chat completions format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once, falling back to a character estimate if unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+
+    try:
+        try:
+            _encoding = tiktoken.encoding_for_model(TOKEN_COUNT_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; don't fail requests if that isn't possible
+        logging.warning(f"Could not load tiktoken encoding, using character estimate: {e}")
+        _encoding_failed = True
+
+    return _encoding
+
+
+def count_tokens(text: Any) -> int:
+    """Count the tokens in a piece of text."""
+    if text is None:
+        return 0
+    if not isinstance(text, str):
+        text = json.dumps(text) if isinstance(text, (dict, list)) else str(text)
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Count the tokens of a single chat message including tool call payloads."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {}) if isinstance(tool_call, dict) else {}
+        tokens += count_tokens(function.get("name")) + count_tokens(function.get("arguments"))
+    return tokens
+
+
+def count_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Count the tokens of a list of chat messages."""
+    return sum(count_message_tokens(message) for message in messages if isinstance(message, dict))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "...") -> str:
+    """Truncate text so that it fits within max_tokens."""
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max(max_tokens, 0) * 4] + suffix
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max(max_tokens, 0)]) + suffix
@@ -1,24 +1,36 @@
 from flask import Blueprint, jsonify, request, g, send_file
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import io
 import barcode
 from barcode.writer import ImageWriter
 import json
-from src.domain.services.availabilityService import get_availability
+from src.domain.services.availabilityRangeService import (
+    get_availability_cached, get_availability_range, get_availability_store_stats
+)
 from src.domain.services.appointmentService import get_appointments_schedule_action, get_appointment_data
 from src.domain.services.bookingService import book_swim_lane_action
 from src.domain.services.cancellationService import cancel_appointment_action
 from src.domain.services.membershipService import get_barcode_id_action
 from src.domain.services.weatherService import get_weather_for_zip, get_weather_forecast_for_date
 from src.domain.drawing.availabilityVisualGenerator import generate_visualization, combine_visualizations
-from src.decorators import require_api_key
+from src.decorators import require_api_key, require_admin_api_key
 from src.domain.sql.authGateway import get_auth  # Assuming this retrieves user data
 from src.web.gateways.webLoginGateway import login_with_credentials  # Import login gateway
 from src.domain.gateways.loginGateway import login_via_context, login_via_credentials  # Import the updated login function
 from src.domain.drawing.barcodeGenerator import generate_barcode_image
 from src.domain.services.ragIndexingService import rebuild_index_from_db  # Make sure this import path matches your project
 from src.domain.services.ragQueryingService import debug_rag_status, debug_query
+from src.utils.openAIClientService import get_openai_metrics
+from src.agent.utils.result_formatter import get_encoding_stats
+from src.agent.services.memoryCache import get_memory_cache_stats
+from src.agent.services.memoryWriteBehind import get_write_behind_stats
+from src.domain.sql.connectionPool import get_pool_stats
+from src.utils.authCacheService import get_auth_cache_stats
+from src.domain.services.waitlistService import get_waitlist_stats
+from src.domain.services.appointmentCacheService import get_appointment_cache_stats
+from src.domain.services.slotSearchService import parse_search_preferences, search_best_slots
+from src.domain.sql.waitlistGateway import add_waitlist_entry, get_waitlist_entries, cancel_waitlist_entry
 
 api_bp = Blueprint('api', __name__)
 
@@ -36,11 +48,8 @@ def get_swim_lane_availability():
         indoor_pool_name = "Indoor Pool"
         outdoor_pool_name = "Outdoor Pool"
 
-        indoor_item_id = g.context["ITEMS"][indoor_pool_name]
-        outdoor_item_id = g.context["ITEMS"][outdoor_pool_name]
-
-        indoor_availability = get_availability(indoor_item_id, date_str, g.context)
-        outdoor_availability = get_availability(outdoor_item_id, date_str, g.context)
+        indoor_availability = get_availability_cached(indoor_pool_name, date_str, g.context)
+        outdoor_availability = get_availability_cached(outdoor_pool_name, date_str, g.context)
 
         appt = get_appointment_data(date_str, date_str, g.context)
         
@@ -54,13 +63,64 @@ def get_swim_lane_availability():
     if pool_name not in g.context["ITEMS"]:
         return jsonify({"error": "Invalid pool name. Use 'Indoor Pool', 'Outdoor Pool', or 'Both Pools'."}), 400
 
-    item_id = g.context["ITEMS"][pool_name]
-    availability = get_availability(item_id, date_str, g.context)
+    availability = get_availability_cached(pool_name, date_str, g.context)
     appt = get_appointment_data(date_str, date_str, g.context)
 
     img_io = generate_visualization(availability, pool_name, date_str, appt, g.context)
     return send_file(img_io, mimetype="image/png")
 
+@api_bp.route("/availability/week", methods=["GET"])
+@require_api_key
+def get_swim_lane_availability_week():
+    """
+    API Endpoint to return availability for several days at once (a week by default) as JSON.
+    Query: start (YYYY-MM-DD, default today), days (default 7) and pool (Indoor, Outdoor or Both).
+    """
+    start_str = request.args.get("start", datetime.now().strftime("%Y-%m-%d"))
+    pool_name = request.args.get("pool", "Both Pools")
+    if pool_name in ["Indoor", "Outdoor"]:
+        pool_name = f"{pool_name} Pool"
+
+    if pool_name in ["Both", "Both Pools"]:
+        pools = list(g.context["ITEMS"].keys())
+    elif pool_name in g.context["ITEMS"]:
+        pools = [pool_name]
+    else:
+        return jsonify({"error": "Invalid pool name. Use 'Indoor Pool', 'Outdoor Pool', or 'Both Pools'."}), 400
+
+    try:
+        days = int(request.args.get("days", "7"))
+        start = datetime.strptime(start_str, "%Y-%m-%d")
+        end_str = (start + timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+        grid = get_availability_range(start_str, end_str, g.context, pools=pools)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "status": "success",
+        "start_date": start_str,
+        "end_date": end_str,
+        "availability": grid
+    }), 200
+
+@api_bp.route("/availability/search", methods=["POST"])
+@require_api_key
+def search_swim_lane_availability():
+    """
+    API Endpoint to find the best bookable options for ranked preferences.
+    Body: date, pools, target_time, flex_minutes, durations, lanes (preference order), only_preferred_lanes and top_k.
+    """
+    data = request.json or {}
+    date_str = data.get("date", datetime.now().strftime("%Y-%m-%d"))
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        preferences = parse_search_preferences(data, g.context)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = search_best_slots(date_str, g.context, **preferences)
+    return jsonify({"status": "success", "date": date_str, **result}), 200
+
 @api_bp.route("/appointments", methods=["GET"])
 @require_api_key
 def get_user_appointments():
@@ -103,6 +163,61 @@ def cancel_lane():
     response, status_code = cancel_appointment_action(appointment_date, g.context)
     return jsonify(response), status_code
 
+@api_bp.route("/waitlist", methods=["GET"])
+@require_api_key
+def get_waitlist():
+    """API Endpoint to list the user's waitlist entries."""
+    entries = get_waitlist_entries(g.context["USERNAME"])
+    return jsonify({"status": "success", "entries": entries}), 200
+
+@api_bp.route("/waitlist", methods=["POST"])
+@require_api_key
+def add_to_waitlist():
+    """
+    API Endpoint to wait for a slot: the waitlist watcher books it as soon as a matching lane frees up.
+    Body: date, start_time, optional end_time (defaults to start_time), duration, location and lanes (preference order).
+    """
+    data = request.json or {}
+    date = data.get("date")
+    start_time = data.get("start_time")
+    end_time = data.get("end_time", start_time)
+    duration = str(data.get("duration", "60"))
+    location = data.get("location", "Indoor Pool")
+    lanes = data.get("lanes") or list(g.context["LANES"].keys())
+
+    if location in ["Indoor", "Outdoor"]:
+        location = f"{location} Pool"
+    if duration.isdigit():
+        duration = f"{duration} Min"
+    lanes = [f"Lane {lane}" if str(lane).isdigit() else lane for lane in lanes]
+
+    try:
+        datetime.strptime(date or "", "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"status": "error", "message": "date must be YYYY-MM-DD"}), 400
+    if location not in g.context["ITEMS"]:
+        return jsonify({"status": "error", "message": "Invalid location. Use 'Indoor Pool' or 'Outdoor Pool'."}), 400
+    if start_time not in g.context["TIME_SLOTS"] or end_time not in g.context["TIME_SLOTS"]:
+        return jsonify({"status": "error", "message": "start_time and end_time must be half-hour slots like '7:00 PM'"}), 400
+    if g.context["TIME_SLOTS"].index(end_time) < g.context["TIME_SLOTS"].index(start_time):
+        return jsonify({"status": "error", "message": "end_time must not be before start_time"}), 400
+    if duration not in g.context["DURATION_IDS"]:
+        return jsonify({"status": "error", "message": "duration must be 30 or 60"}), 400
+    if not lanes or any(lane not in g.context["LANES"] for lane in lanes):
+        return jsonify({"status": "error", "message": "lanes must be lane numbers 1-6"}), 400
+
+    entry_id = add_waitlist_entry(g.context["USERNAME"], location, date, start_time, end_time, duration, lanes)
+    logging.info(f"Waitlist entry {entry_id} added for {g.context['USERNAME']}: {location} {date} {start_time}-{end_time}")
+    return jsonify({"status": "success", "message": "Added to the waitlist", "entry_id": entry_id}), 201
+
+@api_bp.route("/waitlist/<int:entry_id>", methods=["DELETE"])
+@require_api_key
+def remove_from_waitlist(entry_id):
+    """API Endpoint to cancel one of the user's active waitlist entries."""
+    if not cancel_waitlist_entry(g.context["USERNAME"], entry_id):
+        return jsonify({"status": "error", "message": "No active waitlist entry with that id"}), 404
+    return jsonify({"status": "success", "message": "Waitlist entry cancelled"}), 200
+
 @api_bp.route("/barcode", methods=["GET"])
 @require_api_key
 def generate_barcode():
@@ -218,6 +333,23 @@ def get_rag_status():
             "message": str(e)
         }), 500
 
+@api_bp.route('/metrics', methods=['GET'])
+@require_admin_api_key
+def get_metrics():
+    """Runtime metrics: OpenAI concurrency/saturation, tool result token savings, memory cache/write queue, DB pool, auth cache, waitlist watcher, availability store and appointment cache"""
+    return jsonify({
+        "status": "success",
+        "openai": get_openai_metrics(),
+        "tool_result_encoding": get_encoding_stats(),
+        "memory_cache": get_memory_cache_stats(),
+        "memory_write_behind": get_write_behind_stats(),
+        "db_pool": get_pool_stats(),
+        "auth_cache": get_auth_cache_stats(),
+        "waitlist": get_waitlist_stats(),
+        "availability_store": get_availability_store_stats(),
+        "appointment_cache": get_appointment_cache_stats()
+    })
+
 @api_bp.route('/debug-query', methods=['POST'])
 def debug_query_route():
     """Debug a RAG query"""
@@ -286,6 +418,60 @@ def cron_schedule_swim_lanes():
             "error_type": type(e).__name__
         }), 500
 
+@api_bp.route("/cron_launch_booking_window", methods=["POST"])
+@require_api_key
+def cron_launch_booking_window():
+    """
+    CRON Endpoint for the precision-timed booking launcher.
+    Call it a few minutes before the 9 PM Eastern window opens; the queued task logs users in,
+    resolves their schedules and warms connections, then books at the exact opening instant.
+    """
+    try:
+        from src.worker.tasks import launch_booking_window_task
+        
+        task = launch_booking_window_task.delay()
+        logging.info(f"Booking window launcher queued with ID: {task.id}")
+        
+        return jsonify({
+            "status": "accepted",
+            "message": "Booking window launcher has been queued",
+            "task_id": task.id
+        }), 202
+    except Exception as e:
+        logging.exception(f"Failed to queue booking window launcher: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Failed to queue booking window launcher: {str(e)}",
+            "error_type": type(e).__name__
+        }), 500
+
+@api_bp.route("/cron_run_waitlist_watcher", methods=["POST"])
+@require_api_key
+def cron_run_waitlist_watcher():
+    """
+    CRON Endpoint for the waitlist watcher.
+    Starts the watcher's chain of short polling cycles unless one is already running, so it's safe to call often
+    (e.g. every 10 minutes) and after adding entries.
+    """
+    try:
+        from src.worker.tasks import run_waitlist_watcher_task
+        
+        task = run_waitlist_watcher_task.delay()
+        logging.info(f"Waitlist watcher queued with ID: {task.id}")
+        
+        return jsonify({
+            "status": "accepted",
+            "message": "Waitlist watcher has been queued",
+            "task_id": task.id
+        }), 202
+    except Exception as e:
+        logging.exception(f"Failed to queue waitlist watcher: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Failed to queue waitlist watcher: {str(e)}",
+            "error_type": type(e).__name__
+        }), 500
+
 @api_bp.route("/cron_schedule_swim_lanes_direct", methods=["POST"])
 @require_api_key
 def cron_schedule_swim_lanes_direct():
@@ -385,27 +571,20 @@ def cron_schedule_swim_lanes_smart():
         logging.info("Smart CRON check initiated")
         
         # Import what we need
-        from src.domain.services.autoBookingService import get_day_of_week, get_all_active_schedules, should_run_booking
+        from src.domain.services.autoBookingService import get_target_day, get_auto_booking_work_list
         from src.worker.tasks import run_auto_booking
         
-        # Check if any users need booking today
-        today = get_day_of_week()
-        schedules = get_all_active_schedules()
-        users_needing_booking = []
-        
-        for schedule in schedules:
-            username = schedule["username"]
-            today_command = schedule.get(today)
-            
-            if today_command and should_run_booking(username, today):
-                users_needing_booking.append(username)
+        # Check if any users need booking for the day process_auto_booking will book, in one query
+        _, target_day = get_target_day()
+        work_list = get_auto_booking_work_list(target_day)
+        users_needing_booking = [item["username"] for item in work_list if not item["already_completed"]]
         
         if not users_needing_booking:
             logging.info("No users need booking at this time")
             return jsonify({
                 "status": "skipped",
                 "message": "No users need booking at this time",
-                "checked_users": len(schedules),
+                "checked_users": len(work_list),
                 "needing_booking": 0
             }), 200
         
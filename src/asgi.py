@@ -0,0 +1,92 @@
+"""
+ASGI entry point.
+
+Serves the async agent pipeline at /agent/async/chat and mounts the existing Flask
+(WSGI) app for every other route, so one process can hold many in-flight chats
+while the rest of the API is unchanged.
+
+Run with: uvicorn src.asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextlib
+import logging
+
+from flask import g
+from starlette.applications import Starlette
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from src.server import app as flask_app
+from src.agent.routes.agent_routes import parse_chat_request, build_chat_response, chat_error_response
+from src.agent.services.asyncAgentService import AsyncAgentService
+from src.decorators import authenticate_api_request
+from src.domain.gateways.asyncHttpClient import close_async_http_clients
+
+async_agent_service = AsyncAgentService()
+
+
+def _to_asgi_response(flask_result) -> Response:
+    """Convert a Flask view return value into a Starlette response."""
+    flask_response = flask_app.make_response(flask_result)
+    # send_file responses stream their file; read it fully for the ASGI response
+    flask_response.direct_passthrough = False
+    headers = {key: value for key, value in flask_response.headers.items() if key.lower() != "content-length"}
+    return Response(
+        content=flask_response.get_data(),
+        status_code=flask_response.status_code,
+        headers=headers,
+        media_type=flask_response.mimetype
+    )
+
+
+async def async_chat(request: Request) -> Response:
+    """Async counterpart of POST /agent/chat."""
+    try:
+        data = await request.json()
+    except Exception:
+        data = {}
+
+    # The body is re-encoded by the request context, so drop the framing headers
+    headers = [(key, value) for key, value in request.headers.items()
+               if key.lower() not in ("content-length", "content-type")]
+
+    with flask_app.test_request_context("/agent/chat", method="POST", headers=headers, json=data):
+        try:
+            # Context loading hits the database; keep it off the event loop
+            auth_error = await asyncio.to_thread(authenticate_api_request)
+            if auth_error:
+                return _to_asgi_response(auth_error)
+
+            user_input, response_format, session_id, early_response = parse_chat_request(data or {})
+            if early_response:
+                return _to_asgi_response(early_response)
+
+            result, status_code = await async_agent_service.process_chat_async(
+                user_input=user_input,
+                context=g.context,
+                response_format=response_format,
+                session_id=session_id
+            )
+
+            return _to_asgi_response(build_chat_response(result, status_code, session_id))
+
+        except Exception as e:
+            logging.error(f"Error in async agent route: {e}", exc_info=True)
+            return _to_asgi_response(chat_error_response())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    yield
+    await close_async_http_clients()
+
+
+app = Starlette(
+    routes=[
+        Route("/agent/async/chat", async_chat, methods=["POST"]),
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan
+)
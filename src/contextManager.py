@@ -1,6 +1,7 @@
 import os
 import datetime
 from src.domain.sql.authGateway import get_auth_by_api_key  # Use the function from authGateway
+from src.utils.authCacheService import get_cached_auth_context
 import logging
 
 _BASE_MAC_URL = os.getenv("BASE_MAC_URL")
@@ -10,11 +11,31 @@ _COMPANY_ID = os.getenv("COMPANY_ID")
 
 def load_context_for_authenticated_user(api_key, mac_password):
     """Load context for an authenticated user using their API key and mac_password."""
+    # The per-user part is cached; only the request's mac_password differs per call
+    user_context = get_cached_auth_context(api_key, _build_user_context)
+    if not user_context:
+        return None
+
+    context = dict(user_context)
+    context["PASSWORD"] = mac_password  # Set to mac_password instead of "placeholder"
+    return context
+
+def load_context_for_auth_entry(auth_entry, mac_password):
+    """Build the context for a user from an auth_data row that was already loaded."""
+    context = _context_from_auth_entry(auth_entry)
+    context["PASSWORD"] = mac_password
+    return context
+
+def _build_user_context(api_key):
+    """Build the request-independent context for an API key."""
     auth_entry = get_auth_by_api_key(api_key)  # Use the function from authGateway
     if not auth_entry:
         return None
 
-    context = {
+    return _context_from_auth_entry(auth_entry)
+
+def _context_from_auth_entry(auth_entry):
+    return {
         "API_KEY": auth_entry["api_key"],
         "USERNAME": auth_entry["username"],
         "CUSTOMER_ID": auth_entry["customer_id"],
@@ -35,10 +56,8 @@ def load_context_for_authenticated_user(api_key, mac_password):
         "LOCATION_SHORT_NAMES": _LOCATION_SHORT_NAMES,
         "BOOK_SELECTION_IDS": _BOOK_SELECTION_IDS,
         "LANES": _LANES,
-        "TIME_SLOTS": _TIME_SLOTS,
-        "PASSWORD": mac_password  # Set to mac_password instead of "placeholder"
+        "TIME_SLOTS": _TIME_SLOTS
     }
-    return context
 
 def load_context_for_registration_pages():
     """Load context for registration pages without requiring an API key."""
@@ -4,39 +4,66 @@ import logging
 from src.contextManager import load_context_for_authenticated_user
 from src.domain.sql.authGateway import get_auth
 
+def authenticate_api_request():
+    """
+    Load g.context for the API key on the current request.
+
+    Returns:
+        None when the request is authorized, otherwise an error (response, status_code) tuple
+    """
+    if not hasattr(g, 'context'):
+        g.context = {}
+
+    mac_password = request.headers.get("x-mac-pw")
+    auth_header = request.headers.get("Authorization")
+    x_api_key = request.headers.get("x-api-key")
+    
+    # Support both Authorization: Bearer <key> and x-api-key: <key> formats
+    requested_api_key = None
+    if auth_header and auth_header.startswith("Bearer "):
+        requested_api_key = auth_header.split(" ")[1]
+    elif x_api_key:
+        requested_api_key = x_api_key
+
+    g.context = load_context_for_authenticated_user(requested_api_key, mac_password)
+
+    if not g.context:
+        logging.warning("Unauthorized access attempt with invalid API key.")
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if not g.context.get("IS_ENABLED"):
+        logging.warning(f"Access denied for disabled account: {g.context.get('USERNAME')}")
+        return jsonify({"error": "Account not enabled"}), 403
+
+    # Log user authentication with admin status
+    is_admin = g.context.get("IS_ADMIN", False)
+    username = g.context.get("USERNAME")
+    admin_status = "admin" if is_admin else "regular user"
+    logging.info(f"Authenticated user: {username} (Status: {admin_status})")
+    return None
+
 def require_api_key(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(g, 'context'):
-            g.context = {}
-
-        mac_password = request.headers.get("x-mac-pw")
-        auth_header = request.headers.get("Authorization")
-        x_api_key = request.headers.get("x-api-key")
+        auth_error = authenticate_api_request()
+        if auth_error:
+            return auth_error
         
-        # Support both Authorization: Bearer <key> and x-api-key: <key> formats
-        requested_api_key = None
-        if auth_header and auth_header.startswith("Bearer "):
-            requested_api_key = auth_header.split(" ")[1]
-        elif x_api_key:
-            requested_api_key = x_api_key
-
-        g.context = load_context_for_authenticated_user(requested_api_key, mac_password)
+        return f(*args, **kwargs)
+    return decorated_function
 
-        if not g.context:
-            logging.warning("Unauthorized access attempt with invalid API key.")
-            return jsonify({"error": "Unauthorized"}), 401
+def require_admin_api_key(f):
+    """Like require_api_key, but the API key must belong to an admin."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        auth_error = authenticate_api_request()
+        if auth_error:
+            return auth_error
 
-        if not g.context.get("IS_ENABLED"):
-            logging.warning(f"Access denied for disabled account: {g.context.get('USERNAME')}")
-            return jsonify({"error": "Account not enabled"}), 403
+        if not g.context.get("IS_ADMIN"):
+            logging.warning(f"Admin API access denied for user: {g.context.get('USERNAME')}")
+            return jsonify({"error": "Admin access required"}), 403
 
-        # Log user authentication with admin status
-        is_admin = g.context.get("IS_ADMIN", False)
-        username = g.context.get("USERNAME")
-        admin_status = "admin" if is_admin else "regular user"
-        logging.info(f"Authenticated user: {username} (Status: {admin_status})")
-        
         return f(*args, **kwargs)
     return decorated_function
 
@@ -12,12 +12,14 @@ import datetime
 from io import BytesIO
 import matplotlib.image as mpimg
 import numpy as np
+from src.domain.services.availabilityGrid import AvailabilityGrid
 
 def generate_visualization(availability, pool_name, date_str, appt, context):
     """Generate and save the swim lane availability visualization with a clean reset."""
     lanes = context["LANES_BY_POOL"][pool_name]
     num_lanes = len(lanes)
     num_times = len(context["TIME_SLOTS"])
+    grid = AvailabilityGrid.for_pool(availability, pool_name, context)
 
     if appt:
         logging.info(f"Appointment found: {appt}")
@@ -42,7 +44,7 @@ def generate_visualization(availability, pool_name, date_str, appt, context):
     # Draw the table cells
     for i, lane in enumerate(reversed(lanes)):  # Reverse for top-down display
         for j, time in enumerate(context["TIME_SLOTS"]):
-            is_available = lane in availability.get(time, [])
+            is_available = grid.is_free(time, lane)
             color = "green" if is_available else "red"
 
             # Check if this cell should be colored blue
@@ -5,14 +5,17 @@ import datetime
 import pytz
 from src.domain.gateways.loginGateway import login_via_context  # Import login function
 import src.contextManager
+from src.domain.gateways.asyncHttpClient import get_async_http_client
 # Construct API URL
 BASE_MAC_URL = os.getenv("BASE_MAC_URL")
 SCHEDULING_URL = f"{BASE_MAC_URL}Scheduling/GetAppointmentsSchedule"
 BOOKING_URL = f"{BASE_MAC_URL}TransactionProcessing/BookAppointmentOnAccount"
+CANCEL_URL = 'https://www.ourclublogin.com/api/Scheduling/CancelAppointment'
+# Seconds to wait on the MAC API before giving up on a request, so a hung connection can't stall a caller
+MAC_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MAC_REQUEST_TIMEOUT_SECONDS", "15"))
 
-def get_appointments_schedule(token, start_date, end_date, context):
-    """Fetch scheduled appointments for a customer within a given date range."""
-    
+def _build_schedule_request(token, start_date, end_date, context):
+    """Build the headers and payload for a MAC appointments schedule request."""
     headers = {
         "Accept": "application/json, text/plain, */*",
         "Content-Type": "application/json",
@@ -21,15 +24,18 @@ def get_appointments_schedule(token, start_date, end_date, context):
         "Authorization": f"Bearer {token}"
     }
 
-
-
     payload = {
         "ClubId": 2,  # Michigan Athletic Club
         "StartDate": start_date,
         "EndDate": end_date
     }
+    return headers, payload
+
+def get_appointments_schedule(token, start_date, end_date, context):
+    """Fetch scheduled appointments for a customer within a given date range."""
+    headers, payload = _build_schedule_request(token, start_date, end_date, context)
 
-    response = requests.post(SCHEDULING_URL, headers=headers, json=payload)
+    response = requests.post(SCHEDULING_URL, headers=headers, json=payload, timeout=MAC_REQUEST_TIMEOUT_SECONDS)
 
     if response.status_code == 200:
         return response.json(), response.status_code
@@ -37,11 +43,24 @@ def get_appointments_schedule(token, start_date, end_date, context):
         logging.info(f"❌ Failed to fetch appointments: {response.text}")
         return None, response.status_code
 
-def book_swim_lane(token, appointment_date_time, duration, location, lane, context):
+async def get_appointments_schedule_async(token, start_date, end_date, context):
+    """Async variant of get_appointments_schedule."""
+    headers, payload = _build_schedule_request(token, start_date, end_date, context)
+
+    client = get_async_http_client()
+    response = await client.post(SCHEDULING_URL, headers=headers, json=payload)
+
+    if response.status_code == 200:
+        return response.json(), response.status_code
+    else:
+        logging.info(f"❌ Failed to fetch appointments: {response.text}")
+        return None, response.status_code
+
+def build_booking_request(token, appointment_date_time, duration, location, lane, context):
     """
-    Book a swim lane using the provided token.
+    Build the headers and payload for a MAC booking request.
+    Returns (None, None) when the location or lane can't be mapped to MAC ids.
     """
-    url = BOOKING_URL
     headers = {
         'Accept': 'application/json, text/plain, */*',
         'Authorization': f'Bearer {token}',
@@ -60,7 +79,7 @@ def book_swim_lane(token, appointment_date_time, duration, location, lane, conte
     book_selection_id = context["BOOK_SELECTION_IDS"].get(book_selection_name)
 
     if not appointment_item_id or not assigned_resource_id or not book_selection_id:
-        return {"error": "Invalid location or lane"}, 400
+        return None, None
 
     payload = {
         "ClubId": 2,
@@ -85,9 +104,41 @@ def book_swim_lane(token, appointment_date_time, duration, location, lane, conte
         "DisplayedAmountDueAtTimeOfService": 0,
         "CancellationAppointmentId": 0
     }
+    return headers, payload
+
+def book_swim_lane(token, appointment_date_time, duration, location, lane, context):
+    """
+    Book a swim lane using the provided token.
+    """
+    headers, payload = build_booking_request(token, appointment_date_time, duration, location, lane, context)
+    if payload is None:
+        return {"error": "Invalid location or lane"}, 400
+
+    logging.info(f"📅 Booking swim lane for {location} {lane} for {duration} on {appointment_date_time}")
+    return send_booking_request(headers, payload)
+
+def send_booking_request(headers, payload, session=None):
+    """
+    POST a booking prepared by build_booking_request.
+    Pass a requests.Session to reuse its already-open connection.
+    """
+    response = (session or requests).post(BOOKING_URL, headers=headers, json=payload, timeout=MAC_REQUEST_TIMEOUT_SECONDS)
+
+    if response.status_code == 200:
+        return response.json(), response.status_code
+    else:
+        logging.info(f"❌ Booking request failed: {response.text}")
+        return {"error": "Booking request failed"}, response.status_code
+
+async def book_swim_lane_async(token, appointment_date_time, duration, location, lane, context):
+    """Async variant of book_swim_lane."""
+    headers, payload = build_booking_request(token, appointment_date_time, duration, location, lane, context)
+    if payload is None:
+        return {"error": "Invalid location or lane"}, 400
 
     logging.info(f"📅 Booking swim lane for {location} {lane} for {duration} on {appointment_date_time}")
-    response = requests.post(url, headers=headers, json=payload)
+    client = get_async_http_client()
+    response = await client.post(BOOKING_URL, headers=headers, json=payload)
 
     if response.status_code == 200:
         return response.json(), response.status_code
@@ -95,9 +146,8 @@ def book_swim_lane(token, appointment_date_time, duration, location, lane, conte
         logging.info(f"❌ Booking request failed: {response.text}")
         return {"error": "Booking request failed"}, response.status_code
 
-def cancel_appointment(token, appointment_id, context):
-    """Cancel an appointment using a valid token."""
-    url = 'https://www.ourclublogin.com/api/Scheduling/CancelAppointment'
+def _build_cancel_request(token, appointment_id, context):
+    """Build the headers and payload for a MAC cancellation request."""
     headers = {
         'Accept': 'application/json, text/plain, */*',
         'Authorization': f'Bearer {token}',
@@ -108,8 +158,26 @@ def cancel_appointment(token, appointment_id, context):
     payload = {
         "AppointmentId": appointment_id
     }
+    return headers, payload
+
+def cancel_appointment(token, appointment_id, context):
+    """Cancel an appointment using a valid token."""
+    headers, payload = _build_cancel_request(token, appointment_id, context)
+
+    response = requests.post(CANCEL_URL, headers=headers, json=payload, timeout=MAC_REQUEST_TIMEOUT_SECONDS)
+
+    if response.status_code == 200:
+        return response.json(), response.status_code
+    else:
+        logging.info(f"❌ Failed to cancel appointment with ID {appointment_id}: {response.text}")
+        return None, response.status_code
+
+async def cancel_appointment_async(token, appointment_id, context):
+    """Async variant of cancel_appointment."""
+    headers, payload = _build_cancel_request(token, appointment_id, context)
 
-    response = requests.post(url, headers=headers, json=payload)
+    client = get_async_http_client()
+    response = await client.post(CANCEL_URL, headers=headers, json=payload)
 
     if response.status_code == 200:
         return response.json(), response.status_code
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+import os
+
+import httpx
+
+# Connection limits for the async MAC gateways
+MAC_MAX_CONNECTIONS = int(os.getenv("MAC_ASYNC_MAX_CONNECTIONS", "50"))
+MAC_TIMEOUT_SECONDS = float(os.getenv("MAC_ASYNC_TIMEOUT_SECONDS", "30"))
+
+# httpx.AsyncClient is bound to the event loop it was first used on
+_clients = {}
+
+
+def get_async_http_client(verify: bool = True) -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient for the running event loop.
+
+    Args:
+        verify: Whether TLS certificates are verified (the login endpoint is called with verify=False)
+
+    Returns:
+        httpx.AsyncClient: A pooled client reused by all async MAC gateway calls
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), verify)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            verify=verify,
+            timeout=httpx.Timeout(MAC_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=MAC_MAX_CONNECTIONS, max_keepalive_connections=MAC_MAX_CONNECTIONS)
+        )
+        _clients[key] = client
+        logging.info(f"Created async HTTP client (verify={verify}, max_connections={MAC_MAX_CONNECTIONS})")
+    return client
+
+
+async def close_async_http_clients():
+    """Close the clients of the running event loop (called on ASGI shutdown)."""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [key for key in _clients if key[0] == loop_id]:
+        await _clients.pop(key).aclose()
@@ -2,9 +2,10 @@ import requests
 import os
 import src.contextManager
 import logging
+from src.domain.gateways.asyncHttpClient import get_async_http_client
 
-def check_swim_lane_availability(token, date_str, item_id, context):
-    """Fetch swim lane availability using a valid token."""
+def _build_availability_request(token, date_str, item_id, context):
+    """Build the headers and payload for a MAC availability request."""
     headers = {
         "Accept": "application/json, text/plain, */*",
         "Content-Type": "application/json",
@@ -22,6 +23,11 @@ def check_swim_lane_availability(token, date_str, item_id, context):
         "StartDate": f"{date_str}T05:00:00.000Z",
         "EndDate": f"{date_str}T05:00:00.000Z"
     }
+    return headers, payload
+
+def check_swim_lane_availability(token, date_str, item_id, context):
+    """Fetch swim lane availability using a valid token."""
+    headers, payload = _build_availability_request(token, date_str, item_id, context)
 
     response = requests.post(context["AVAILABILITY_URL"], headers=headers, json=payload)
 
@@ -31,3 +37,15 @@ def check_swim_lane_availability(token, date_str, item_id, context):
         logging.info(f"❌ Failed to fetch availability for ItemId {item_id}: {response.text}")
         return None
 
+async def check_swim_lane_availability_async(token, date_str, item_id, context):
+    """Async variant of check_swim_lane_availability."""
+    headers, payload = _build_availability_request(token, date_str, item_id, context)
+
+    client = get_async_http_client()
+    response = await client.post(context["AVAILABILITY_URL"], headers=headers, json=payload)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        logging.info(f"❌ Failed to fetch availability for ItemId {item_id}: {response.text}")
+        return None
@@ -2,13 +2,18 @@ import requests
 import logging
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from dotenv import load_dotenv
+from src.domain.gateways.asyncHttpClient import get_async_http_client
 
 # Load environment variables
 if os.getenv("RENDER") is None:
     load_dotenv()
 
+# Serializes read-modify-write of the token cache file across threads (e.g. parallel auto-booking)
+_token_cache_lock = threading.Lock()
+
 def load_cached_token(context):
     """Load the cached token from a file if it exists and is still valid."""
     if os.path.exists(context["TOKEN_CACHE_FILE"]):
@@ -36,25 +41,22 @@ def load_cached_token(context):
 
 def save_token(token, expiration, context):
     """Save the token and its expiration timestamp to a local file."""
-    data = {}
-    if os.path.exists(context["TOKEN_CACHE_FILE"]):
-        with open(context["TOKEN_CACHE_FILE"], "r") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                logging.info("⚠️ Token cache file is corrupted. Overwriting with new data...")
-
-    data[context["API_KEY"]] = {"token": token, "expiration": expiration}
-
-    with open(context["TOKEN_CACHE_FILE"], "w") as f:
-        json.dump(data, f)
-
-def login_via_context(context):
-    """Fetch an authentication token, storing it if valid."""
-    cached_token = load_cached_token(context)
-    if cached_token:
-        return cached_token
-
+    with _token_cache_lock:
+        data = {}
+        if os.path.exists(context["TOKEN_CACHE_FILE"]):
+            with open(context["TOKEN_CACHE_FILE"], "r") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    logging.info("⚠️ Token cache file is corrupted. Overwriting with new data...")
+
+        data[context["API_KEY"]] = {"token": token, "expiration": expiration}
+
+        with open(context["TOKEN_CACHE_FILE"], "w") as f:
+            json.dump(data, f)
+
+def _build_login_request(context):
+    """Build the headers and payload for a MAC login request."""
     headers = {
         "Accept": "application/json, text/plain, */*",
         "Content-Type": "application/json",
@@ -66,11 +68,10 @@ def login_via_context(context):
         "UserLogin": context["USERNAME"],
         "Pswd": context["PASSWORD"]
     }
+    return headers, payload
 
-    logging.info(f"🔍 Logging in via: {context['LOGIN_URL']}")
-
-    response = requests.post(context["LOGIN_URL"], headers=headers, json=payload, verify=False)
-
+def _handle_login_response(response, context):
+    """Extract and cache the token from a MAC login response (requests or httpx)."""
     logging.info(f"🔍 Response Status Code: {response.status_code}")
     
     if response.status_code == 200:
@@ -103,6 +104,33 @@ def login_via_context(context):
         logging.info(f"❌ Login failed: {response.status_code} - {response.text}")
         return None
 
+def login_via_context(context):
+    """Fetch an authentication token, storing it if valid."""
+    cached_token = load_cached_token(context)
+    if cached_token:
+        return cached_token
+
+    headers, payload = _build_login_request(context)
+
+    logging.info(f"🔍 Logging in via: {context['LOGIN_URL']}")
+
+    response = requests.post(context["LOGIN_URL"], headers=headers, json=payload, verify=False)
+    return _handle_login_response(response, context)
+
+async def login_via_context_async(context):
+    """Async variant of login_via_context using the shared httpx client."""
+    cached_token = load_cached_token(context)
+    if cached_token:
+        return cached_token
+
+    headers, payload = _build_login_request(context)
+
+    logging.info(f"🔍 Logging in via: {context['LOGIN_URL']}")
+
+    client = get_async_http_client(verify=False)
+    response = await client.post(context["LOGIN_URL"], headers=headers, json=payload)
+    return _handle_login_response(response, context)
+
 def login_via_credentials(username, password):
     """
     Authenticate the user and return the full login response.
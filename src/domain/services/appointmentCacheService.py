@@ -0,0 +1,155 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pytz
+
+from src.domain.gateways.appointmentGateway import get_appointments_schedule, get_appointments_schedule_async
+from src.domain.gateways.loginGateway import login_via_context, login_via_context_async
+
+# A user's appointments are reused for this long; bookings and cancellations made here drop them at once
+APPOINTMENT_CACHE_TTL_SECONDS = float(os.getenv("APPOINTMENT_CACHE_TTL_SECONDS", "60"))
+APPOINTMENT_CACHE_MAX_ENTRIES = int(os.getenv("APPOINTMENT_CACHE_MAX_ENTRIES", "1024"))
+
+_eastern = pytz.timezone('US/Eastern')
+
+# (username, date) -> (fetched_at, [appointments starting that day]), least recently used first
+_store = OrderedDict()
+_store_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _dates(start_date, end_date):
+    start = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
+    return [(start + datetime.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range((end - start).days + 1)]
+
+
+def _appointment_date(appointment):
+    """Eastern date (YYYY-MM-DD) an appointment starts on, or None if StartDateTime can't be read."""
+    try:
+        start = datetime.datetime.fromisoformat(appointment["StartDateTime"].replace("Z", "+00:00"))
+    except (KeyError, AttributeError, ValueError):
+        return None
+    if start.tzinfo is not None:
+        start = start.astimezone(_eastern)
+    return start.strftime("%Y-%m-%d")
+
+
+def _get_stored(username, dates):
+    """Appointments for every date from the store, or None unless all of them are stored and fresh."""
+    now = time.time()
+    appointments = []
+    with _store_lock:
+        for date in dates:
+            entry = _store.get((username, date))
+            if not entry or now - entry[0] > APPOINTMENT_CACHE_TTL_SECONDS:
+                _stats["misses"] += 1
+                return None
+            appointments.extend(entry[1])
+        for date in dates:
+            _store.move_to_end((username, date))
+        _stats["hits"] += 1
+    return appointments
+
+
+def _store_days(username, dates, appointments):
+    """Split a range result into single-day entries so later queries for any part of it are served locally."""
+    by_date = {date: [] for date in dates}
+    for appointment in appointments:
+        date = _appointment_date(appointment)
+        if date is None:
+            logging.info(f"Not caching appointments for {username}: unreadable StartDateTime")
+            return
+        if date in by_date:
+            by_date[date].append(appointment)
+
+    now = time.time()
+    with _store_lock:
+        for date, day in by_date.items():
+            _store[(username, date)] = (now, day)
+            _store.move_to_end((username, date))
+        while len(_store) > APPOINTMENT_CACHE_MAX_ENTRIES:
+            _store.popitem(last=False)
+
+
+def invalidate_appointments(username, date=None):
+    """Drop a user's stored appointments for a date (all dates when None), e.g. after a booking or cancellation."""
+    with _store_lock:
+        keys = [key for key in _store if key[0] == username and (date is None or key[1] == date)]
+        for key in keys:
+            del _store[key]
+        _stats["invalidations"] += len(keys)
+
+
+def get_appointment_cache_stats():
+    with _store_lock:
+        return {"entries": len(_store), **_stats}
+
+
+def get_appointments_cached(start_date, end_date, context, refresh=False):
+    """
+    A user's appointments between two dates, from the store when every day is cached.
+
+    Otherwise the whole range is fetched with one GetAppointmentsSchedule request
+    and stored per day, so a week fetch also answers single-day questions.
+
+    Args:
+        start_date: First day (YYYY-MM-DD)
+        end_date: Last day, inclusive (YYYY-MM-DD)
+        context: User context
+        refresh: Skip the store and fetch (the result is still stored)
+
+    Returns:
+        tuple: (list of appointments or None, status code); 401 when the MAC login fails
+    """
+    username = context.get("USERNAME")
+    dates = _dates(start_date, end_date)
+
+    if username and not refresh:
+        appointments = _get_stored(username, dates)
+        if appointments is not None:
+            return appointments, 200
+
+    token = login_via_context(context)
+    if not token:
+        return None, 401
+
+    start_date_str, end_date_str = _schedule_range(start_date, end_date)
+    logging.info(f"Fetching appointments between {start_date_str} and {end_date_str}")
+    appointments, status_code = get_appointments_schedule(token, start_date_str, end_date_str, context)
+    if status_code == 200 and username:
+        _store_days(username, dates, appointments or [])
+    return appointments, status_code
+
+
+async def get_appointments_cached_async(start_date, end_date, context, refresh=False):
+    """Async variant of get_appointments_cached for the ASGI agent pipeline."""
+    username = context.get("USERNAME")
+    dates = _dates(start_date, end_date)
+
+    if username and not refresh:
+        appointments = _get_stored(username, dates)
+        if appointments is not None:
+            return appointments, 200
+
+    token = await login_via_context_async(context)
+    if not token:
+        return None, 401
+
+    start_date_str, end_date_str = _schedule_range(start_date, end_date)
+    logging.info(f"Fetching appointments between {start_date_str} and {end_date_str}")
+    appointments, status_code = await get_appointments_schedule_async(token, start_date_str, end_date_str, context)
+    if status_code == 200 and username:
+        _store_days(username, dates, appointments or [])
+    return appointments, status_code
+
+
+def _schedule_range(start_date, end_date):
+    """GetAppointmentsSchedule bounds (Eastern ISO 8601) covering whole days from start_date to end_date."""
+    start = _eastern.localize(datetime.datetime.strptime(start_date, "%Y-%m-%d"))
+    end = _eastern.localize(datetime.datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59))
+    return start.isoformat(timespec='seconds'), end.isoformat(timespec='seconds')
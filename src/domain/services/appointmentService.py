@@ -1,45 +1,35 @@
-from src.domain.gateways.loginGateway import login_via_context
-from src.domain.gateways.appointmentGateway import get_appointments_schedule
-from src.domain.gateways.availabilityGateway import check_swim_lane_availability
+from src.domain.services.appointmentCacheService import get_appointments_cached
+from src.domain.services.availabilityGrid import AvailabilityGrid
+from src.domain.services.availabilityRangeService import get_availability_cached
 import src.contextManager
 import datetime
 import pytz
 import requests
 import logging
 
+def _slot_label(moment):
+    """Time slot label (Eastern, e.g. "7:00 PM") for an appointment datetime."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(pytz.timezone('US/Eastern'))
+    return moment.strftime("%I:%M %p").lstrip("0")
+
 def get_appointments_schedule_action(start_date=None, end_date=None, context=None):
     """
     Fetch scheduled swim lane appointments for a given date or date range.
     Accepts start_date and end_date parameters. For a single day, set both to the same date.
     Returns both the formatted message and the raw appointments data.
     """
-    token = login_via_context(context)
-    if not token:
-        return {"error": "Authentication failed"}, 401
-
-    # Localize the date(s) to Eastern Time
-    eastern = pytz.timezone('US/Eastern')
-    
     # Validate that we have both start_date and end_date
     if not start_date or not end_date:
         return {"message": "Both start_date and end_date must be provided."}, 400
     
-    # Process date range
-    start_date_obj = eastern.localize(datetime.datetime.strptime(start_date, "%Y-%m-%d")
-                                 .replace(hour=0, minute=0, second=0, microsecond=0))
-    end_date_obj = eastern.localize(datetime.datetime.strptime(end_date, "%Y-%m-%d")
-                               .replace(hour=23, minute=59, second=59, microsecond=999999))
-    
     # Determine if this is a single day query
     single_date_mode = start_date == end_date
 
-    # Format dates as ISO 8601 strings
-    start_date_str = start_date_obj.isoformat(timespec='seconds')
-    end_date_str = end_date_obj.isoformat(timespec='seconds')
-
-    logging.info(f"Fetching appointments between {start_date_str} and {end_date_str}")
-    appointments, status_code = get_appointments_schedule(token, start_date_str, end_date_str, context)
+    appointments, status_code = get_appointments_cached(start_date, end_date, context)
 
+    if status_code == 401 and appointments is None:
+        return {"error": "Authentication failed"}, 401
     if status_code != 200:
         return {"message": "Error retrieving swim lane information."}, status_code
 
@@ -73,20 +63,11 @@ def get_appointments_schedule_action(start_date=None, end_date=None, context=Non
             if not item_id:
                 return {"message": "Invalid pool name."}, 400
 
-            availability = check_swim_lane_availability(token, start_date, item_id, context)
-
-            # Flatten the availability times
-            available_times = []
-            for day in availability.get("Availability", []):
-                for time_slot in day.get("AvailableTimes", []):
-                    for selection in time_slot.get("PossibleBookSelections", []):
-                        for lane_info in selection:
-                            if lane_info["Name"] == lane:
-                                available_times.append(datetime.datetime.fromisoformat(time_slot["StartDateTime"]))
+            grid = AvailabilityGrid.for_pool(get_availability_cached(pool_key, start_date, context), pool_key, context)
 
             # ✅ FIX: Reverse the logic to check if lane is **booked** before/after
-            before_free = before_start in available_times
-            after_free = after_end in available_times
+            before_free = grid.is_free(_slot_label(before_start), lane)
+            after_free = grid.is_free(_slot_label(after_end), lane)
 
             if before_free and after_free:
                 message += " The lane is free before and after your appointment."
@@ -150,30 +131,16 @@ def get_appointment_data(start_date, end_date, context):
     """
     Fetch scheduled swim lane appointment data for a given date.
     If end_date is not provided, it will be set to start_date (single day query).
+    Served from the appointment cache, since every availability image asks for it.
     """
-    token = login_via_context(context)
-    if not token:
-        return {"error": "Authentication failed"}, 401
-
     # If end_date not provided, set it to start_date (single day query)
     if not end_date:
         end_date = start_date
 
-    # Localize the date to Eastern Time
-    eastern = pytz.timezone('US/Eastern')
-    start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
-    
-    start_date_obj = eastern.localize(start_dt.replace(hour=0, minute=0, second=0, microsecond=0))
-    end_date_obj = eastern.localize(end_dt.replace(hour=23, minute=59, second=59, microsecond=999999))
-
-    # Format dates as ISO 8601 strings
-    start_date_str = start_date_obj.isoformat(timespec='seconds')
-    end_date_str = end_date_obj.isoformat(timespec='seconds')
-
-    logging.info(f"Fetching appointments between {start_date_str} and {end_date_str}")
-    appointments, status_code = get_appointments_schedule(token, start_date_str, end_date_str, context)
+    appointments, status_code = get_appointments_cached(start_date, end_date, context)
 
+    if status_code == 401 and appointments is None:
+        return {"error": "Authentication failed"}, 401
     if status_code != 200:
         return {"message": "Error retrieving swim lane information."}, status_code
 
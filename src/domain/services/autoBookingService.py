@@ -3,8 +3,17 @@ import datetime
 import logging
 import requests
 import time
-from src.domain.sql.scheduleGateway import get_all_active_schedules, should_run_booking, update_last_success
-from src.domain.sql.authGateway import get_mac_password
+import threading
+from flask import Flask, g
+from src.domain.sql.scheduleGateway import update_last_success, get_auto_booking_work_list
+from src.contextManager import load_context_for_auth_entry
+from src.domain.gateways.appointmentGateway import book_swim_lane
+from src.domain.gateways.loginGateway import login_via_context
+from src.domain.services.bookingPreferenceCompiler import expand_booking_plan
+from src.domain.services.bookingService import get_recent_booking
+from src.domain.services.appointmentCacheService import get_appointments_cached, invalidate_appointments
+from src.domain.services.laneAllocatorService import allocate_and_book
+from concurrent.futures import ThreadPoolExecutor
 import pytz
 
 # Configuration for MAC booking system
@@ -12,6 +21,28 @@ import pytz
 # Can be set to 7 for the old midnight booking window (12 AM on day X → book for day X+7)
 MAC_BOOKING_DAYS_AHEAD = int(os.getenv("MAC_BOOKING_DAYS_AHEAD", "8"))
 
+# Maximum number of users booked at the same time
+AUTO_BOOKING_CONCURRENCY = int(os.getenv("AUTO_BOOKING_CONCURRENCY", "4"))
+
+# Book straight from the compiled schedule plan before falling back to the reasoning agent
+AUTO_BOOKING_DIRECT = os.getenv("AUTO_BOOKING_DIRECT", "true").lower() == "true"
+# Upper bound on plan candidates tried directly (pool/time/duration/lane combinations)
+AUTO_BOOKING_DIRECT_MAX_ATTEMPTS = int(os.getenv("AUTO_BOOKING_DIRECT_MAX_ATTEMPTS", "36"))
+# Booking verification: appointment checks when the booking response wasn't seen in-process,
+# waiting INITIAL_DELAY, then doubling, between checks
+BOOKING_VERIFY_MAX_ATTEMPTS = int(os.getenv("BOOKING_VERIFY_MAX_ATTEMPTS", "4"))
+BOOKING_VERIFY_INITIAL_DELAY_SECONDS = float(os.getenv("BOOKING_VERIFY_INITIAL_DELAY_SECONDS", "0.5"))
+# Assign lanes across all users with plans up front so they don't race each other for the same lanes
+AUTO_BOOKING_ALLOCATOR = os.getenv("AUTO_BOOKING_ALLOCATOR", "true").lower() == "true"
+
+# "inprocess" runs the agent inside this process; "http" posts to AGENT_CHAT_URL like an external client
+AUTO_BOOKING_AGENT_MODE = os.getenv("AUTO_BOOKING_AGENT_MODE", "inprocess").lower()
+AGENT_CHAT_URL = os.getenv("AGENT_CHAT_URL", "https://swimming-agent.onrender.com/agent/chat")
+
+# Minimal Flask app whose request context hosts in-process agent calls (actions use g and jsonify)
+_inprocess_app = None
+_inprocess_app_lock = threading.Lock()
+
 # Log the configuration on module load
 logging.info(f"MAC booking configuration: Booking {MAC_BOOKING_DAYS_AHEAD} days ahead")
 
@@ -21,7 +52,82 @@ def get_day_of_week():
     today = datetime.datetime.now(eastern)
     return today.strftime("%A").lower()
 
-def call_reasoning_agent(command, username, mac_password, user_api_key, session_id=None):
+def call_reasoning_agent(command, username, mac_password, user_api_key, session_id=None, context=None):
+    """
+    Send the scheduling command to the reasoning agent.
+    
+    Runs the agent in-process with the given user context unless AUTO_BOOKING_AGENT_MODE is "http"
+    (or no context is available), in which case it calls the agent chat endpoint.
+    
+    Returns:
+        dict: status, message, details (the chat response body) and session_id
+    """
+    if AUTO_BOOKING_AGENT_MODE == "inprocess" and context:
+        return _call_reasoning_agent_inprocess(command, username, context, session_id)
+    return _call_reasoning_agent_http(command, username, mac_password, user_api_key, session_id)
+
+def _get_inprocess_app():
+    global _inprocess_app
+    with _inprocess_app_lock:
+        if _inprocess_app is None:
+            _inprocess_app = Flask(__name__)
+        return _inprocess_app
+
+def _call_reasoning_agent_inprocess(command, username, context, session_id=None):
+    """
+    Drive the agent chat flow directly, as the /agent/chat route would for an authenticated request.
+    """
+    # Imported here so the agent (and its OpenAI client) only loads when the agent is needed
+    from src.agent.routes.agent_routes import agent_service, parse_chat_request, build_chat_response
+    
+    if not context.get("IS_ENABLED"):
+        logging.warning(f"Access denied for disabled account: {username}")
+        return {"status": "error", "message": "Account not enabled", "session_id": session_id}
+    
+    payload = {"user_input": command, "response_format": "auto"}
+    if session_id:
+        payload["session_id"] = session_id
+    
+    try:
+        logging.info(f"Running agent in-process for {username}")
+        with _get_inprocess_app().test_request_context("/agent/chat", method="POST", json=payload):
+            # Same state require_api_key leaves behind for the chat route
+            g.context = dict(context)
+            user_input, response_format, session_id, early_response = parse_chat_request(payload)
+            if early_response:
+                response, status_code = early_response
+            else:
+                result, status_code = agent_service.process_chat(
+                    user_input=user_input,
+                    context=g.context,
+                    response_format=response_format,
+                    session_id=session_id
+                )
+                response, status_code = build_chat_response(result, status_code, session_id)
+            result = response.get_json(silent=True) or {}
+        
+        logging.info(f"In-process agent response status for {username}: {status_code}")
+        if status_code == 200:
+            return {
+                "status": "success",
+                "message": result.get("message", "Command processed successfully"),
+                "details": result,
+                "session_id": result.get("session_id", session_id)
+            }
+        return {
+            "status": "error",
+            "message": f"Agent returned status {status_code}: {result.get('message', '')}",
+            "session_id": session_id
+        }
+    except Exception as e:
+        logging.exception(f"Unexpected error running reasoning agent in-process: {e}")
+        return {
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}",
+            "session_id": session_id
+        }
+
+def _call_reasoning_agent_http(command, username, mac_password, user_api_key, session_id=None):
     """
     Call the reasoning agent endpoint with the scheduling command.
     """
@@ -42,7 +148,7 @@ def call_reasoning_agent(command, username, mac_password, user_api_key, session_
             "x-mac-pw": mac_password  # Fixed header name to match decorator
         }
           # Make the request to the agent endpoint with shorter timeout to prevent hanging
-        agent_url = f"https://swimming-agent.onrender.com/agent/chat"
+        agent_url = AGENT_CHAT_URL
         logging.info(f"Calling agent endpoint: {agent_url}")
         logging.info(f"Request payload: {payload}")
         logging.info(f"Request headers: {{'Content-Type': headers['Content-Type'], 'x-api-key': '***', 'x-mac-pw': '***'}}")  # Hide sensitive data
@@ -107,189 +213,291 @@ def call_reasoning_agent(command, username, mac_password, user_api_key, session_
 def verify_booking_exists(username, target_date, context):
     """
     Verify if a booking actually exists for the target date.
+    
+    A booking the MAC confirmed in this process (see bookingService.record_booking) is
+    trusted as is. Otherwise the user's appointments for the date are queried, retrying
+    with exponential backoff while the booking may still be propagating.
+    
     Returns True if a booking is found, False otherwise.
     """
-    try:
-        from src.domain.services.appointmentService import get_appointments_schedule_action
-        
-        # Check appointments for the specific target date
-        response, status_code = get_appointments_schedule_action(
-            start_date=target_date,
-            end_date=target_date,
-            context=context
-        )
-        
-        if status_code == 200:
-            appointments = response.get("appointments", [])
-            if appointments:
+    recent = get_recent_booking(username, target_date)
+    if recent:
+        logging.info(f"Verified booking for {username} on {target_date} from the booking response: "
+                     f"{recent['location']} {recent['lane']} at {recent['time_slot']}")
+        return True
+    
+    delay = BOOKING_VERIFY_INITIAL_DELAY_SECONDS
+    for attempt in range(1, BOOKING_VERIFY_MAX_ATTEMPTS + 1):
+        try:
+            # Appointments only; no availability lookup is needed to confirm a booking.
+            # Retries skip the appointment cache, since an empty day there may predate the booking.
+            appointments, status_code = get_appointments_cached(target_date, target_date, context, refresh=attempt > 1)
+            if status_code == 200 and appointments:
                 logging.info(f"Verified booking exists for {username} on {target_date}: {len(appointments)} appointment(s) found")
                 return True
-            else:
-                logging.warning(f"No booking found for {username} on {target_date}")
-                return False
-        else:
-            logging.error(f"Failed to verify booking for {username} on {target_date}: status {status_code}")
-            return False
-            
-    except Exception as e:
-        logging.error(f"Error verifying booking for {username} on {target_date}: {e}")
-        return False
+            if status_code == 401 and appointments is None:
+                logging.warning(f"Failed to verify booking for {username} on {target_date}: login failed")
+            elif status_code != 200:
+                logging.warning(f"Failed to verify booking for {username} on {target_date}: status {status_code}")
+        except Exception as e:
+            logging.error(f"Error verifying booking for {username} on {target_date}: {e}")
+        
+        if attempt < BOOKING_VERIFY_MAX_ATTEMPTS:
+            time.sleep(delay)
+            delay *= 2
+    
+    logging.warning(f"No booking found for {username} on {target_date} after {BOOKING_VERIFY_MAX_ATTEMPTS} checks")
+    return False
 
-def process_auto_booking():
+def book_from_plan(plan, booking_date, context):
     """
-    Process automated bookings based on saved schedules.
-    This function retrieves all active schedules and sends commands
-    to the reasoning agent for execution.
+    Try a compiled plan's candidates in preference order against the MAC API.
+    
+    Returns:
+        str: Description of the booked candidate, or None if none could be booked
     """
-    logging.info("Starting automated lane booking process")
+    token = login_via_context(context)
+    if not token:
+        logging.warning(f"Direct booking: MAC login failed for {context['USERNAME']}")
+        return None
     
-    # Get current day of week
-    today = get_day_of_week()
+    for attempt in expand_booking_plan(plan, booking_date)[:AUTO_BOOKING_DIRECT_MAX_ATTEMPTS]:
+        label = f"{attempt['location']} {attempt['lane']} for {attempt['duration']} on {booking_date} at {attempt['time_slot']}"
+        try:
+            response, status_code = book_swim_lane(
+                token, attempt["appointment_date_time"], attempt["duration"], attempt["location"], attempt["lane"], context
+            )
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Direct booking of {label} failed: {e}")
+            continue
+        if status_code == 200 and response.get("Success"):
+            logging.info(f"Direct booking: booked {label} for {context['USERNAME']}")
+            invalidate_appointments(context["USERNAME"], booking_date)
+            return label
+    return None
+
+def _process_user_booking(work_item, target_date, target_day, try_direct=True):
+    """
+    Run the auto-booking for one user from the work list.
     
-    # Calculate the target day (what day we're booking for)
-    eastern = pytz.timezone('US/Eastern')
-    now = datetime.datetime.now(eastern)
-    target_date = now + datetime.timedelta(days=MAC_BOOKING_DAYS_AHEAD)
-    target_day = target_date.strftime("%A").lower()
+    The compiled schedule plan is booked directly when there is one; the
+    reasoning agent handles commands without a plan and plans that didn't book.
     
-    logging.info(f"Running on {today}, booking for {target_day} ({MAC_BOOKING_DAYS_AHEAD} days ahead)")
+    Args:
+        work_item: The user's entry from get_auto_booking_work_list
+        target_date: The date being booked
+        target_day: Its lowercase day of week
+        try_direct: False when the plan's candidates were already tried (e.g. by the launcher)
     
-    # Get all active schedules
-    schedules = get_all_active_schedules()
-    logging.info(f"Found {len(schedules)} total schedules")
+    Returns:
+        dict: The user's entry in the run summary (username, status, message)
+    """
+    username = work_item["username"]
+    target_command = work_item["command"]
     
-    results = []
-    for schedule in schedules:
-        username = schedule["username"]
-        # Get the command for the TARGET day, not today
-        target_command = schedule.get(target_day)
-        
-        if not target_command:
-            logging.info(f"No booking scheduled for {username} on {target_day}")
-            continue
-        
-        # Check if this user's booking for the target day has already run today
-        if not should_run_booking(username, target_day):
-            logging.info(f"Skipping {username} - booking for {target_day} already completed today")
-            results.append({
-                "username": username,
-                "status": "skipped",
-                "message": f"Already completed booking for {target_day} today"
-            })
-            continue
-        
-        # Get the MAC password and API key from auth_data table
-        mac_password = get_mac_password(username)
-        if not mac_password:
-            logging.warning(f"Missing MAC password for user {username}, cannot proceed with booking")
-            results.append({
-                "username": username,
-                "status": "error",
-                "message": "Missing MAC password"
-            })
-            continue
-        
-        # Get the user's API key for agent authentication
-        from src.domain.sql.authGateway import get_auth
-        user_auth = get_auth(username)
-        if not user_auth or not user_auth.get("api_key"):
-            logging.warning(f"Missing API key for user {username}, cannot proceed with booking")
-            results.append({
+    # Check if this user's booking for the target day has already run today
+    if work_item["already_completed"]:
+        logging.info(f"Skipping {username} - booking for {target_day} already completed today")
+        return {
+            "username": username,
+            "status": "skipped",
+            "message": f"Already completed booking for {target_day} today"
+        }
+    
+    # MAC password and API key come from the joined auth_data row
+    mac_password = work_item["mac_password"]
+    if not mac_password:
+        logging.warning(f"Missing MAC password for user {username}, cannot proceed with booking")
+        return {
+            "username": username,
+            "status": "error",
+            "message": "Missing MAC password"
+        }
+    
+    # The user's API key for agent authentication
+    if not work_item["api_key"]:
+        logging.warning(f"Missing API key for user {username}, cannot proceed with booking")
+        return {
+            "username": username,
+            "status": "error",
+            "message": "Missing API key"
+        }
+    
+    user_api_key = work_item["api_key"]
+    
+    # Format date for booking - target date is calculated by process_auto_booking
+    booking_date = target_date.strftime("%Y-%m-%d")
+    
+    # Replace {date} placeholder in the command with the target date
+    processed_command = target_command.replace("{date}", booking_date)
+    
+    # Build the context for this user from the same row
+    user_context = load_context_for_auth_entry(work_item, mac_password)
+    
+    plan = work_item.get("plan")
+    if AUTO_BOOKING_DIRECT and try_direct and plan:
+        try:
+            booked = book_from_plan(plan, booking_date, user_context)
+        except Exception as e:
+            logging.exception(f"Direct booking failed for {username}: {str(e)}")
+            booked = None
+        if booked:
+            try:
+                update_last_success(username, target_day)
+                logging.info(f"Updated last success timestamp for {username} on {target_day}")
+            except Exception as e:
+                logging.error(f"Failed to update last success timestamp for {username}: {e}")
+            return {
                 "username": username,
-                "status": "error",
-                "message": "Missing API key"
-            })
-            continue
-        
-        user_api_key = user_auth["api_key"]
-        
-        # Format date for booking - target date is already calculated above
-        booking_date = target_date.strftime("%Y-%m-%d")
+                "status": "success",
+                "message": f"{booked} successfully booked"
+            }
+        logging.info(f"No plan candidate booked for {username}, falling back to the reasoning agent")
+    
+    try:
+        logging.info(f"Sending command to reasoning agent for {username}: {processed_command}")
         
-        # Replace {date} placeholder in the command with the target date
-        processed_command = target_command.replace("{date}", booking_date)
+        # Call the reasoning agent endpoint with detailed logging
+        logging.info(f"Making agent request for user {username}...")
+        agent_result = call_reasoning_agent(processed_command, username, mac_password, user_api_key, context=user_context)
+        logging.info(f"Agent request completed for user {username} with status: {agent_result.get('status')}")
+        logging.info(f"Agent result details: {agent_result}")
         
-        # Get the context for this user
-        from src.contextManager import load_context_for_authenticated_user
-        user_context = load_context_for_authenticated_user(user_api_key, mac_password)
+        # Always make a follow-up call to ensure booking happens
+        # Check if we have a session_id (which indicates the first call was successful)
+        session_id = agent_result.get("session_id")
+        logging.info(f"Session ID from first call: {session_id}")
         
-        try:
-            logging.info(f"Sending command to reasoning agent for {username}: {processed_command}")
+        if session_id:
+            logging.info(f"First call successful, session_id: {session_id}")
+            logging.info(f"Making follow-up call for {username} to force booking")
             
-            # Call the reasoning agent endpoint with detailed logging
-            logging.info(f"Making agent request for user {username}...")
-            agent_result = call_reasoning_agent(processed_command, username, mac_password, user_api_key)
-            logging.info(f"Agent request completed for user {username} with status: {agent_result.get('status')}")
-            logging.info(f"Agent result details: {agent_result}")
+            # Make a follow-up call to force booking
+            follow_up_message = "If you booked a lane for me, thank you. If you presented options, please just make a selection you think most fits my preferences and book it."
             
-            # Always make a follow-up call to ensure booking happens
-            # Check if we have a session_id (which indicates the first call was successful)
-            session_id = agent_result.get("session_id")
-            logging.info(f"Session ID from first call: {session_id}")
+            follow_up_result = call_reasoning_agent(follow_up_message, username, mac_password, user_api_key, session_id, context=user_context)
+            logging.info(f"Follow-up agent request completed for user {username} with status: {follow_up_result.get('status')}")
+            logging.info(f"Follow-up result details: {follow_up_result}")
             
-            if session_id:
-                logging.info(f"First call successful, session_id: {session_id}")
-                logging.info(f"Making follow-up call for {username} to force booking")
+            # Use the follow-up result for the final status
+            if follow_up_result.get("status") == "success":
+                logging.info(f"Agent calls completed successfully for {username}, now verifying booking...")
                 
-                # Make a follow-up call to force booking
-                follow_up_message = "If you booked a lane for me, thank you. If you presented options, please just make a selection you think most fits my preferences and book it."
+                # Verify that a booking actually exists for the target date
+                booking_verified = verify_booking_exists(username, booking_date, user_context)
                 
-                follow_up_result = call_reasoning_agent(follow_up_message, username, mac_password, user_api_key, session_id)
-                logging.info(f"Follow-up agent request completed for user {username} with status: {follow_up_result.get('status')}")
-                logging.info(f"Follow-up result details: {follow_up_result}")
-                
-                # Use the follow-up result for the final status
-                if follow_up_result.get("status") == "success":
-                    logging.info(f"Agent calls completed successfully for {username}, now verifying booking...")
-                    
-                    # Wait a moment for the booking to be processed
-                    time.sleep(2)
+                if booking_verified:
+                    logging.info(f"Successfully verified booking for {username} on {booking_date}")
                     
-                    # Verify that a booking actually exists for the target date
-                    booking_verified = verify_booking_exists(username, booking_date, user_context)
+                    # Update the last successful run timestamp only if booking is verified
+                    try:
+                        update_last_success(username, target_day)
+                        logging.info(f"Updated last success timestamp for {username} on {target_day}")
+                    except Exception as e:
+                        logging.error(f"Failed to update last success timestamp for {username}: {e}")
                     
-                    if booking_verified:
-                        logging.info(f"Successfully verified booking for {username} on {booking_date}")
-                        
-                        # Update the last successful run timestamp only if booking is verified
-                        try:
-                            update_last_success(username, target_day)
-                            logging.info(f"Updated last success timestamp for {username} on {target_day}")
-                        except Exception as e:
-                            logging.error(f"Failed to update last success timestamp for {username}: {e}")
-                        
-                        results.append({
-                            "username": username,
-                            "status": "success",
-                            "message": f"Booking verified for {booking_date}"
-                        })
-                    else:
-                        logging.warning(f"Booking verification failed for {username} on {booking_date} - not updating last success")
-                        results.append({
-                            "username": username,
-                            "status": "error",
-                            "message": f"Booking attempt completed but no booking found for {booking_date}"
-                        })
+                    return {
+                        "username": username,
+                        "status": "success",
+                        "message": f"Booking verified for {booking_date}"
+                    }
                 else:
-                    logging.error(f"Failed to process auto-booking for {username} after follow-up: {follow_up_result}")
-                    results.append({
+                    logging.warning(f"Booking verification failed for {username} on {booking_date} - not updating last success")
+                    return {
                         "username": username,
                         "status": "error",
-                        "message": follow_up_result.get("message", "Booking failed after follow-up")
-                    })
+                        "message": f"Booking attempt completed but no booking found for {booking_date}"
+                    }
             else:
-                logging.error(f"Failed to process auto-booking for {username}: No session_id returned from first call")
-                results.append({
+                logging.error(f"Failed to process auto-booking for {username} after follow-up: {follow_up_result}")
+                return {
                     "username": username,
                     "status": "error",
-                    "message": agent_result.get("message", "Booking failed - no session established")
-                })
-                
+                    "message": follow_up_result.get("message", "Booking failed after follow-up")
+                }
+        else:
+            logging.error(f"Failed to process auto-booking for {username}: No session_id returned from first call")
+            return {
+                "username": username,
+                "status": "error",
+                "message": agent_result.get("message", "Booking failed - no session established")
+            }
+            
+    except Exception as e:
+        logging.exception(f"Error during auto-booking for {username}: {str(e)}")
+        return {
+            "username": username,
+            "status": "error", 
+            "message": f"Exception: {str(e)}"
+        }
+
+def get_target_day():
+    """Get the date being booked today and its lowercase day of week."""
+    eastern = pytz.timezone('US/Eastern')
+    now = datetime.datetime.now(eastern)
+    target_date = now + datetime.timedelta(days=MAC_BOOKING_DAYS_AHEAD)
+    return target_date, target_date.strftime("%A").lower()
+
+def process_auto_booking():
+    """
+    Process automated bookings based on saved schedules.
+    This function retrieves all active schedules and sends commands
+    to the reasoning agent for execution.
+    """
+    logging.info("Starting automated lane booking process")
+    
+    # Get current day of week
+    today = get_day_of_week()
+    
+    # Calculate the target day (what day we're booking for)
+    target_date, target_day = get_target_day()
+    
+    logging.info(f"Running on {today}, booking for {target_day} ({MAC_BOOKING_DAYS_AHEAD} days ahead)")
+    
+    # One query: users with a command for the TARGET day, their auth data and whether it already ran today
+    work_list = get_auto_booking_work_list(target_day)
+    logging.info(f"Found {len(work_list)} users with a booking scheduled for {target_day}")
+    
+    # Users with plans get non-conflicting lanes from the allocator; the rest go through the per-user flow
+    allocated = {}
+    allocator_tried = set()
+    remaining = work_list
+    if AUTO_BOOKING_DIRECT and AUTO_BOOKING_ALLOCATOR:
+        plannable = [
+            item for item in work_list
+            if item.get("plan") and not item["already_completed"] and item["mac_password"] and item["api_key"]
+        ]
+        try:
+            allocated, _ = allocate_and_book(plannable, target_date, target_day)
+            # Users the allocator couldn't place already tried their plan against live availability
+            allocator_tried = {item["username"] for item in plannable}
         except Exception as e:
-            logging.exception(f"Error during auto-booking for {username}: {str(e)}")
+            logging.exception(f"Lane allocation failed, booking users individually: {str(e)}")
+        remaining = [item for item in work_list if item["username"] not in allocated]
+    
+    # Users are booked concurrently so the last one in the list doesn't start minutes into the window
+    max_workers = max(1, min(AUTO_BOOKING_CONCURRENCY, len(remaining)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auto-booking") as executor:
+        futures = {
+            work_item["username"]: executor.submit(
+                _process_user_booking, work_item, target_date, target_day, try_direct=work_item["username"] not in allocator_tried
+            )
+            for work_item in remaining
+        }
+    
+    # Summary keeps the work list order
+    results = []
+    for work_item in work_list:
+        if work_item["username"] in allocated:
+            results.append(allocated[work_item["username"]])
+            continue
+        try:
+            results.append(futures[work_item["username"]].result())
+        except Exception as e:
+            logging.exception(f"Error during auto-booking for {work_item['username']}: {str(e)}")
             results.append({
-                "username": username,
-                "status": "error", 
+                "username": work_item["username"],
+                "status": "error",
                 "message": f"Exception: {str(e)}"
             })
     
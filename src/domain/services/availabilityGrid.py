@@ -0,0 +1,134 @@
+import datetime
+
+_SLOT_MINUTES = 30
+
+
+class AvailabilityGrid:
+    """
+    Lane availability for one pool and day as one integer bitmask per time slot.
+
+    Bit i of a slot's mask is set when lanes[i] is free at that slot, so "which
+    lanes are free for N consecutive slots" is an AND of N masks rather than a
+    scan of lane-name lists. Lanes are full names as the availability API
+    reports them (e.g. "Outdoor Lane 5"); lookups also accept "Lane 5".
+    """
+
+    def __init__(self, lanes, time_slots, masks=None):
+        self.lanes = list(lanes)
+        self.time_slots = list(time_slots)
+        self.masks = list(masks) if masks is not None else [0] * len(self.time_slots)
+        self._lane_bits = {lane: 1 << index for index, lane in enumerate(self.lanes)}
+        # "Lane 5" resolves to the pool's lane 5
+        for index, lane in enumerate(self.lanes):
+            self._lane_bits.setdefault(" ".join(lane.split()[-2:]), 1 << index)
+        self._slot_index = {time_slot: index for index, time_slot in enumerate(self.time_slots)}
+
+    @classmethod
+    def from_dict(cls, availability, lanes, time_slots):
+        """Build a grid from the {time_slot: [lane names]} format get_availability returns."""
+        grid = cls(lanes, time_slots)
+        for time_slot, free_lanes in (availability or {}).items():
+            index = grid._slot_index.get(time_slot)
+            if index is None:
+                continue
+            for lane in free_lanes:
+                grid.masks[index] |= grid._lane_bits.get(lane, 0)
+        return grid
+
+    @classmethod
+    def for_pool(cls, availability, pool_name, context):
+        """Build a grid for a pool using the context's lane names and time slots."""
+        return cls.from_dict(availability, context["LANES_BY_POOL"][pool_name], context["TIME_SLOTS"])
+
+    def to_dict(self):
+        """Convert back to {time_slot: [lane names]}, lanes in lane order."""
+        return {time_slot: self._lanes_in(mask) for time_slot, mask in zip(self.time_slots, self.masks)}
+
+    def _lanes_in(self, mask):
+        return [lane for index, lane in enumerate(self.lanes) if mask >> index & 1]
+
+    def lane_mask(self, lanes):
+        """Mask of the given lanes; unknown lanes are ignored."""
+        mask = 0
+        for lane in lanes:
+            mask |= self._lane_bits.get(lane, 0)
+        return mask
+
+    def is_free(self, time_slot, lane, slots=1):
+        """Whether a lane is free for `slots` consecutive slots starting at time_slot."""
+        bit = self._lane_bits.get(lane, 0)
+        return bool(bit) and bool(self.run_mask(time_slot, slots) & bit)
+
+    def free_lanes(self, time_slot, slots=1):
+        """Lanes free for `slots` consecutive slots starting at time_slot."""
+        return self._lanes_in(self.run_mask(time_slot, slots))
+
+    def run_mask(self, time_slot, slots=1):
+        """Mask of lanes free for `slots` consecutive slots starting at time_slot (0 if the run leaves the day)."""
+        start = self._slot_index.get(time_slot)
+        if start is None or start + slots > len(self.masks):
+            return 0
+        mask = self.masks[start]
+        for index in range(start + 1, start + slots):
+            mask &= self.masks[index]
+        return mask
+
+    def run_masks(self, slots=1):
+        """Per start slot, the mask of lanes free for `slots` consecutive slots."""
+        runs = list(self.masks)
+        for offset in range(1, slots):
+            runs = [mask & self.masks[index + offset] if index + offset < len(self.masks) else 0
+                    for index, mask in enumerate(runs)]
+        return runs
+
+    def preferred_lane(self, time_slot, lane_order=None, slots=1):
+        """First lane in lane_order (default: lane order) free for `slots` slots at time_slot, or None."""
+        mask = self.run_mask(time_slot, slots)
+        for lane in lane_order or self.lanes:
+            if mask & self._lane_bits.get(lane, 0):
+                return lane
+        return None
+
+    def nearest_free(self, target_slot, lane_order=None, slots=1, within_minutes=30):
+        """
+        The free (time_slot, lane) closest to target_slot, earlier first on ties.
+
+        Args:
+            target_slot: Preferred start, e.g. "7:00 PM"
+            lane_order: Acceptable lanes in preference order (default: any lane, in lane order)
+            slots: Consecutive half-hour slots needed (2 for 60 minutes)
+            within_minutes: How far from target_slot to look
+
+        Returns:
+            tuple of (time_slot, lane), or None when nothing is free in range
+        """
+        target = self._slot_index.get(target_slot)
+        if target is None:
+            return None
+        allowed = self.lane_mask(lane_order) if lane_order else (1 << len(self.lanes)) - 1
+        runs = self.run_masks(slots)
+        for distance in range(0, within_minutes // _SLOT_MINUTES + 1):
+            for index in ([target] if distance == 0 else [target - distance, target + distance]):
+                if 0 <= index < len(runs) and runs[index] & allowed:
+                    time_slot = self.time_slots[index]
+                    return time_slot, self.preferred_lane(time_slot, lane_order, slots)
+        return None
+
+    def free_count(self):
+        """Total free lane slots."""
+        return sum(bin(mask).count("1") for mask in self.masks)
+
+    def __bool__(self):
+        return any(self.masks)
+
+
+def slots_for_duration(duration):
+    """Consecutive half-hour slots a duration like "60 Min" (or 60) occupies."""
+    minutes = int(str(duration).split()[0])
+    return max(1, minutes // _SLOT_MINUTES)
+
+
+def slot_offset(time_slot, minutes):
+    """The slot label `minutes` after time_slot, e.g. ("7:00 PM", 30) -> "7:30 PM"."""
+    start = datetime.datetime.strptime(time_slot, "%I:%M %p")
+    return (start + datetime.timedelta(minutes=minutes)).strftime("%I:%M %p").lstrip("0")
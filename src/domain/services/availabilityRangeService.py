@@ -0,0 +1,198 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.domain.gateways.availabilityGateway import check_swim_lane_availability, check_swim_lane_availability_async
+from src.domain.gateways.loginGateway import login_via_context, login_via_context_async
+from src.domain.services.availabilityService import normalize_availability
+
+# Fetched availability is reused for this long (follow-up questions about the same days)
+AVAILABILITY_CACHE_TTL_SECONDS = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "120"))
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "256"))
+# Concurrent (pool, day) requests when fetching a range
+AVAILABILITY_RANGE_CONCURRENCY = int(os.getenv("AVAILABILITY_RANGE_CONCURRENCY", "6"))
+AVAILABILITY_RANGE_MAX_DAYS = int(os.getenv("AVAILABILITY_RANGE_MAX_DAYS", "14"))
+
+# (item_id, date) -> (fetched_at, {time_slot: [lane names]}), least recently used first
+_store = OrderedDict()
+_store_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _get_stored(item_id, date):
+    with _store_lock:
+        entry = _store.get((item_id, date))
+        if entry and time.time() - entry[0] <= AVAILABILITY_CACHE_TTL_SECONDS:
+            _store.move_to_end((item_id, date))
+            _stats["hits"] += 1
+            return entry[1]
+        if entry:
+            del _store[(item_id, date)]
+        _stats["misses"] += 1
+        return None
+
+
+def store_availability(item_id, date, availability):
+    """
+    Keep a normalized availability result for AVAILABILITY_CACHE_TTL_SECONDS.
+
+    Every successfully fetched day is stored, including fully booked ones; failed
+    fetches (None) are not, so the next question retries them.
+    """
+    if availability is None:
+        return
+    with _store_lock:
+        _store[(item_id, date)] = (time.time(), availability)
+        _store.move_to_end((item_id, date))
+        while len(_store) > AVAILABILITY_CACHE_MAX_ENTRIES:
+            _store.popitem(last=False)
+
+
+def invalidate_availability(date=None):
+    """Drop stored availability for a date (all dates when None), e.g. after a booking or cancellation."""
+    with _store_lock:
+        keys = [key for key in _store if date is None or key[1] == date]
+        for key in keys:
+            del _store[key]
+        _stats["invalidations"] += len(keys)
+
+
+def get_availability_store_stats():
+    with _store_lock:
+        return {"entries": len(_store), **_stats}
+
+
+def get_availability_cached(pool_name, date, context):
+    """Single-day availability for a pool, answered from the store when a recent fetch (e.g. a week view) covered it."""
+    return get_availability_range(date, date, context, pools=[pool_name])[date][pool_name]
+
+
+async def get_availability_cached_async(pool_name, date, context):
+    """Async variant of get_availability_cached for the ASGI agent pipeline."""
+    item_id = context["ITEMS"][pool_name]
+    availability = _get_stored(item_id, date)
+    if availability is not None:
+        return availability
+
+    token = await login_via_context_async(context)
+    if not token:
+        logging.warning("Failed to get authentication token")
+        return _unavailable(context)
+    try:
+        data = await check_swim_lane_availability_async(token, date, item_id, context)
+    except Exception as e:
+        logging.error(f"Error fetching availability for ItemId {item_id} on {date}: {e}")
+        data = None
+    availability = _normalize_fetched(data, item_id, date, context)
+    store_availability(item_id, date, availability)
+    return availability if availability is not None else _unavailable(context)
+
+
+def fetch_pool_availability(pool_name, date, context):
+    """
+    Fetch one pool-day from the MAC API, bypassing the store; the result is still stored.
+
+    Returns:
+        dict: {time_slot: [lane names]} (every list empty when the day is fully booked),
+        or None when the login or the fetch failed
+    """
+    item_id = context["ITEMS"][pool_name]
+    token = login_via_context(context)
+    if not token:
+        logging.warning("Failed to get authentication token")
+        return None
+    try:
+        data = check_swim_lane_availability(token, date, item_id, context)
+    except Exception as e:
+        logging.error(f"Error fetching availability for ItemId {item_id} on {date}: {e}")
+        return None
+    availability = _normalize_fetched(data, item_id, date, context)
+    store_availability(item_id, date, availability)
+    return availability
+
+
+def _normalize_fetched(data, item_id, date, context):
+    """Normalized availability for a fetched payload, or None when the fetch failed."""
+    return normalize_availability(data, item_id, date, context) if data is not None else None
+
+
+def _unavailable(context):
+    """What callers get for a day that couldn't be fetched: every slot empty."""
+    return {time_slot: [] for time_slot in context["TIME_SLOTS"]}
+
+
+def _date_range(start_date, end_date):
+    start = datetime.datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.datetime.strptime(end_date, "%Y-%m-%d").date()
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    days = (end - start).days + 1
+    if days > AVAILABILITY_RANGE_MAX_DAYS:
+        raise ValueError(f"Date range is limited to {AVAILABILITY_RANGE_MAX_DAYS} days")
+    return [(start + datetime.timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+
+
+def get_availability_range(start_date, end_date, context, pools=None):
+    """
+    Availability for every day in a range, per pool.
+
+    The MAC availability endpoint answers one day per request, so days missing from
+    the store are fetched concurrently with a single login, then stored.
+
+    Args:
+        start_date: First day (YYYY-MM-DD)
+        end_date: Last day, inclusive (YYYY-MM-DD)
+        context: User context
+        pools: Pool names to include (defaults to both pools)
+
+    Returns:
+        dict: {date: {pool: {time_slot: [lane names]}}}
+
+    Raises:
+        ValueError: When the range is invalid or longer than AVAILABILITY_RANGE_MAX_DAYS
+    """
+    dates = _date_range(start_date, end_date)
+    pools = pools or list(context["ITEMS"].keys())
+
+    grid = {date: {} for date in dates}
+    missing = []
+    for date in dates:
+        for pool in pools:
+            availability = _get_stored(context["ITEMS"][pool], date)
+            if availability is None:
+                missing.append((pool, date))
+            else:
+                grid[date][pool] = availability
+
+    if missing:
+        token = login_via_context(context)
+        if not token:
+            logging.warning("Failed to get authentication token")
+            for pool, date in missing:
+                grid[date][pool] = _unavailable(context)
+            return grid
+
+        def fetch(pool_and_date):
+            pool, date = pool_and_date
+            item_id = context["ITEMS"][pool]
+            try:
+                data = check_swim_lane_availability(token, date, item_id, context)
+            except Exception as e:
+                logging.error(f"Error fetching availability for ItemId {item_id} on {date}: {e}")
+                return None
+            return _normalize_fetched(data, item_id, date, context)
+
+        workers = max(1, min(AVAILABILITY_RANGE_CONCURRENCY, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="availability-range") as executor:
+            fetched = list(executor.map(fetch, missing))
+
+        for (pool, date), availability in zip(missing, fetched):
+            store_availability(context["ITEMS"][pool], date, availability)
+            grid[date][pool] = availability if availability is not None else _unavailable(context)
+        logging.info(f"📅 Fetched availability for {len(missing)} pool-days between {start_date} and {end_date}")
+
+    return grid
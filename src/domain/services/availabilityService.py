@@ -1,21 +1,104 @@
 import src.contextManager
 import logging
-from src.domain.gateways.availabilityGateway import check_swim_lane_availability  # Import swim lane function
+from src.domain.gateways.availabilityGateway import check_swim_lane_availability, check_swim_lane_availability_async  # Import swim lane function
 from dateutil import parser  # Import this at the top
-from src.domain.gateways.loginGateway import login_via_context
+from src.domain.gateways.loginGateway import login_via_context, login_via_context_async
+import datetime
+import functools
+import types
 import pytz
 
+_eastern = pytz.timezone("America/New_York")
+
+# UTC spellings the MAC uses for StartDateTime; anything else is parsed once per payload
+_UTC_FORMATS = ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S.000Z", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S+00:00")
+
 
 def format_api_time(api_time):
     """Convert API time to Eastern Time and match TIME_SLOTS."""
     try:
         utc_dt = parser.isoparse(api_time)  # Automatically handles timezones
-        et_dt = utc_dt.astimezone(pytz.timezone("America/New_York"))  # Convert to ET
+        et_dt = utc_dt.astimezone(_eastern)  # Convert to ET
         return et_dt.strftime("%I:%M %p").lstrip("0")  # Match TIME_SLOTS format
     except Exception as e:
         logging.info(f"Error parsing datetime: {api_time}, Error: {e}")
         return None  # Return None to handle errors gracefully
 
+@functools.lru_cache(maxsize=64)
+def _slot_labels_for_date(date_str, time_slots):
+    """
+    Map the UTC StartDateTime strings for every half hour of a date to their TIME_SLOTS labels.
+
+    Args:
+        date_str: The date (YYYY-MM-DD)
+        time_slots: The context's TIME_SLOTS, as a tuple
+
+    Returns:
+        Read-only mapping shared by every caller, e.g. {"2025-06-02T23:00:00Z": "7:00 PM", ...};
+        half hours outside TIME_SLOTS (e.g. early mornings) map to None
+    """
+    day = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+    labels = {}
+    for minutes in range(0, 24 * 60, 30):
+        local = _eastern.localize(day + datetime.timedelta(minutes=minutes))
+        label = local.strftime("%I:%M %p").lstrip("0")
+        utc = local.astimezone(pytz.utc)
+        for fmt in _UTC_FORMATS:
+            labels[utc.strftime(fmt)] = label if label in time_slots else None
+    return types.MappingProxyType(labels)
+
+def normalize_availability(data, item_id, date_str, context):
+    """Convert a raw MAC availability payload into {time_slot: [lane names]}."""
+    # Initialize all time slots as unavailable
+    availability = {time: [] for time in context["TIME_SLOTS"]}
+
+    # ✅ Handle case where Availability is missing or empty
+    if not data or "Availability" not in data or not data["Availability"]:
+        logging.info(f"⚠️ No availability data returned for ItemId {item_id} on {date_str}")
+        return availability  # Return empty availability instead of breaking
+
+    # Safely access availability data
+    availability_data = data["Availability"]
+    if not isinstance(availability_data, list) or len(availability_data) == 0:
+        logging.info(f"⚠️ Invalid availability data structure for ItemId {item_id} on {date_str}")
+        return availability
+
+    available_times = availability_data[0].get("AvailableTimes")
+    if not available_times:
+        logging.info(f"⚠️ No available times in data for ItemId {item_id} on {date_str}")
+        return availability
+
+    labels = _slot_labels_for_date(date_str, tuple(context["TIME_SLOTS"]))
+    parsed = {}
+    open_slots = 0
+    for slot in available_times:
+        if not slot or "StartDateTime" not in slot:
+            continue
+
+        start = slot["StartDateTime"]
+        if start in labels:
+            formatted_time = labels[start]
+        else:
+            # Unexpected spelling (e.g. a local offset): parse it once for this payload
+            if start not in parsed:
+                parsed[start] = format_api_time(start)
+            formatted_time = parsed[start]
+        lanes = availability.get(formatted_time)
+        if lanes is None:
+            continue
+
+        for lane_group in slot.get("PossibleBookSelections", []):
+            if isinstance(lane_group, list):
+                for lane in lane_group:
+                    if lane and "Name" in lane:
+                        lanes.append(lane["Name"])
+        open_slots += bool(lanes)
+
+    total_slots = sum(len(lanes) for lanes in availability.values())
+    logging.info(f"🔍 Availability for ItemId {item_id} on {date_str}: {len(available_times)} times in response, "
+                 f"{open_slots} open slots, {total_slots} total lane slots")
+    return availability
+
 def get_availability(item_id, date_str, context):
     """Fetch availability data for a given pool type and date."""
     try:
@@ -27,55 +110,29 @@ def get_availability(item_id, date_str, context):
         data = check_swim_lane_availability(token, date_str, item_id, context)
         
         # Log the raw API response for debugging
-        logging.info(f"🔍 Raw API response for ItemId {item_id} on {date_str}: {data}")
-
-        # Initialize all time slots as unavailable
-        availability = {time: [] for time in context["TIME_SLOTS"]}
-
-        # ✅ Handle case where Availability is missing or empty
-        if not data or "Availability" not in data or not data["Availability"]:
-            logging.info(f"⚠️ No availability data returned for ItemId {item_id} on {date_str}")
-            return availability  # Return empty availability instead of breaking
-
-        # Safely access availability data
-        availability_data = data["Availability"]
-        if not isinstance(availability_data, list) or len(availability_data) == 0:
-            logging.info(f"⚠️ Invalid availability data structure for ItemId {item_id} on {date_str}")
-            return availability
-
-        available_times = availability_data[0].get("AvailableTimes")
-        if not available_times:
-            logging.info(f"⚠️ No available times in data for ItemId {item_id} on {date_str}")
-            return availability
-            
-        logging.info(f"🔍 Found {len(available_times)} time slots in API response")
-
-        for slot in available_times:
-            if not slot or "StartDateTime" not in slot:
-                continue
-                
-            formatted_time = format_api_time(slot["StartDateTime"])
-            if formatted_time and formatted_time in availability:
-                possible_selections = slot.get("PossibleBookSelections", [])
-                logging.info(f"🔍 Processing time slot {formatted_time} with {len(possible_selections)} selection groups")
-                
-                for lane_group in possible_selections:
-                    if isinstance(lane_group, list):
-                        for lane in lane_group:
-                            if lane and "Name" in lane:
-                                lane_name = lane["Name"]
-                                availability[formatted_time].append(lane_name)
-                                logging.info(f"🔍 Added lane {lane_name} to {formatted_time}")
-
-        # Log final availability summary
-        total_slots = sum(len(lanes) for lanes in availability.values())
-        logging.info(f"🔍 Final availability summary for ItemId {item_id}: {total_slots} total lane slots")
-        for time_slot, lanes in availability.items():
-            if lanes:
-                logging.info(f"🔍 {time_slot}: {len(lanes)} lanes available - {lanes}")
+        logging.debug(f"🔍 Raw API response for ItemId {item_id} on {date_str}: {data}")
 
-        return availability
+        return normalize_availability(data, item_id, date_str, context)
         
     except Exception as e:
         logging.error(f"Error in get_availability for ItemId {item_id} on {date_str}: {e}", exc_info=True)
-        return {time: [] for time in context.get("TIME_SLOTS", [])}
\ No newline at end of file
+        return {time: [] for time in context.get("TIME_SLOTS", [])}
+
+async def get_availability_async(item_id, date_str, context):
+    """Async variant of get_availability for the ASGI agent pipeline."""
+    try:
+        token = await login_via_context_async(context)
+        if not token:
+            logging.warning("Failed to get authentication token")
+            return {}
+
+        data = await check_swim_lane_availability_async(token, date_str, item_id, context)
+        
+        # Log the raw API response for debugging
+        logging.debug(f"🔍 Raw API response for ItemId {item_id} on {date_str}: {data}")
+
+        return normalize_availability(data, item_id, date_str, context)
+        
+    except Exception as e:
+        logging.error(f"Error in get_availability_async for ItemId {item_id} on {date_str}: {e}", exc_info=True)
+        return {time: [] for time in context.get("TIME_SLOTS", [])}
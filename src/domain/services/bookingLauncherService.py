@@ -0,0 +1,245 @@
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytz
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.contextManager import load_context_for_auth_entry
+from src.domain.gateways.appointmentGateway import BOOKING_URL, build_booking_request, send_booking_request
+from src.domain.gateways.loginGateway import login_via_context
+from src.domain.services.appointmentCacheService import invalidate_appointments
+from src.domain.services.autoBookingService import (
+    AUTO_BOOKING_CONCURRENCY, MAC_BOOKING_DAYS_AHEAD, _process_user_booking
+)
+from src.domain.services.bookingPreferenceCompiler import expand_booking_plan
+from src.domain.sql.scheduleGateway import get_auto_booking_work_list, update_last_success
+
+# The MAC opens bookings MAC_BOOKING_DAYS_AHEAD days out at this Eastern time
+BOOKING_WINDOW_OPEN_TIME = os.getenv("BOOKING_WINDOW_OPEN_TIME", "21:00")
+# Preparation (logins, DB reads, connection warm-up) starts this long before the window opens
+BOOKING_LAUNCH_LEAD_SECONDS = float(os.getenv("BOOKING_LAUNCH_LEAD_SECONDS", "180"))
+# A launch started more than this long after the window opened books immediately instead
+BOOKING_LAUNCH_LATE_GRACE_SECONDS = float(os.getenv("BOOKING_LAUNCH_LATE_GRACE_SECONDS", "1800"))
+# Users booked at the same instant; each holds one warm connection
+BOOKING_LAUNCH_CONCURRENCY = int(os.getenv("BOOKING_LAUNCH_CONCURRENCY", str(max(AUTO_BOOKING_CONCURRENCY, 8))))
+
+_eastern = pytz.timezone('US/Eastern')
+
+
+def get_window_open(now=None):
+    """Get today's booking window opening time (Eastern)."""
+    now = now or datetime.datetime.now(_eastern)
+    hour, minute = (int(part) for part in BOOKING_WINDOW_OPEN_TIME.split(":"))
+    return _eastern.localize(datetime.datetime(now.year, now.month, now.day, hour, minute))
+
+
+def get_launch_time(window_open=None):
+    """When preparation for a window starts: BOOKING_LAUNCH_LEAD_SECONDS before it opens."""
+    window_open = window_open or get_window_open()
+    return window_open - datetime.timedelta(seconds=BOOKING_LAUNCH_LEAD_SECONDS)
+
+
+def wait_until(epoch_seconds):
+    """Sleep until an instant, finishing with a short spin for sub-millisecond accuracy."""
+    while True:
+        remaining = epoch_seconds - time.time()
+        if remaining <= 0:
+            return
+        # Coarse sleep until the last few milliseconds, then yield until the instant
+        time.sleep(remaining - 0.005 if remaining > 0.01 else 0)
+
+
+def prepare_user_launch(work_item, booking_date):
+    """
+    T-minus preparation for one user: log in, resolve the schedule command and build the booking requests.
+
+    Returns:
+        dict with work_item, context and requests (label, headers, payload) in preference order;
+        requests is empty when the command couldn't be resolved and the agent must handle it
+    """
+    username = work_item["username"]
+    context = load_context_for_auth_entry(work_item, work_item["mac_password"])
+    prepared = {"work_item": work_item, "context": context, "requests": []}
+
+    plan = work_item.get("plan")
+    if not plan:
+        logging.info(f"Launcher: no structured plan for {username}, agent will book after the window opens")
+        return prepared
+
+    # Pre-authenticate so no login happens after the window opens
+    token = login_via_context(context)
+    if not token:
+        logging.warning(f"Launcher: MAC login failed for {username}, agent will retry after the window opens")
+        return prepared
+
+    for attempt in expand_booking_plan(plan, booking_date):
+        headers, payload = build_booking_request(
+            token, attempt["appointment_date_time"], attempt["duration"], attempt["location"], attempt["lane"], context
+        )
+        if payload is not None:
+            label = f"{attempt['location']} {attempt['lane']} for {attempt['duration']} on {booking_date} at {attempt['time_slot']}"
+            prepared["requests"].append((label, headers, payload))
+    logging.info(f"Launcher: prepared {len(prepared['requests'])} booking attempts for {username}")
+    return prepared
+
+
+def fire_user_launch(prepared, window_open_epoch, session):
+    """
+    Wait for the window to open, then POST the prepared bookings in preference order until one succeeds.
+
+    Returns:
+        dict with username, status, message and timing (fire_offset_ms, latency_ms, attempts)
+    """
+    username = prepared["work_item"]["username"]
+    wait_until(window_open_epoch)
+    fired_at = time.time()
+
+    for attempt_number, (label, headers, payload) in enumerate(prepared["requests"], start=1):
+        try:
+            response, status_code = send_booking_request(headers, payload, session=session)
+        except requests.exceptions.ReadTimeout as e:
+            # The MAC may still have booked it; leave this user to the fallback rather than booking another lane
+            logging.warning(f"Launcher: booking request for {username} timed out, outcome unknown: {e}")
+            invalidate_appointments(username)
+            return {
+                "username": username,
+                "status": "error",
+                "message": f"Booking {label} timed out",
+                "fire_offset_ms": round((fired_at - window_open_epoch) * 1000, 1),
+                "latency_ms": round((time.time() - window_open_epoch) * 1000, 1),
+                "attempts": attempt_number
+            }
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Launcher: booking request for {username} failed: {e}")
+            continue
+        if status_code == 200 and response.get("Success"):
+            latency_ms = round((time.time() - window_open_epoch) * 1000, 1)
+            logging.info(f"Launcher: booked {label} for {username} {latency_ms}ms after window open")
+            invalidate_appointments(username)
+            return {
+                "username": username,
+                "status": "success",
+                "message": f"{label} successfully booked",
+                "fire_offset_ms": round((fired_at - window_open_epoch) * 1000, 1),
+                "latency_ms": latency_ms,
+                "attempts": attempt_number
+            }
+
+    return {
+        "username": username,
+        "status": "error",
+        "message": "No prepared booking attempt succeeded",
+        "fire_offset_ms": round((fired_at - window_open_epoch) * 1000, 1),
+        "latency_ms": round((time.time() - window_open_epoch) * 1000, 1),
+        "attempts": len(prepared["requests"])
+    }
+
+
+def _warm_session(pool_size):
+    """Open pooled, kept-alive connections to the MAC API before the window opens."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        # Concurrent requests force the pool to open pool_size connections
+        list(executor.map(lambda _: _ping(session), range(pool_size)))
+    return session
+
+
+def _ping(session):
+    try:
+        session.head(BOOKING_URL, timeout=10)
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Launcher: connection warm-up failed: {e}")
+
+
+def launch_booking_window(window_open=None):
+    """
+    Book every scheduled user at the instant the booking window opens.
+
+    Meant to start a few minutes early (get_launch_time); a call made earlier waits
+    in-process, so queued callers should re-queue until then instead. It logs every
+    user in, resolves schedule commands into concrete booking requests and warms
+    connections, then fires all bookings at window open. Users whose command
+    couldn't be resolved, or whose prepared attempts all failed, fall back to the
+    agent-driven auto-booking flow.
+
+    Returns:
+        list: Per-user results in the run_auto_booking summary shape, with timing fields for launched users
+    """
+    window_open = window_open or get_window_open()
+    window_open_epoch = window_open.timestamp()
+    seconds_to_open = window_open_epoch - time.time()
+
+    if seconds_to_open < -BOOKING_LAUNCH_LATE_GRACE_SECONDS:
+        logging.warning(f"Launcher: window opened {-seconds_to_open:.0f}s ago, booking immediately")
+        window_open_epoch = time.time()
+    elif seconds_to_open > BOOKING_LAUNCH_LEAD_SECONDS:
+        logging.info(f"Launcher: waiting {seconds_to_open - BOOKING_LAUNCH_LEAD_SECONDS:.0f}s before preparing")
+        wait_until(window_open_epoch - BOOKING_LAUNCH_LEAD_SECONDS)
+
+    target_date = window_open + datetime.timedelta(days=MAC_BOOKING_DAYS_AHEAD)
+    target_day = target_date.strftime("%A").lower()
+    booking_date = target_date.strftime("%Y-%m-%d")
+    logging.info(f"🚀 Launcher: preparing {target_day} {booking_date} bookings for window open at {window_open}")
+
+    work_list = get_auto_booking_work_list(target_day)
+    results = {}
+    pending = []
+    for work_item in work_list:
+        username = work_item["username"]
+        if work_item["already_completed"]:
+            results[username] = {
+                "username": username,
+                "status": "skipped",
+                "message": f"Already completed booking for {target_day} today"
+            }
+        elif not work_item["mac_password"] or not work_item["api_key"]:
+            results[username] = {
+                "username": username,
+                "status": "error",
+                "message": "Missing MAC password" if not work_item["mac_password"] else "Missing API key"
+            }
+        else:
+            pending.append(work_item)
+
+    workers = max(1, min(BOOKING_LAUNCH_CONCURRENCY, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="booking-launcher") as executor:
+        prepared = list(executor.map(lambda item: prepare_user_launch(item, booking_date), pending))
+        launchable = [user for user in prepared if user["requests"]]
+        session = _warm_session(max(1, min(workers, len(launchable))))
+        logging.info(f"Launcher: {len(launchable)}/{len(pending)} users ready, "
+                     f"{window_open_epoch - time.time():.1f}s until window open")
+
+        launched = list(executor.map(lambda user: fire_user_launch(user, window_open_epoch, session), launchable))
+
+    # Users without prepared requests still get a direct attempt; launched ones already tried their plan
+    fallback = [(user["work_item"], True) for user in prepared if not user["requests"]]
+    for result, user in zip(launched, launchable):
+        username = user["work_item"]["username"]
+        if result["status"] == "success":
+            try:
+                update_last_success(username, target_day)
+            except Exception as e:
+                logging.error(f"Failed to update last success timestamp for {username}: {e}")
+            results[username] = result
+        else:
+            fallback.append((user["work_item"], False))
+
+    # Anything the launcher couldn't book goes through the agent flow
+    if fallback:
+        logging.info(f"Launcher: {len(fallback)} users falling back to agent booking")
+        with ThreadPoolExecutor(max_workers=max(1, min(AUTO_BOOKING_CONCURRENCY, len(fallback)))) as executor:
+            for (work_item, _), result in zip(fallback, executor.map(
+                    lambda entry: _process_user_booking(entry[0], target_date, target_day, try_direct=entry[1]), fallback)):
+                results[work_item["username"]] = result
+
+    latencies = [result["latency_ms"] for result in launched if result["status"] == "success"]
+    if latencies:
+        logging.info(f"Launcher: {len(latencies)} bookings at window open, "
+                     f"latency min {min(latencies)}ms / max {max(latencies)}ms")
+
+    return [results[item["username"]] for item in work_list if item["username"] in results]
@@ -0,0 +1,243 @@
+import datetime
+import logging
+import re
+
+import pytz
+
+_POOLS = {
+    "outdoor": "Outdoor Pool",
+    "indoor": "Indoor Pool"
+}
+_ALL_LANES = [f"Lane {number}" for number in range(1, 7)]
+
+_TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\b", re.IGNORECASE)
+_DURATION_PATTERN = re.compile(
+    r"\b(\d+)\s*min(?:ute)?s?\b|\b(half\s+an|an?|one|\d+(?:\.\d+)?)\s+hours?\b", re.IGNORECASE
+)
+# An explicit lane list: "lanes 5, 2, 4", "prefer lane 3 or 1", "preferring 5, 6, then 2"
+_LANE_LIST_PATTERN = re.compile(
+    r"\b(?:lanes?|prefer(?:ring|ence)?(?:\s+lanes?)?)\s*:?\s*"
+    r"(\d+(?:\s*(?:,(?:\s*(?:and|or|then)\b)?|and|or|then|>)\s*\d+)*)",
+    re.IGNORECASE
+)
+_LANE_NUMBER_PATTERN = re.compile(r"\d+")
+_DIGIT_PATTERN = re.compile(r"\d")
+# "if indoor is full try the outdoor pool" asks for a pool fallback plans can't express
+_POOL_FALLBACK_PATTERN = re.compile(r"\b(?:if|otherwise|else|instead|try|fall\s*back|full)\b", re.IGNORECASE)
+_ANY_LANE_PATTERN = re.compile(r"\bany\b[^.]*\blane", re.IGNORECASE)
+_FLEX_PATTERN = re.compile(
+    r"\b(half(?:\s+an)?\s+hour|an?\s+hour|\d+\s*min(?:ute)?s?)\s+(earlier\s+or\s+later|earlier|later)", re.IGNORECASE
+)
+# "shorten to 30 as last resort", "a shorter swim is fine"
+_SHORTEN_PATTERN = re.compile(
+    r"\bshort(?:en|er)\b(?:\s+(?:it\s+)?to\s+(\d+)(?:\s*min(?:ute)?s?\b)?)?", re.IGNORECASE
+)
+
+# Bump when the plan format or parsing changes so stored plans get recompiled
+PLAN_VERSION = 4
+
+
+def compile_booking_command(command):
+    """
+    Turn a free-text schedule command into a structured booking plan.
+
+    Args:
+        command: Schedule command, e.g. "Book outdoor pool at 7PM for 60 minutes, prefer lanes 5, 2, 4"
+
+    Returns:
+        dict with pool, time_slot, duration, lanes (in preference order), time_offsets
+        (minutes to try besides the preferred time) and fallback_durations, or None when
+        the command doesn't name a pool and a time or asks for something a plan can't
+        express (a pool fallback, a duration other than 30/60 minutes, stray numbers),
+        so the agent handles it instead
+    """
+    if not command:
+        return None
+    text = command.replace("{date}", " ")
+
+    positions = {name: text.lower().find(keyword) for keyword, name in _POOLS.items() if keyword in text.lower()}
+    time_match = _TIME_PATTERN.search(text)
+    if not positions or not time_match:
+        logging.info(f"Could not compile booking command: {command}")
+        return None
+    if len(positions) > 1 and _POOL_FALLBACK_PATTERN.search(text):
+        logging.info(f"Not compiling booking command with a pool fallback: {command}")
+        return None
+    pool = min(positions, key=positions.get)
+
+    hour, minute, meridiem = int(time_match.group(1)), int(time_match.group(2) or 0), time_match.group(3).upper()
+    time_slot = f"{hour}:{minute:02d} {meridiem}M"
+    text = _blank(text, time_match)
+
+    # The flexibility phrase ("30 minutes earlier or later") isn't the duration
+    flex_match = _FLEX_PATTERN.search(text)
+    time_offsets = _parse_time_offsets(flex_match)
+    text = _blank(text, flex_match)
+
+    # Read before the duration so "shorten to 30 minutes" isn't taken for it
+    shorten_match = _SHORTEN_PATTERN.search(text)
+    text = _blank(text, shorten_match)
+
+    duration_match = _DURATION_PATTERN.search(text)
+    duration = _parse_duration(duration_match) if duration_match else "60 Min"
+    if not duration:
+        logging.info(f"Not compiling booking command with an unsupported duration: {command}")
+        return None
+    text = _blank(text, duration_match)
+
+    fallback_durations = _parse_fallback_durations(shorten_match, duration)
+    if fallback_durations is None:
+        logging.info(f"Not compiling booking command with an unsupported shorter duration: {command}")
+        return None
+
+    lanes, text = _parse_lanes(text)
+    if _DIGIT_PATTERN.search(text):
+        logging.info(f"Not compiling booking command with numbers outside a lane list: {command}")
+        return None
+
+    return {
+        "version": PLAN_VERSION,
+        "pool": pool,
+        "time_slot": time_slot,
+        "duration": duration,
+        "lanes": lanes,
+        "time_offsets": time_offsets,
+        "fallback_durations": fallback_durations
+    }
+
+
+def resolve_booking_plan(command, stored_plan=None):
+    """
+    Get the plan for a command, reusing a stored plan compiled from the same command and plan version.
+
+    Args:
+        command: The schedule command
+        stored_plan: Plan saved with the schedule (with its source "command"), if any
+    """
+    if stored_plan and stored_plan.get("command") == command and stored_plan.get("version") == PLAN_VERSION:
+        return stored_plan
+    plan = compile_booking_command(command)
+    if plan:
+        plan["command"] = command
+    return plan
+
+
+def _blank(text, match):
+    """Replace a match with spaces so later patterns don't read it again."""
+    if not match:
+        return text
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _parse_duration(match):
+    """ "60 minutes"/"1 hour"/"half an hour" -> "60 Min"/"30 Min"; None for durations that can't be booked."""
+    minutes_text, hours_text = match.group(1), match.group(2)
+    if minutes_text:
+        minutes = int(minutes_text)
+    else:
+        hours_text = hours_text.lower()
+        if hours_text.startswith("half"):
+            minutes = 30
+        elif hours_text in ("a", "an", "one"):
+            minutes = 60
+        else:
+            minutes = float(hours_text) * 60
+    return f"{int(minutes)} Min" if minutes in (30, 60) else None
+
+
+def _parse_fallback_durations(match, duration):
+    """ "shorten to 30" -> ["30 Min"] after an hour; None when the shorter duration can't be booked."""
+    if not match:
+        return []
+    if match.group(1) and int(match.group(1)) != 30:
+        return None
+    return ["30 Min"] if duration == "60 Min" else []
+
+
+def _parse_time_offsets(match):
+    """Minutes around the preferred time the user accepts, earlier first ("a half hour earlier or later" -> [-30, 30])."""
+    if not match:
+        return []
+    amount, direction = match.group(1).lower(), match.group(2).lower()
+    if "half" in amount:
+        minutes = 30
+    elif "hour" in amount:
+        minutes = 60
+    else:
+        minutes = int(re.match(r"\d+", amount).group())
+    # Slots are on the half hour
+    minutes = max(30, round(minutes / 30) * 30)
+    offsets = []
+    for step in range(30, minutes + 1, 30):
+        if "earlier" in direction:
+            offsets.append(-step)
+        if "later" in direction:
+            offsets.append(step)
+    return offsets
+
+
+def _parse_lanes(text):
+    """
+    Lane preference order from explicit lane lists ("prefer lanes 5, 2, 4"); any remaining
+    lanes follow if no lanes are named or any lane is acceptable.
+
+    Returns:
+        tuple: (lanes, text with the lane lists blanked out); lane numbers outside 1-6 are left in the text
+    """
+    lanes = []
+    for match in list(_LANE_LIST_PATTERN.finditer(text)):
+        numbers = _LANE_NUMBER_PATTERN.findall(match.group(1))
+        if any(f"Lane {number}" not in _ALL_LANES for number in numbers):
+            continue
+        for number in numbers:
+            if f"Lane {number}" not in lanes:
+                lanes.append(f"Lane {number}")
+        text = _blank(text, match)
+
+    if not lanes or _ANY_LANE_PATTERN.search(text):
+        lanes += [lane for lane in _ALL_LANES if lane not in lanes]
+    return lanes, text
+
+
+def expand_booking_plan(plan, date):
+    """
+    Expand a plan into concrete booking attempts for a date, in preference order.
+
+    Preferred duration before shortened ones; within a duration, the preferred
+    time before flexible times; within a time, lanes in preference order.
+
+    Returns:
+        list of dicts with date, time_slot, appointment_date_time (ISO, Eastern), duration, location and lane
+    """
+    eastern = pytz.timezone('US/Eastern')
+    preferred = datetime.datetime.strptime(f"{date} {plan['time_slot']}", "%Y-%m-%d %I:%M %p")
+    attempts = []
+    for duration in [plan["duration"]] + plan.get("fallback_durations", []):
+        for offset in [0] + plan.get("time_offsets", []):
+            slot = preferred + datetime.timedelta(minutes=offset)
+            if slot.date() != preferred.date():
+                continue
+            time_slot = slot.strftime("%I:%M %p").lstrip("0")
+            appointment_date_time = eastern.localize(slot).isoformat()
+            for lane in plan["lanes"]:
+                attempts.append({
+                    "date": date,
+                    "time_slot": time_slot,
+                    "appointment_date_time": appointment_date_time,
+                    "duration": duration,
+                    "location": plan["pool"],
+                    "lane": lane
+                })
+    return attempts
+
+
+def describe_booking_plan(plan):
+    """One-line, human-readable summary of a compiled plan."""
+    lanes = ", ".join(lane.replace("Lane ", "") for lane in plan["lanes"])
+    description = f"{plan['pool']} at {plan['time_slot']} for {plan['duration']}, lanes {lanes}"
+    if plan.get("time_offsets"):
+        offsets = ", ".join(f"{offset:+d} min" for offset in plan["time_offsets"])
+        description += f"; also {offsets}"
+    if plan.get("fallback_durations"):
+        description += f"; then {' / '.join(plan['fallback_durations'])}"
+    return description
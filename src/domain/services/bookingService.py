@@ -1,33 +1,88 @@
-from src.domain.gateways.loginGateway import login_via_context
-from src.domain.gateways.appointmentGateway import book_swim_lane
+from src.domain.gateways.loginGateway import login_via_context, login_via_context_async
+from src.domain.gateways.appointmentGateway import book_swim_lane, book_swim_lane_async
+from src.domain.services.availabilityRangeService import invalidate_availability
+from src.domain.services.appointmentCacheService import invalidate_appointments
 import datetime
+import os
+import threading
+import time
 import pytz
 import logging
 
-def book_swim_lane_action(date, time_slot, duration, location, lane, context):
-    """
-    Book a swim lane for a given date range.
-    """
-    token = login_via_context(context)
-    if not token:
-        return {"message": "Authentication failed"}, 401
+# How long a successful booking response is kept for verification (see get_recent_booking)
+BOOKING_RESULT_TTL_SECONDS = float(os.getenv("BOOKING_RESULT_TTL_SECONDS", "900"))
 
-    # Combine date and time_slot into a datetime object
-    appointment_datetime_str = f"{date} {time_slot}"
-    appointment_datetime = datetime.datetime.strptime(appointment_datetime_str, "%Y-%m-%d %I:%M %p")
+# (username, date) -> (recorded_at, booking details)
+_recent_bookings = {}
+_recent_bookings_lock = threading.Lock()
 
-    # Localize to Eastern Time
-    eastern = pytz.timezone('US/Eastern')
-    appointment_datetime = eastern.localize(appointment_datetime)
+def record_booking(username, date, details):
+    """Remember a booking the MAC confirmed, so verification doesn't have to query for it."""
+    now = time.time()
+    with _recent_bookings_lock:
+        # Drop expired entries while we hold the lock
+        for key in [key for key, (recorded_at, _) in _recent_bookings.items() if now - recorded_at > BOOKING_RESULT_TTL_SECONDS]:
+            del _recent_bookings[key]
+        _recent_bookings[(username, date)] = (now, details)
 
-    # Format as ISO 8601 string
-    appointment_date_time = appointment_datetime.isoformat()
+def get_recent_booking(username, date):
+    """
+    Get the booking confirmed in this process for a user and date, if any.
+    
+    Returns:
+        dict with location, lane, duration, time_slot and the MAC response, or None
+    """
+    with _recent_bookings_lock:
+        entry = _recent_bookings.get((username, date))
+    if not entry or time.time() - entry[0] > BOOKING_RESULT_TTL_SECONDS:
+        return None
+    return entry[1]
 
-    appointments, status_code = book_swim_lane(token, appointment_date_time, duration, location, lane, context)
+def _appointment_date_time(date, time_slot):
+    """ISO 8601 Eastern start time for a date (YYYY-MM-DD) and time slot ("7:00 PM")."""
+    appointment_datetime = datetime.datetime.strptime(f"{date} {time_slot}", "%Y-%m-%d %I:%M %p")
+    return pytz.timezone('US/Eastern').localize(appointment_datetime).isoformat()
 
+def _booking_result(appointments, status_code, date, time_slot, duration, location, lane, context):
+    """Turn a BookAppointmentOnAccount response into the action result, recording a confirmed booking."""
     if status_code != 200 or not appointments or not appointments.get("Success"):
         
         return {"message": "Failed to book appointment"}, 500
 
+    # The lane is no longer free, and the user's schedule for the day has changed
+    invalidate_availability(date)
+    invalidate_appointments(context.get("USERNAME"), date)
+
+    # BookAppointmentOnAccount confirmed it; auto-booking verification trusts this instead of polling
+    record_booking(context.get("USERNAME"), date, {
+        "location": location,
+        "lane": lane,
+        "duration": duration,
+        "time_slot": time_slot,
+        "response": appointments
+    })
+
     message = f"{location} {lane} successfully booked for {duration} on {date} at {time_slot}"
-    return {"message": message}, 200
\ No newline at end of file
+    return {"message": message}, 200
+
+def book_swim_lane_action(date, time_slot, duration, location, lane, context):
+    """
+    Book a swim lane for a given date range.
+    """
+    token = login_via_context(context)
+    if not token:
+        return {"message": "Authentication failed"}, 401
+
+    appointments, status_code = book_swim_lane(token, _appointment_date_time(date, time_slot), duration, location, lane, context)
+    return _booking_result(appointments, status_code, date, time_slot, duration, location, lane, context)
+
+async def book_swim_lane_action_async(date, time_slot, duration, location, lane, context):
+    """Async variant of book_swim_lane_action for the ASGI agent pipeline."""
+    token = await login_via_context_async(context)
+    if not token:
+        return {"message": "Authentication failed"}, 401
+
+    appointments, status_code = await book_swim_lane_async(
+        token, _appointment_date_time(date, time_slot), duration, location, lane, context
+    )
+    return _booking_result(appointments, status_code, date, time_slot, duration, location, lane, context)
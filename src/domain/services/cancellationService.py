@@ -1,35 +1,21 @@
-from src.domain.gateways.loginGateway import login_via_context
-from src.domain.gateways.appointmentGateway import cancel_appointment, get_appointments_schedule
-import datetime
-import pytz
+from src.domain.gateways.loginGateway import login_via_context, login_via_context_async
+from src.domain.gateways.appointmentGateway import cancel_appointment, cancel_appointment_async
+from src.domain.services.appointmentCacheService import (
+    get_appointments_cached, get_appointments_cached_async, invalidate_appointments
+)
+from src.domain.services.availabilityRangeService import invalidate_availability
 import logging
 
-def cancel_appointment_action(appointment_date, context):
-    """
-    Cancel an existing swim lane appointment on a given date.
+def _appointment_to_cancel(appointments, status_code, appointment_date):
     """
-    token = login_via_context(context)
-    if not token:
-        return {"message": "Authentication failed"}, 401
-
-    
-    # Localize the date to Eastern Time
-    eastern = pytz.timezone('US/Eastern')
-    date = datetime.datetime.strptime(appointment_date, "%Y-%m-%d")
-    start_date = eastern.localize(date.replace(hour=0, minute=0, second=0))
-    end_date = eastern.localize(date.replace(hour=23, minute=59, second=59))
-    
-    # Format dates as ISO 8601 strings
-    start_date_str = start_date.isoformat(timespec='seconds')
-    end_date_str = end_date.isoformat(timespec='seconds')
-
-    # Fetch appointments for the given date
-    logging.info(f"Fetching appointments between {start_date_str} and {end_date_str}")
-    appointments, status_code = get_appointments_schedule(token, start_date_str, end_date_str, context)
+    The id of the appointment to cancel on a date.
 
+    Returns:
+        tuple: (appointment id, None), or (None, (error message dict, status code))
+    """
     if status_code != 200 or not appointments:
         logging.info(f"Error searching for appointments on {appointment_date} to cancel")
-        return {"message": "No appointments exist on this date to cancel"}, 200
+        return None, ({"message": "No appointments exist on this date to cancel"}, 200)
 
     # Assuming only one appointment per day
     appointment = appointments[0]
@@ -37,16 +23,52 @@ def cancel_appointment_action(appointment_date, context):
 
     if not appointment_id:
         logging.info(f"No appointments to cancel found for {appointment_date}")
-        return {"message": "No appointments exist on this date to cancel"}, 404
+        return None, ({"message": "No appointments exist on this date to cancel"}, 404)
 
     logging.info(f"Cancelling appointment for {appointment_date}")
+    return appointment_id, None
 
-    # Cancel the appointment
-    result, cancel_status_code = cancel_appointment(token, appointment_id, context)
-
+def _cancel_result(cancel_status_code, appointment_date, context):
+    """Drop cached state for the date and build the action result of a CancelAppointment call."""
     if cancel_status_code != 200:
         logging.info(f"Error cancelling appointment for {appointment_date}")
+        # The cached appointment may have been stale; look it up again next time
+        invalidate_appointments(context.get("USERNAME"), appointment_date)
         return {"message": "Failed to cancel appointment"}, 500
 
     logging.info(f"Appointment for {appointment_date} has been cancelled")
-    return {"message": f"The appointment for {appointment_date} has been cancelled."}, 200
\ No newline at end of file
+    invalidate_availability(appointment_date)
+    invalidate_appointments(context.get("USERNAME"), appointment_date)
+    return {"message": f"The appointment for {appointment_date} has been cancelled."}, 200
+
+def cancel_appointment_action(appointment_date, context):
+    """
+    Cancel an existing swim lane appointment on a given date.
+    """
+    token = login_via_context(context)
+    if not token:
+        return {"message": "Authentication failed"}, 401
+
+    # Fetch appointments for the given date (usually cached by the lookup that preceded the cancel)
+    appointments, status_code = get_appointments_cached(appointment_date, appointment_date, context)
+    appointment_id, error = _appointment_to_cancel(appointments, status_code, appointment_date)
+    if error:
+        return error
+
+    # Cancel the appointment
+    result, cancel_status_code = cancel_appointment(token, appointment_id, context)
+    return _cancel_result(cancel_status_code, appointment_date, context)
+
+async def cancel_appointment_action_async(appointment_date, context):
+    """Async variant of cancel_appointment_action for the ASGI agent pipeline."""
+    token = await login_via_context_async(context)
+    if not token:
+        return {"message": "Authentication failed"}, 401
+
+    appointments, status_code = await get_appointments_cached_async(appointment_date, appointment_date, context)
+    appointment_id, error = _appointment_to_cancel(appointments, status_code, appointment_date)
+    if error:
+        return error
+
+    result, cancel_status_code = await cancel_appointment_async(token, appointment_id, context)
+    return _cancel_result(cancel_status_code, appointment_date, context)
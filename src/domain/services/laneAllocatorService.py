@@ -0,0 +1,250 @@
+import datetime
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.contextManager import load_context_for_auth_entry
+from src.domain.gateways.appointmentGateway import book_swim_lane
+from src.domain.gateways.loginGateway import login_via_context
+from src.domain.services.appointmentCacheService import invalidate_appointments
+from src.domain.services.availabilityGrid import AvailabilityGrid
+from src.domain.services.availabilityRangeService import fetch_pool_availability
+from src.domain.services.bookingPreferenceCompiler import expand_booking_plan
+from src.domain.sql.scheduleGateway import update_last_success
+
+# Users whose booking failed are re-planned against what's left, up to this many rounds
+LANE_ALLOCATOR_MAX_ROUNDS = int(os.getenv("LANE_ALLOCATOR_MAX_ROUNDS", "3"))
+# Bookings issued at the same time within a round
+LANE_ALLOCATOR_CONCURRENCY = int(os.getenv("LANE_ALLOCATOR_CONCURRENCY", "8"))
+# Assignment search nodes per round; past this the best assignment found so far is used
+LANE_ALLOCATOR_SEARCH_LIMIT = int(os.getenv("LANE_ALLOCATOR_SEARCH_LIMIT", "50000"))
+
+_SLOT_MINUTES = 30
+
+
+def slot_blocks(time_slot, duration):
+    """The half-hour slots a booking occupies, e.g. ("7:00 PM", "60 Min") -> ["7:00 PM", "7:30 PM"]."""
+    start = datetime.datetime.strptime(time_slot, "%I:%M %p")
+    minutes = int(duration.split()[0])
+    return [
+        (start + datetime.timedelta(minutes=offset)).strftime("%I:%M %p").lstrip("0")
+        for offset in range(0, minutes, _SLOT_MINUTES)
+    ]
+
+
+def _resources(candidate, context):
+    """(pool, lane name, slot) triples a candidate needs, with lane names as the availability API reports them."""
+    lane_name = f"{context['LOCATION_SHORT_NAMES'][candidate['location']]} {candidate['lane']}"
+    return [(candidate["location"], lane_name, slot) for slot in slot_blocks(candidate["time_slot"], candidate["duration"])]
+
+
+def fetch_availability(pools, booking_date, context):
+    """
+    Fetch availability once per pool for the date.
+
+    Returns:
+        dict: pool -> AvailabilityGrid (empty when fully booked), or None when the fetch failed
+    """
+    free = {}
+    for pool in pools:
+        availability = fetch_pool_availability(pool, booking_date, context)
+        if availability is None:
+            # Don't rule every candidate out because of a failed fetch
+            logging.warning(f"Lane allocator: availability for {pool} on {booking_date} unknown, assuming unclaimed lanes are free")
+            free[pool] = None
+            continue
+        free[pool] = AvailabilityGrid.for_pool(availability, pool, context)
+        logging.info(f"Lane allocator: {free[pool].free_count()} free lane slots in {pool} on {booking_date}")
+    return free
+
+
+def allocate(users, free, taken):
+    """
+    Assign each user at most one candidate so no two users need the same lane slot.
+
+    Solved as an assignment by branch and bound: place as many users as possible, then
+    minimise the sum of their candidates' ranks, so a user takes its second choice when
+    that lets another keep its first. Candidates can span several slots, so this isn't a
+    plain bipartite matching. Users are searched most constrained first with their
+    candidates in rank order; the first leaf is the greedy assignment, and the search
+    stops after LANE_ALLOCATOR_SEARCH_LIMIT nodes with the best assignment found.
+
+    Args:
+        users: dict of username -> list of (candidate, resources) in preference order
+        free: pool -> AvailabilityGrid, or None when unknown (everything not taken is assumed free)
+        taken: set of resources already claimed; updated in place
+
+    Returns:
+        dict: username -> (rank, candidate, resources) for every user that could be placed
+    """
+    options = {}
+    for username, user_options in users.items():
+        feasible = [
+            (rank, candidate, resources)
+            for rank, (candidate, resources) in enumerate(user_options)
+            if not any(resource in taken for resource in resources)
+            and all(free.get(pool) is None or free[pool].is_free(slot, lane) for pool, lane, slot in resources)
+        ]
+        if feasible:
+            options[username] = feasible
+
+    order = sorted(options, key=lambda name: (len(options[name]), options[name][0][0], name))
+    # Lowest rank sum users order[index:] could add if all were placed
+    rank_floor = [0] * (len(order) + 1)
+    for index in range(len(order) - 1, -1, -1):
+        rank_floor[index] = rank_floor[index + 1] + options[order[index]][0][0]
+
+    best = {"placed": -1, "cost": 0, "assignment": {}}
+    chosen = {}
+    claimed = set()
+    nodes = 0
+
+    def search(index, placed, cost):
+        nonlocal nodes
+        nodes += 1
+        most = placed + len(order) - index
+        if most < best["placed"] or (most == best["placed"] and cost + rank_floor[index] >= best["cost"]):
+            return
+        if index == len(order):
+            best.update(placed=placed, cost=cost, assignment=dict(chosen))
+            return
+        username = order[index]
+        for option in options[username]:
+            if nodes > LANE_ALLOCATOR_SEARCH_LIMIT:
+                return
+            resources = option[2]
+            if any(resource in claimed for resource in resources):
+                continue
+            chosen[username] = option
+            claimed.update(resources)
+            search(index + 1, placed + 1, cost + option[0])
+            del chosen[username]
+            claimed.difference_update(resources)
+        # Leave this user out
+        if nodes <= LANE_ALLOCATOR_SEARCH_LIMIT:
+            search(index + 1, placed, cost)
+
+    search(0, 0, 0)
+    if nodes > LANE_ALLOCATOR_SEARCH_LIMIT:
+        logging.warning(f"Lane allocator: assignment search stopped after {LANE_ALLOCATOR_SEARCH_LIMIT} nodes, using the best found")
+    for option in best["assignment"].values():
+        taken.update(option[2])
+    return best["assignment"]
+
+
+def _book(entry, booking_date):
+    """Book one user's assigned candidate. Returns (booked, label)."""
+    context, candidate = entry["context"], entry["candidate"]
+    label = f"{candidate['location']} {candidate['lane']} for {candidate['duration']} on {booking_date} at {candidate['time_slot']}"
+    try:
+        token = entry.get("token") or login_via_context(context)
+        if not token:
+            logging.warning(f"Lane allocator: MAC login failed for {context['USERNAME']}")
+            return False, label
+        entry["token"] = token
+        response, status_code = book_swim_lane(
+            token, candidate["appointment_date_time"], candidate["duration"], candidate["location"], candidate["lane"], context
+        )
+        booked = status_code == 200 and bool(response.get("Success"))
+        if booked:
+            invalidate_appointments(context["USERNAME"], booking_date)
+        return booked, label
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Lane allocator: booking {label} for {context['USERNAME']} failed: {e}")
+        return False, label
+    except Exception as e:
+        logging.error(f"Lane allocator: error booking {label} for {context['USERNAME']}: {e}")
+        return False, label
+
+
+def allocate_and_book(work_items, target_date, target_day):
+    """
+    Book scheduled users with compiled plans without them competing for the same lanes.
+
+    Availability is fetched once per pool, users are assigned non-conflicting
+    (pool, time, duration, lane) candidates, and the bookings are issued concurrently.
+    Users whose booking failed lose that candidate and are re-planned against what's
+    left; users that can't be placed are returned for the caller's fallback.
+    Once booking has started, errors end the allocation instead of raising, so the
+    users already booked are always reported and never handed to the fallback.
+
+    Args:
+        work_items: Work list entries with a plan, MAC password and API key, not yet completed today
+        target_date: The date being booked
+        target_day: Its lowercase day of week
+
+    Returns:
+        tuple: (results for booked users keyed by username, work items that still need booking)
+    """
+    if not work_items:
+        return {}, []
+    booking_date = target_date.strftime("%Y-%m-%d")
+
+    entries = {}
+    for work_item in work_items:
+        context = load_context_for_auth_entry(work_item, work_item["mac_password"])
+        candidates = expand_booking_plan(work_item["plan"], booking_date)
+        entries[work_item["username"]] = {
+            "work_item": work_item,
+            "context": context,
+            "options": [(candidate, _resources(candidate, context)) for candidate in candidates]
+        }
+
+    pools = sorted({candidate["location"] for entry in entries.values() for candidate, _ in entry["options"]})
+    free = fetch_availability(pools, booking_date, next(iter(entries.values()))["context"])
+
+    results = {}
+    taken = set()
+    pending = dict(entries)
+    for round_number in range(1, LANE_ALLOCATOR_MAX_ROUNDS + 1):
+        try:
+            if not _run_round(round_number, pending, free, taken, results, booking_date, target_day):
+                break
+        except Exception as e:
+            logging.exception(f"Lane allocator: round {round_number} failed, handing {len(pending)} users to the fallback: {e}")
+            break
+        if not pending:
+            break
+
+    if pending:
+        logging.info(f"Lane allocator: {len(pending)} users could not be placed")
+    return results, [entry["work_item"] for entry in pending.values()]
+
+
+def _run_round(round_number, pending, free, taken, results, booking_date, target_day):
+    """
+    Assign and book one round, moving booked users from pending to results as each booking returns.
+
+    Returns:
+        bool: False when nobody could be assigned
+    """
+    assignment = allocate({username: entry["options"] for username, entry in pending.items()}, free, taken)
+    if not assignment:
+        return False
+    logging.info(f"Lane allocator round {round_number}: booking {len(assignment)} of {len(pending)} users")
+
+    batch = []
+    for username, (rank, candidate, resources) in assignment.items():
+        pending[username]["candidate"] = candidate
+        batch.append(username)
+    with ThreadPoolExecutor(max_workers=max(1, min(LANE_ALLOCATOR_CONCURRENCY, len(batch))),
+                            thread_name_prefix="lane-allocator") as executor:
+        outcomes = list(executor.map(lambda name: _book(pending[name], booking_date), batch))
+
+    for username, (booked, label) in zip(batch, outcomes):
+        entry = pending[username]
+        rank, candidate, resources = assignment[username]
+        if booked:
+            logging.info(f"Lane allocator: booked {label} for {username} (choice {rank + 1})")
+            try:
+                update_last_success(username, target_day)
+            except Exception as e:
+                logging.error(f"Failed to update last success timestamp for {username}: {e}")
+            results[username] = {"username": username, "status": "success", "message": f"{label} successfully booked"}
+            del pending[username]
+        else:
+            # Someone outside this run probably holds it; keep it claimed and drop it from this user's options
+            entry["options"] = [option for option in entry["options"] if option[0] is not candidate]
+    return True
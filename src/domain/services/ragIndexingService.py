@@ -6,6 +6,7 @@ import requests
 import faiss
 import numpy as np
 import openai
+from src.utils.openAIClientService import get_openai_client, openai_call_slot
 import tiktoken
 from PyPDF2 import PdfReader
 import tempfile
@@ -15,8 +16,6 @@ from pathlib import Path
 from src.domain.sql.ragSourceGateway import get_all_rag_sources
 import time
 
-openai.verify_ssl_certs = False  # Disable SSL verification for OpenAI API")
-
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIM = 1536  # For text-embedding-3-small
 
@@ -178,20 +177,22 @@ def embed_chunks(chunks, batch_size=8):  # Reduced from 32 to 8
         last_exception = None
         for retry in range(5):  # Increased from 3 to 5 retries
             try:
-                resp = openai.embeddings.create(
-                    input=batch,
-                    model=EMBEDDING_MODEL
-                )
+                # This loop is the only retry layer, and it backs off outside the concurrency slot
+                with openai_call_slot("embeddings"):
+                    resp = get_openai_client().with_options(max_retries=0).embeddings.create(
+                        input=batch,
+                        model=EMBEDDING_MODEL
+                    )
                 for item in resp.data:
                     embeddings.append(item.embedding)
                 
                 logging.info(f"Batch {batch_num}/{batch_count} successfully embedded")
                 break
                 
-            except openai.APIConnectionError as e:
+            except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as e:
                 # Exponential backoff
                 wait_time = (2 ** retry) + 1  # 3, 5, 9, 17, 33 seconds
-                logging.warning(f"Connection error on batch {batch_num}/{batch_count}, retry {retry+1}/5, waiting {wait_time}s: {e}")
+                logging.warning(f"{type(e).__name__} on batch {batch_num}/{batch_count}, retry {retry+1}/5, waiting {wait_time}s: {e}")
                 last_exception = e
                 time.sleep(wait_time)
         else:
@@ -4,12 +4,10 @@ import logging
 import faiss
 import numpy as np
 import re
-import openai
+from src.utils.openAIClientService import get_openai_client, openai_call_slot
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
-# Configure OpenAI settings
-openai.verify_ssl_certs = False
 EMBEDDING_MODEL = "text-embedding-3-small"
 DEFAULT_SIMILARITY_THRESHOLD = 0.5
 
@@ -41,10 +39,11 @@ def get_embedding(text: str) -> np.ndarray:
         # Clean and normalize text for better embedding quality
         text = preprocess_text_for_embedding(text)
         
-        response = openai.embeddings.create(
-            input=[text],
-            model=EMBEDDING_MODEL
-        )
+        with openai_call_slot("embeddings"):
+            response = get_openai_client().embeddings.create(
+                input=[text],
+                model=EMBEDDING_MODEL
+            )
         return np.array(response.data[0].embedding, dtype="float32")
     except Exception as e:
         logging.error(f"Error getting embedding: {e}")
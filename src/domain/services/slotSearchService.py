@@ -0,0 +1,174 @@
+import datetime
+import logging
+import os
+import time
+
+import pytz
+
+from src.domain.services.availabilityGrid import AvailabilityGrid, slots_for_duration
+from src.domain.services.availabilityRangeService import get_availability_range
+
+# Score penalties (lower scores are better): per half hour away from the target time,
+# and per step down each preference list
+SLOT_SEARCH_TIME_WEIGHT = float(os.getenv("SLOT_SEARCH_TIME_WEIGHT", "10"))
+SLOT_SEARCH_LANE_WEIGHT = float(os.getenv("SLOT_SEARCH_LANE_WEIGHT", "3"))
+SLOT_SEARCH_DURATION_WEIGHT = float(os.getenv("SLOT_SEARCH_DURATION_WEIGHT", "15"))
+SLOT_SEARCH_POOL_WEIGHT = float(os.getenv("SLOT_SEARCH_POOL_WEIGHT", "5"))
+SLOT_SEARCH_MAX_RESULTS = int(os.getenv("SLOT_SEARCH_MAX_RESULTS", "20"))
+
+_SLOT_MINUTES = 30
+
+
+def parse_search_preferences(params, context):
+    """
+    Normalize search preferences from an API body or tool call into search_best_slots keyword arguments.
+
+    Accepts pools as "Indoor"/"Outdoor"/"Both" or pool names, durations as 30/60 or "30 Min",
+    and lanes as numbers or "Lane N".
+
+    Raises:
+        ValueError: When a value can't be understood
+    """
+    pools = params.get("pools") or ["Both Pools"]
+    if isinstance(pools, str):
+        pools = [pools]
+    pool_names = []
+    for pool in pools:
+        pool = f"{pool} Pool" if pool in ["Indoor", "Outdoor", "Both"] else pool
+        names = list(context["ITEMS"].keys()) if pool == "Both Pools" else [pool]
+        for name in names:
+            if name not in context["ITEMS"]:
+                raise ValueError(f"Invalid pool name: {pool}")
+            if name not in pool_names:
+                pool_names.append(name)
+
+    durations = params.get("durations") or ["60"]
+    if isinstance(durations, (str, int)):
+        durations = [durations]
+    durations = [f"{duration} Min" if str(duration).isdigit() else str(duration) for duration in durations]
+    if any(duration not in context["DURATION_IDS"] for duration in durations):
+        raise ValueError("durations must be 30 and/or 60")
+
+    lanes = [f"Lane {lane}" if str(lane).isdigit() else str(lane) for lane in params.get("lanes") or []]
+    if any(lane not in context["LANES"] for lane in lanes):
+        raise ValueError("lanes must be lane numbers 1-6")
+
+    target_time = params.get("target_time")
+    if target_time and target_time not in context["TIME_SLOTS"]:
+        raise ValueError("target_time must be a half-hour slot like '7:00 PM'")
+
+    return {
+        "pools": pool_names,
+        "target_time": target_time,
+        "flex_minutes": int(params.get("flex_minutes", 60)),
+        "durations": durations,
+        "lanes": lanes,
+        "only_preferred_lanes": bool(params.get("only_preferred_lanes", False)),
+        "top_k": int(params.get("top_k", 5))
+    }
+
+
+def score_options(grids, date, context, target_time=None, flex_minutes=60, durations=("60 Min",),
+                  lanes=None, only_preferred_lanes=False, top_k=5):
+    """
+    Rank every bookable option in fetched availability against the preferences.
+
+    Args:
+        grids: Pool name -> AvailabilityGrid, in pool preference order
+        date: The date searched (YYYY-MM-DD)
+        context: User context (TIME_SLOTS)
+        target_time: Preferred start, e.g. "7:00 PM"; None searches the whole day
+        flex_minutes: How far from target_time an option may start
+        durations: Acceptable durations in preference order, e.g. ["60 Min", "30 Min"]
+        lanes: Lanes in preference order, e.g. ["Lane 5", "Lane 2"]
+        only_preferred_lanes: Only return options in the listed lanes
+        top_k: Number of options to return
+
+    Returns:
+        list: Options sorted best first, each with date, time_slot, duration, location, lane and score
+    """
+    lanes = list(lanes or [])
+    time_slots = context["TIME_SLOTS"]
+    target = time_slots.index(target_time) if target_time in time_slots else None
+    reach = flex_minutes // _SLOT_MINUTES
+
+    options = []
+    for pool_rank, (pool, grid) in enumerate(grids.items()):
+        short_name = context["LOCATION_SHORT_NAMES"][pool]
+        lane_ranks = {f"{short_name} {lane}": rank for rank, lane in enumerate(lanes)}
+        allowed = grid.lane_mask(lane_ranks) if only_preferred_lanes else (1 << len(grid.lanes)) - 1
+
+        for duration_rank, duration in enumerate(durations):
+            runs = grid.run_masks(slots_for_duration(duration))
+            if target is None:
+                indexes = range(len(runs))
+            else:
+                indexes = range(max(0, target - reach), min(len(runs), target + reach + 1))
+            for index in indexes:
+                mask = runs[index] & allowed
+                if not mask:
+                    continue
+                distance = abs(index - target) if target is not None else 0
+                for lane_index, lane_name in enumerate(grid.lanes):
+                    if not mask >> lane_index & 1:
+                        continue
+                    score = (distance * SLOT_SEARCH_TIME_WEIGHT
+                             + lane_ranks.get(lane_name, len(lanes)) * SLOT_SEARCH_LANE_WEIGHT
+                             + duration_rank * SLOT_SEARCH_DURATION_WEIGHT
+                             + pool_rank * SLOT_SEARCH_POOL_WEIGHT)
+                    options.append({
+                        "date": date,
+                        "time_slot": time_slots[index],
+                        "duration": duration,
+                        "location": pool,
+                        "lane": " ".join(lane_name.split()[-2:]),
+                        "score": score,
+                        "_order": (score, index, pool_rank, lane_index)
+                    })
+
+    options.sort(key=lambda option: option["_order"])
+    for option in options:
+        del option["_order"]
+    return options[:top_k]
+
+
+def search_best_slots(date, context, pools=None, target_time=None, flex_minutes=60, durations=("60 Min",),
+                      lanes=None, only_preferred_lanes=False, top_k=5):
+    """
+    Fetch availability for the date and return the top-k bookable options for the preferences.
+
+    Availability comes from the short-lived availability store when it's already
+    been fetched; scoring is local bitmask work (see score_options).
+
+    Args:
+        date: The date to search (YYYY-MM-DD)
+        context: User context
+        pools: Pool names in preference order (defaults to both pools)
+        Remaining arguments as in score_options
+
+    Returns:
+        dict with options, plus fetch_ms and search_ms timings
+    """
+    pools = pools or list(context["ITEMS"].keys())
+    top_k = max(1, min(top_k, SLOT_SEARCH_MAX_RESULTS))
+
+    started = time.perf_counter()
+    availability = get_availability_range(date, date, context, pools=pools)[date]
+    fetched = time.perf_counter()
+
+    grids = {pool: AvailabilityGrid.for_pool(availability[pool], pool, context) for pool in pools}
+    options = score_options(grids, date, context, target_time, flex_minutes, durations, lanes, only_preferred_lanes, top_k)
+    finished = time.perf_counter()
+
+    eastern = pytz.timezone('US/Eastern')
+    for option in options:
+        start = datetime.datetime.strptime(f"{date} {option['time_slot']}", "%Y-%m-%d %I:%M %p")
+        option["appointment_date_time"] = eastern.localize(start).isoformat()
+
+    search_ms = round((finished - fetched) * 1000, 2)
+    logging.info(f"🔎 Slot search on {date}: {len(options)} options in {search_ms}ms after a {round((fetched - started) * 1000)}ms fetch")
+    return {
+        "options": options,
+        "fetch_ms": round((fetched - started) * 1000, 1),
+        "search_ms": search_ms
+    }
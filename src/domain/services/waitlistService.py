@@ -0,0 +1,225 @@
+import datetime
+import logging
+import os
+import threading
+import time
+
+import pytz
+
+from src.contextManager import load_context_for_auth_entry
+from src.domain.services.availabilityService import get_availability
+from src.domain.services.bookingService import book_swim_lane_action
+from src.domain.services.availabilityGrid import AvailabilityGrid, slots_for_duration
+from src.domain.services.laneAllocatorService import slot_blocks
+from src.domain.sql.waitlistGateway import (
+    get_active_waitlist_entries, mark_waitlist_booked, update_waitlist_polls, expire_waitlist_entries
+)
+
+# Poll interval per (pool, date): time until the earliest wanted slot divided by WAITLIST_POLL_DIVISOR,
+# kept between the min and max, so polling tightens as the slot approaches
+WAITLIST_POLL_MIN_SECONDS = float(os.getenv("WAITLIST_POLL_MIN_SECONDS", "15"))
+WAITLIST_POLL_MAX_SECONDS = float(os.getenv("WAITLIST_POLL_MAX_SECONDS", "600"))
+WAITLIST_POLL_DIVISOR = float(os.getenv("WAITLIST_POLL_DIVISOR", "60"))
+# Booking attempts per entry per poll, in case a freed lane is taken again first
+WAITLIST_MAX_ATTEMPTS_PER_POLL = int(os.getenv("WAITLIST_MAX_ATTEMPTS_PER_POLL", "3"))
+
+_eastern = pytz.timezone('US/Eastern')
+
+_stats_lock = threading.Lock()
+_stats = {"cycles": 0, "polls": 0, "bookings": 0, "expired": 0, "time_to_book_ms": []}
+_MAX_LATENCY_SAMPLES = 100
+
+
+def _slot_epoch(date, time_slot):
+    """Epoch seconds of a slot's start (Eastern)."""
+    return _eastern.localize(datetime.datetime.strptime(f"{date} {time_slot}", "%Y-%m-%d %I:%M %p")).timestamp()
+
+
+def _wanted_slots(entry, time_slots):
+    """Start times in the entry's window, earliest first."""
+    start, end = _slot_epoch(entry["date"], entry["start_time"]), _slot_epoch(entry["date"], entry["end_time"])
+    return [slot for slot in time_slots if start <= _slot_epoch(entry["date"], slot) <= end]
+
+
+def poll_interval(seconds_until_slot):
+    """Seconds to wait before polling again for a slot this far away."""
+    return min(WAITLIST_POLL_MAX_SECONDS, max(WAITLIST_POLL_MIN_SECONDS, seconds_until_slot / WAITLIST_POLL_DIVISOR))
+
+
+def _try_book(entry, grid, taken, detected_at):
+    """
+    Book the entry's first matching free lane, skipping lanes another entry booked this poll.
+
+    Returns:
+        dict with lane, time_slot and time_to_book_ms, or None if nothing matched or booking failed
+    """
+    context = entry["context"]
+    short_name = context["LOCATION_SHORT_NAMES"][entry["pool"]]
+    attempts = 0
+    slots = slots_for_duration(entry["duration"])
+    for time_slot in _wanted_slots(entry, context["TIME_SLOTS"]):
+        blocks = slot_blocks(time_slot, entry["duration"])
+        for lane in entry["lanes"]:
+            lane_name = f"{short_name} {lane}"
+            needed = [(lane_name, block) for block in blocks]
+            if any(resource in taken for resource in needed):
+                continue
+            if not grid.is_free(time_slot, lane_name, slots):
+                continue
+
+            attempts += 1
+            response, status_code = book_swim_lane_action(
+                entry["date"], time_slot, entry["duration"], entry["pool"], lane, context
+            )
+            if status_code == 200:
+                taken.update(needed)
+                return {
+                    "lane": lane,
+                    "time_slot": time_slot,
+                    "time_to_book_ms": round((time.time() - detected_at) * 1000, 1)
+                }
+            logging.info(f"Waitlist: {entry['pool']} {lane} at {time_slot} on {entry['date']} "
+                         f"was taken before {entry['username']} could book it")
+            if attempts >= WAITLIST_MAX_ATTEMPTS_PER_POLL:
+                return None
+    return None
+
+
+def poll_waitlist_group(pool, date, entries):
+    """
+    Fetch availability for a (pool, date) once and book every entry it can satisfy, oldest entry first.
+
+    Returns:
+        list: (entry, booking) pairs for the entries that were booked
+    """
+    context = entries[0]["context"]
+    availability = get_availability(context["ITEMS"][pool], date, context)
+    detected_at = time.time()
+    with _stats_lock:
+        _stats["polls"] += 1
+    for entry in entries:
+        entry["polls"] += 1
+    if not availability:
+        return []
+    grid = AvailabilityGrid.for_pool(availability, pool, context)
+
+    booked = []
+    taken = set()
+    for entry in entries:
+        try:
+            booking = _try_book(entry, grid, taken, detected_at)
+        except Exception as e:
+            logging.error(f"Waitlist: error booking entry {entry['id']} for {entry['username']}: {e}")
+            continue
+        if not booking:
+            continue
+
+        logging.info(f"⏱️ Waitlist: booked {pool} {booking['lane']} at {booking['time_slot']} on {date} "
+                     f"for {entry['username']} {booking['time_to_book_ms']}ms after it freed up")
+        try:
+            mark_waitlist_booked(entry["id"], booking["lane"], booking["time_slot"], booking["time_to_book_ms"], entry["polls"])
+        except Exception as e:
+            logging.error(f"Waitlist: failed to record booking for entry {entry['id']}: {e}")
+        with _stats_lock:
+            _stats["bookings"] += 1
+            _stats["time_to_book_ms"] = (_stats["time_to_book_ms"] + [booking["time_to_book_ms"]])[-_MAX_LATENCY_SAMPLES:]
+        booked.append((entry, booking))
+    return booked
+
+
+def _load_entries(now):
+    """Read active entries, expiring those whose window has passed and skipping users who can't be booked."""
+    entries, expired = [], []
+    for entry in get_active_waitlist_entries():
+        if _slot_epoch(entry["date"], entry["end_time"]) < now:
+            expired.append(entry["id"])
+        elif entry["is_enabled"] and entry["mac_password"]:
+            entry["context"] = load_context_for_auth_entry(entry, entry["mac_password"])
+            entries.append(entry)
+    if expired:
+        expire_waitlist_entries(expired)
+        with _stats_lock:
+            _stats["expired"] += len(expired)
+        logging.info(f"Waitlist: expired {len(expired)} entries")
+    return entries
+
+
+def _group_key(pool, date):
+    return f"{pool}|{date}"
+
+
+def run_waitlist_cycle(next_poll=None):
+    """
+    Poll each (pool, date) group that is due once and book the entries it can satisfy.
+
+    Groups cost one availability request per poll however many users wait on them,
+    and each group is due again after its own adaptive interval (see poll_interval).
+    A cycle is short so the caller can re-queue the next one instead of holding a
+    worker between polls.
+
+    Args:
+        next_poll: "pool|date" -> epoch seconds the group is next due, from the previous cycle
+
+    Returns:
+        dict: polls made, bookings made (username, entry id, pool, date, lane, time slot, time_to_book_ms),
+        next_poll for the next cycle, and next_run_in (seconds until a group is due; None when no entries are active)
+    """
+    next_poll = dict(next_poll or {})
+    with _stats_lock:
+        _stats["cycles"] += 1
+
+    entries = _load_entries(time.time())
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry["pool"], entry["date"]), []).append(entry)
+
+    bookings = []
+    polls = 0
+    polled = []
+    for (pool, date), group in groups.items():
+        key = _group_key(pool, date)
+        if next_poll.get(key, 0) > time.time():
+            continue
+        booked = poll_waitlist_group(pool, date, group)
+        polls += 1
+        polled.extend(group)
+        for entry, booking in booked:
+            bookings.append({
+                "username": entry["username"],
+                "entry_id": entry["id"],
+                "pool": pool,
+                "date": date,
+                **booking
+            })
+        booked_ids = {entry["id"] for entry, _ in booked}
+        waiting = [entry for entry in group if entry["id"] not in booked_ids]
+        if waiting:
+            earliest = min(_slot_epoch(entry["date"], entry["start_time"]) for entry in waiting)
+            next_poll[key] = time.time() + poll_interval(max(0, earliest - time.time()))
+        else:
+            next_poll.pop(key, None)
+
+    update_waitlist_polls({entry["id"]: entry["polls"] for entry in polled})
+
+    # Groups that were booked out, cancelled or expired don't need polling
+    active_keys = {_group_key(pool, date) for pool, date in groups}
+    next_poll = {key: due for key, due in next_poll.items() if key in active_keys}
+    next_run_in = max(0, min(next_poll.values()) - time.time()) if next_poll else None
+
+    logging.info(f"Waitlist cycle: {polls} polls, {len(bookings)} bookings"
+                 f"{'' if next_poll else '; no entries left to watch'}")
+    return {"polls": polls, "bookings": bookings, "next_poll": next_poll, "next_run_in": next_run_in}
+
+
+def get_waitlist_stats():
+    """Watcher counters and time-to-book latency since process start."""
+    with _stats_lock:
+        latencies = list(_stats["time_to_book_ms"])
+        stats = {key: value for key, value in _stats.items() if key != "time_to_book_ms"}
+    if latencies:
+        stats["time_to_book_ms"] = {
+            "avg": round(sum(latencies) / len(latencies), 1),
+            "max": max(latencies),
+            "last": latencies[-1]
+        }
+    return stats
@@ -0,0 +1,173 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+import psycopg2.pool
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+DB_POOL_MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN_CONNECTIONS", "1"))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "10"))
+# How long a checkout waits for a free connection before failing
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT_SECONDS", "10"))
+# Connections idle longer than this are pinged before being handed out
+DB_POOL_HEALTH_CHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_HEALTH_CHECK_IDLE_SECONDS", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool shared by every SQL gateway.
+
+    Wraps psycopg2's ThreadedConnectionPool with a semaphore so callers wait for
+    a free connection instead of failing when all maxconn are checked out.
+    Idle connections are health-checked before reuse and broken ones replaced.
+    """
+
+    def __init__(self, dsn: str, minconn: int = DB_POOL_MIN_CONNECTIONS,
+                 maxconn: int = DB_POOL_MAX_CONNECTIONS,
+                 checkout_timeout: float = DB_POOL_CHECKOUT_TIMEOUT_SECONDS):
+        self.minconn = max(minconn, 0)
+        self.maxconn = max(maxconn, 1)
+        self.checkout_timeout = checkout_timeout
+        self.pid = os.getpid()
+        self._pool = psycopg2.pool.ThreadedConnectionPool(self.minconn, self.maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.replaced = 0
+        self.total_wait_seconds = 0.0
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        Check out a connection for one transaction.
+
+        Commits when the block exits normally and rolls back on error, then
+        returns the connection to the pool.
+        """
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.checkout_timeout}s")
+        waited = time.monotonic() - start
+
+        conn = None
+        try:
+            conn = self._checkout()
+            with self._lock:
+                self.checkouts += 1
+                self.in_use += 1
+                self.peak_in_use = max(self.peak_in_use, self.in_use)
+                if waited > 0.001:
+                    self.waits += 1
+                    self.total_wait_seconds += waited
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self.in_use -= 1
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def cursor(self):
+        """Check out a connection and yield a cursor on it."""
+        with self.connection() as conn, conn.cursor() as cur:
+            yield cur
+
+    def _checkout(self):
+        """Get a connection from the pool, replacing it if it has gone bad while idle."""
+        conn = self._pool.getconn()
+        idle = time.monotonic() - self._last_used.get(id(conn), 0)
+        if conn.closed or idle > DB_POOL_HEALTH_CHECK_IDLE_SECONDS:
+            try:
+                if conn.closed:
+                    raise psycopg2.InterfaceError("connection already closed")
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error as e:
+                logging.warning(f"Replacing unhealthy database connection: {e}")
+                self._last_used.pop(id(conn), None)
+                self._pool.putconn(conn, close=True)
+                with self._lock:
+                    self.replaced += 1
+                conn = self._pool.getconn()
+        return conn
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min_connections": self.minconn,
+                "max_connections": self.maxconn,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "idle": len(self._pool._pool),
+                "checkouts": self.checkouts,
+                "checkouts_waited": self.waits,
+                "avg_wait_ms": round(self.total_wait_seconds / self.waits * 1000, 2) if self.waits else 0.0,
+                "timeouts": self.timeouts,
+                "replaced_connections": self.replaced,
+            }
+
+    def close(self):
+        self._pool.closeall()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool, creating it on first use."""
+    global _pool
+    # Connections must not be shared across fork (gunicorn/Celery workers), so each process gets its own pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool(DATABASE_URL)
+                logging.info(f"Created database connection pool (min={_pool.minconn}, max={_pool.maxconn})")
+    return _pool
+
+
+def get_db_connection():
+    """Context-managed connection checkout from the shared pool."""
+    return get_pool().connection()
+
+
+def get_db_cursor():
+    """Context-managed cursor on a connection from the shared pool."""
+    return get_pool().cursor()
+
+
+def get_pool_stats():
+    """Usage metrics for the shared pool, or None if it hasn't been created."""
+    return _pool.stats() if _pool is not None else None
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -1,13 +1,13 @@
-import psycopg2
-import os
 import logging
 import datetime
 import pytz
+from psycopg2.extras import Json
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+from src.domain.sql.connectionPool import get_db_connection
+from src.domain.services.bookingPreferenceCompiler import resolve_booking_plan
+
+_DAYS_OF_WEEK = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
 
-def get_db_connection():
-    return psycopg2.connect(DATABASE_URL)
 
 def add_or_update_schedule(username, schedule):
     """
@@ -25,6 +25,12 @@ def add_or_update_schedule(username, schedule):
         "saturday": "Look for availability and book any outdoor lane for 45 minutes around 8 AM on {date}",
         "sunday": None
     }
+    
+    Each command is compiled into a structured booking plan (see bookingPreferenceCompiler)
+    and stored alongside it, so auto-booking doesn't re-interpret the text every night.
+    
+    Returns:
+        dict: The compiled plan per day; None for days without a command or whose command couldn't be compiled
     """
     # Extract command strings for each day
     monday_command = schedule.get("monday")
@@ -35,48 +41,53 @@ def add_or_update_schedule(username, schedule):
     saturday_command = schedule.get("saturday")
     sunday_command = schedule.get("sunday")
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO swim_lane_schedule (
-            username, monday_command, tuesday_command, wednesday_command,
-            thursday_command, friday_command, saturday_command, sunday_command
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (username) DO UPDATE SET
-            monday_command = EXCLUDED.monday_command,
-            tuesday_command = EXCLUDED.tuesday_command,
-            wednesday_command = EXCLUDED.wednesday_command,
-            thursday_command = EXCLUDED.thursday_command,
-            friday_command = EXCLUDED.friday_command,
-            saturday_command = EXCLUDED.saturday_command,
-            sunday_command = EXCLUDED.sunday_command,
-            updated_at = CURRENT_TIMESTAMP;
-    """, (
-        username,
-        monday_command,
-        tuesday_command,
-        wednesday_command,
-        thursday_command,
-        friday_command,
-        saturday_command,
-        sunday_command
-    ))
-    conn.commit()
-    conn.close()
+    # Compiled once here; each plan keeps its source command so stale plans are detectable
+    plans = {day: resolve_booking_plan(schedule.get(day)) for day in _DAYS_OF_WEEK}
+    
+    _ensure_work_list_schema()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO swim_lane_schedule (
+                username, monday_command, tuesday_command, wednesday_command,
+                thursday_command, friday_command, saturday_command, sunday_command,
+                booking_plans
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (username) DO UPDATE SET
+                monday_command = EXCLUDED.monday_command,
+                tuesday_command = EXCLUDED.tuesday_command,
+                wednesday_command = EXCLUDED.wednesday_command,
+                thursday_command = EXCLUDED.thursday_command,
+                friday_command = EXCLUDED.friday_command,
+                saturday_command = EXCLUDED.saturday_command,
+                sunday_command = EXCLUDED.sunday_command,
+                booking_plans = EXCLUDED.booking_plans,
+                updated_at = CURRENT_TIMESTAMP;
+        """, (
+            username,
+            monday_command,
+            tuesday_command,
+            wednesday_command,
+            thursday_command,
+            friday_command,
+            saturday_command,
+            sunday_command,
+            Json({day: plan for day, plan in plans.items() if plan})
+        ))
+    return plans
 
 def get_schedule(username):
     """Retrieve the swim lane schedule for a specific user."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT monday_command, tuesday_command, wednesday_command,
-               thursday_command, friday_command, saturday_command, sunday_command
-        FROM swim_lane_schedule
-        WHERE username = %s;
-    """, (username,))
-    result = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT monday_command, tuesday_command, wednesday_command,
+                   thursday_command, friday_command, saturday_command, sunday_command
+            FROM swim_lane_schedule
+            WHERE username = %s;
+        """, (username,))
+        result = cursor.fetchone()
     if result:
         return {
             "monday": result[0] if result[0] else None,
@@ -91,15 +102,14 @@ def get_schedule(username):
 
 def get_all_active_schedules():
     """Retrieve all active swim lane schedules."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT username, monday_command, tuesday_command, wednesday_command,
-               thursday_command, friday_command, saturday_command, sunday_command
-        FROM swim_lane_schedule;
-    """)
-    results = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT username, monday_command, tuesday_command, wednesday_command,
+                   thursday_command, friday_command, saturday_command, sunday_command
+            FROM swim_lane_schedule;
+        """)
+        results = cursor.fetchall()
     
     schedules = []
     for row in results:
@@ -120,15 +130,13 @@ def get_all_active_schedules():
 
 def delete_schedule(username):
     """Delete a user's swim lane schedule."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        DELETE FROM swim_lane_schedule
-        WHERE username = %s;
-    """, (username,))
-    rows_deleted = cursor.rowcount
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM swim_lane_schedule
+            WHERE username = %s;
+        """, (username,))
+        rows_deleted = cursor.rowcount
     return rows_deleted > 0
 
 def update_last_success(username, day_of_week):
@@ -142,22 +150,20 @@ def update_last_success(username, day_of_week):
     """
     column_name = f"{day_of_week}_last_success"
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"""
-            UPDATE swim_lane_schedule
-            SET {column_name} = CURRENT_TIMESTAMP
-            WHERE username = %s;
-        """, (username,))
-        conn.commit()
-        logging.info(f"Updated {column_name} for user {username}")
-    except Exception as e:
-        logging.error(f"Failed to update {column_name} for user {username}: {e}")
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                UPDATE swim_lane_schedule
+                SET {column_name} = CURRENT_TIMESTAMP
+                WHERE username = %s;
+            """, (username,))
+            logging.info(f"Updated {column_name} for user {username}")
+        except Exception as e:
+            logging.error(f"Failed to update {column_name} for user {username}: {e}")
+            raise
+        finally:
+            cursor.close()
 
 def should_run_booking(username, day_of_week, cutoff_time=None):
     """
@@ -182,64 +188,62 @@ def should_run_booking(username, day_of_week, cutoff_time=None):
         cutoff_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
         logging.info(f"Using cutoff time: {cutoff_time} for {day_of_week} booking check")
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"""
-            SELECT {column_name}
-            FROM swim_lane_schedule
-            WHERE username = %s;
-        """, (username,))
-        result = cursor.fetchone()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT {column_name}
+                FROM swim_lane_schedule
+                WHERE username = %s;
+            """, (username,))
+            result = cursor.fetchone()
         
-        if result and result[0]:
-            last_success = result[0]
-            # Make last_success timezone-aware if it isn't already
-            if last_success.tzinfo is None:
-                # Assume database timestamps are in UTC
-                last_success = pytz.utc.localize(last_success)
+            if result and result[0]:
+                last_success = result[0]
+                # Make last_success timezone-aware if it isn't already
+                if last_success.tzinfo is None:
+                    # Assume database timestamps are in UTC
+                    last_success = pytz.utc.localize(last_success)
             
-            # Convert cutoff_time to UTC for comparison if needed
-            if cutoff_time.tzinfo is not None:
-                cutoff_time_utc = cutoff_time.astimezone(pytz.utc)
-            else:
-                cutoff_time_utc = cutoff_time
+                # Convert cutoff_time to UTC for comparison if needed
+                if cutoff_time.tzinfo is not None:
+                    cutoff_time_utc = cutoff_time.astimezone(pytz.utc)
+                else:
+                    cutoff_time_utc = cutoff_time
             
-            # If last success was after the cutoff time, don't run again
-            if last_success > cutoff_time_utc:
-                logging.info(f"Skipping {username} on {day_of_week} - already ran successfully at {last_success} (after cutoff {cutoff_time_utc})")
-                return False
-            else:
-                logging.info(f"Allowing {username} on {day_of_week} - last success {last_success} was before cutoff {cutoff_time_utc}")
+                # If last success was after the cutoff time, don't run again
+                if last_success > cutoff_time_utc:
+                    logging.info(f"Skipping {username} on {day_of_week} - already ran successfully at {last_success} (after cutoff {cutoff_time_utc})")
+                    return False
+                else:
+                    logging.info(f"Allowing {username} on {day_of_week} - last success {last_success} was before cutoff {cutoff_time_utc}")
         
-        # No last success recorded or it was before cutoff time
-        return True
+            # No last success recorded or it was before cutoff time
+            return True
         
-    except Exception as e:
-        logging.error(f"Error checking last success for {username} on {day_of_week}: {e}")
-        # On error, allow the booking to proceed
-        return True
-    finally:
-        cursor.close()
-        conn.close()
+        except Exception as e:
+            logging.error(f"Error checking last success for {username} on {day_of_week}: {e}")
+            # On error, allow the booking to proceed
+            return True
+        finally:
+            cursor.close()
 
 def get_schedules_with_last_success():
     """
     Retrieve all active swim lane schedules with their last success timestamps.
     This is useful for admin monitoring.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT username, 
-               monday_command, tuesday_command, wednesday_command,
-               thursday_command, friday_command, saturday_command, sunday_command,
-               monday_last_success, tuesday_last_success, wednesday_last_success,
-               thursday_last_success, friday_last_success, saturday_last_success, sunday_last_success
-        FROM swim_lane_schedule;
-    """)
-    results = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT username, 
+                   monday_command, tuesday_command, wednesday_command,
+                   thursday_command, friday_command, saturday_command, sunday_command,
+                   monday_last_success, tuesday_last_success, wednesday_last_success,
+                   thursday_last_success, friday_last_success, saturday_last_success, sunday_last_success
+            FROM swim_lane_schedule;
+        """)
+        results = cursor.fetchall()
     
     schedules = []
     for row in results:
@@ -263,4 +267,94 @@ def get_schedules_with_last_success():
         }
         schedules.append(schedule)
     
-    return schedules
\ No newline at end of file
+    return schedules
+
+_work_list_indexes_ready = False
+
+def ensure_auto_booking_indexes():
+    """
+    Create the booking_plans column and the indexes behind get_auto_booking_work_list.
+    One partial covering index per day holds the command and last-success columns
+    for users with a command that day; auth_data is covered by username.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("ALTER TABLE swim_lane_schedule ADD COLUMN IF NOT EXISTS booking_plans JSONB;")
+        for day in _DAYS_OF_WEEK:
+            cursor.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx_schedule_{day}_work
+                ON swim_lane_schedule (username) INCLUDE ({day}_command, {day}_last_success)
+                WHERE {day}_command IS NOT NULL;
+            """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_auth_data_booking
+            ON auth_data (username) INCLUDE (api_key, mac_password, customer_id, alt_customer_id, is_enabled, is_admin);
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_auth_data_api_key ON auth_data (api_key);")
+
+def _ensure_work_list_schema():
+    """Run ensure_auto_booking_indexes once per process."""
+    global _work_list_indexes_ready
+    if _work_list_indexes_ready:
+        return
+    try:
+        ensure_auto_booking_indexes()
+    except Exception as e:
+        logging.warning(f"Could not create auto-booking indexes: {e}")
+    _work_list_indexes_ready = True
+
+def get_auto_booking_work_list(day_of_week, cutoff_time=None):
+    """
+    Get every user with a booking command for a day, joined with their auth data, in one query.
+    
+    Args:
+        day_of_week: The day being booked (e.g., 'monday')
+        cutoff_time: Bookings that succeeded after this time are marked completed.
+            Defaults to midnight Eastern of the current day, as in should_run_booking.
+    
+    Returns:
+        list: Dicts with username, command, plan (the compiled booking plan, or None),
+        api_key, mac_password, customer_id, alt_customer_id, is_enabled, is_admin
+        and already_completed, ordered by username
+    """
+    if day_of_week not in _DAYS_OF_WEEK:
+        raise ValueError(f"Invalid day of week: {day_of_week}")
+    
+    if cutoff_time is None:
+        eastern = pytz.timezone('US/Eastern')
+        cutoff_time = datetime.datetime.now(eastern).replace(hour=0, minute=0, second=0, microsecond=0)
+    if cutoff_time.tzinfo is not None:
+        cutoff_time = cutoff_time.astimezone(pytz.utc)
+    
+    _ensure_work_list_schema()
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT s.username, s.{day_of_week}_command,
+                   a.api_key, a.mac_password, a.customer_id, a.alt_customer_id, a.is_enabled, a.is_admin,
+                   COALESCE(s.{day_of_week}_last_success > %s, FALSE) AS already_completed,
+                   s.booking_plans -> %s
+            FROM swim_lane_schedule s
+            LEFT JOIN auth_data a ON a.username = s.username
+            WHERE s.{day_of_week}_command IS NOT NULL AND s.{day_of_week}_command <> ''
+            ORDER BY s.username;
+        """, (cutoff_time, day_of_week))
+        rows = cursor.fetchall()
+    
+    return [
+        {
+            "username": row[0],
+            "command": row[1],
+            "api_key": row[2],
+            "mac_password": row[3],
+            "customer_id": row[4],
+            "alt_customer_id": row[5],
+            "is_enabled": bool(row[6]),
+            "is_admin": bool(row[7]),
+            "already_completed": row[8],
+            # Schedules saved before plans were stored, or with an outdated plan, compile here
+            "plan": resolve_booking_plan(row[1], row[9])
+        }
+        for row in rows
+    ]
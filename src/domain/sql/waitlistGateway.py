@@ -0,0 +1,190 @@
+import logging
+
+from psycopg2.extras import Json
+
+from src.domain.sql.connectionPool import get_db_connection
+
+_waitlist_table_ready = False
+
+_ENTRY_COLUMNS = """
+    w.id, w.username, w.pool, w.date, w.start_time, w.end_time, w.duration, w.lanes, w.status,
+    w.created_at, w.booked_at, w.booked_lane, w.booked_time, w.time_to_book_ms, w.polls
+"""
+
+def ensure_waitlist_table():
+    """Create the waitlist table and the index the watcher reads active entries through."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS swim_lane_waitlist (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) NOT NULL,
+                pool VARCHAR(32) NOT NULL,
+                date DATE NOT NULL,
+                start_time VARCHAR(16) NOT NULL,
+                end_time VARCHAR(16) NOT NULL,
+                duration VARCHAR(16) NOT NULL,
+                lanes JSONB NOT NULL,
+                status VARCHAR(16) NOT NULL DEFAULT 'active',
+                created_at TIMESTAMP DEFAULT NOW(),
+                booked_at TIMESTAMP,
+                booked_lane VARCHAR(32),
+                booked_time VARCHAR(16),
+                time_to_book_ms REAL,
+                polls INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_waitlist_active
+            ON swim_lane_waitlist (date, pool) WHERE status = 'active';
+        """)
+
+def _ensure_table():
+    """Run ensure_waitlist_table once per process."""
+    global _waitlist_table_ready
+    if _waitlist_table_ready:
+        return
+    try:
+        ensure_waitlist_table()
+    except Exception as e:
+        logging.warning(f"Could not create waitlist table: {e}")
+    _waitlist_table_ready = True
+
+def _entry_from_row(row):
+    return {
+        "id": row[0],
+        "username": row[1],
+        "pool": row[2],
+        "date": row[3].strftime("%Y-%m-%d"),
+        "start_time": row[4],
+        "end_time": row[5],
+        "duration": row[6],
+        "lanes": row[7],
+        "status": row[8],
+        "created_at": row[9].isoformat() if row[9] else None,
+        "booked_at": row[10].isoformat() if row[10] else None,
+        "booked_lane": row[11],
+        "booked_time": row[12],
+        "time_to_book_ms": row[13],
+        "polls": row[14]
+    }
+
+def add_waitlist_entry(username, pool, date, start_time, end_time, duration, lanes):
+    """
+    Register a slot a user wants booked as soon as it frees up.
+
+    Args:
+        username: The user to book for
+        pool: "Indoor Pool" or "Outdoor Pool"
+        date: Date as YYYY-MM-DD
+        start_time: Earliest acceptable start, e.g. "7:00 PM"
+        end_time: Latest acceptable start, e.g. "8:00 PM"
+        duration: "30 Min" or "60 Min"
+        lanes: Acceptable lanes in preference order, e.g. ["Lane 5", "Lane 2"]
+
+    Returns:
+        int: The new entry's id
+    """
+    _ensure_table()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO swim_lane_waitlist (username, pool, date, start_time, end_time, duration, lanes)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING id;
+        """, (username, pool, date, start_time, end_time, duration, Json(lanes)))
+        return cursor.fetchone()[0]
+
+def get_waitlist_entries(username):
+    """Get a user's waitlist entries, newest first."""
+    _ensure_table()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {_ENTRY_COLUMNS}
+            FROM swim_lane_waitlist w
+            WHERE w.username = %s
+            ORDER BY w.created_at DESC;
+        """, (username,))
+        rows = cursor.fetchall()
+    return [_entry_from_row(row) for row in rows]
+
+def get_active_waitlist_entries():
+    """
+    Get every active waitlist entry with the user's auth data, oldest first (first come, first served).
+
+    Returns:
+        list: Entry dicts, plus api_key, mac_password, customer_id, alt_customer_id, is_enabled and is_admin
+    """
+    _ensure_table()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {_ENTRY_COLUMNS},
+                   a.api_key, a.mac_password, a.customer_id, a.alt_customer_id, a.is_enabled, a.is_admin
+            FROM swim_lane_waitlist w
+            JOIN auth_data a ON a.username = w.username
+            WHERE w.status = 'active'
+            ORDER BY w.created_at, w.id;
+        """)
+        rows = cursor.fetchall()
+
+    entries = []
+    for row in rows:
+        entry = _entry_from_row(row)
+        entry.update({
+            "api_key": row[15],
+            "mac_password": row[16],
+            "customer_id": row[17],
+            "alt_customer_id": row[18],
+            "is_enabled": bool(row[19]),
+            "is_admin": bool(row[20])
+        })
+        entries.append(entry)
+    return entries
+
+def cancel_waitlist_entry(username, entry_id):
+    """Cancel one of a user's active waitlist entries. Returns True if an entry was cancelled."""
+    _ensure_table()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE swim_lane_waitlist
+            SET status = 'cancelled'
+            WHERE id = %s AND username = %s AND status = 'active';
+        """, (entry_id, username))
+        return cursor.rowcount > 0
+
+def mark_waitlist_booked(entry_id, lane, time_slot, time_to_book_ms, polls):
+    """Record that the watcher booked an entry and how long it took once the lane freed up."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE swim_lane_waitlist
+            SET status = 'booked', booked_at = NOW(), booked_lane = %s, booked_time = %s,
+                time_to_book_ms = %s, polls = %s
+            WHERE id = %s;
+        """, (lane, time_slot, time_to_book_ms, polls, entry_id))
+
+def update_waitlist_polls(poll_counts):
+    """Persist the watcher's poll counts. poll_counts maps entry id -> polls so far."""
+    if not poll_counts:
+        return
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "UPDATE swim_lane_waitlist SET polls = %s WHERE id = %s;",
+            [(polls, entry_id) for entry_id, polls in poll_counts.items()]
+        )
+
+def expire_waitlist_entries(entry_ids):
+    """Mark entries whose window has passed as expired."""
+    if not entry_ids:
+        return
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE swim_lane_waitlist
+            SET status = 'expired'
+            WHERE id = ANY(%s) AND status = 'active';
+        """, (list(entry_ids),))
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+# Authenticated contexts are reused for this long; invalidation is per process,
+# so this also bounds how long other workers can serve a stale entry
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+# Unknown API keys are remembered for a shorter time
+AUTH_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1000"))
+
+_entries: "OrderedDict[str, tuple]" = OrderedDict()
+_keys_by_username: Dict[str, Set[str]] = {}
+_inflight: Dict[str, threading.Event] = {}
+_lock = threading.Lock()
+# Bumped by every invalidation so loads that started before it are not cached
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+
+def _hash_api_key(api_key: str) -> str:
+    # Raw API keys are never kept in memory as dict keys
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def get_cached_auth_context(api_key: Optional[str],
+                            loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Get the per-user context for an API key, loading it on a miss.
+
+    Concurrent misses for the same key wait for a single loader call.
+
+    Args:
+        api_key: API key from the request
+        loader: Builds the context for an API key, or returns None if the key is unknown
+
+    Returns:
+        The cached context (shared, do not mutate) or None
+    """
+    if not api_key:
+        return None
+    key_hash = _hash_api_key(api_key)
+
+    while True:
+        with _lock:
+            entry = _entries.get(key_hash)
+            if entry is not None and entry[1] > time.monotonic():
+                _entries.move_to_end(key_hash)
+                _stats["hits"] += 1
+                return entry[0]
+            waiter = _inflight.get(key_hash)
+            if waiter is None:
+                _stats["misses"] += 1
+                done = _inflight[key_hash] = threading.Event()
+                generation = _generation
+                break
+            _stats["coalesced"] += 1
+        # Another request is loading this key; use its result (or retry if it failed)
+        waiter.wait()
+
+    try:
+        context = loader(api_key)
+        with _lock:
+            if generation == _generation:
+                _store(key_hash, context)
+        return context
+    finally:
+        with _lock:
+            _inflight.pop(key_hash, None)
+        done.set()
+
+
+def _store(key_hash: str, context: Optional[Dict[str, Any]]):
+    ttl = AUTH_CACHE_TTL_SECONDS if context else AUTH_CACHE_NEGATIVE_TTL_SECONDS
+    _entries[key_hash] = (context, time.monotonic() + ttl)
+    _entries.move_to_end(key_hash)
+    if context and context.get("USERNAME"):
+        _keys_by_username.setdefault(context["USERNAME"], set()).add(key_hash)
+    while len(_entries) > AUTH_CACHE_MAX_ENTRIES:
+        evicted_hash, (evicted, _) = _entries.popitem(last=False)
+        if evicted and evicted.get("USERNAME") in _keys_by_username:
+            _keys_by_username[evicted["USERNAME"]].discard(evicted_hash)
+
+
+def invalidate_user(username: str, api_key: Optional[str] = None):
+    """
+    Drop cached contexts for a user after their auth row changes.
+
+    Args:
+        username: User whose cached contexts are dropped
+        api_key: Optional new API key, dropping a cached "unknown key" entry for it
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        _stats["invalidations"] += 1
+        hashes = _keys_by_username.pop(username, set())
+        if api_key:
+            hashes.add(_hash_api_key(api_key))
+        for key_hash in hashes:
+            _entries.pop(key_hash, None)
+    logging.debug(f"Invalidated cached auth for {username}")
+
+
+def clear_auth_cache():
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+        _keys_by_username.clear()
+
+
+def get_auth_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            "entries": len(_entries),
+            "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+            **_stats,
+        }
@@ -0,0 +1,175 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+# Pooled transport shared by every OpenAI call in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+# The SDK retries 408/409/429/5xx and connection errors with exponential backoff,
+# waiting for the Retry-After / retry-after-ms headers when the API sends them
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+
+# Maximum concurrent in-flight requests per endpoint
+ENDPOINT_CONCURRENCY = {
+    "chat": int(os.getenv("OPENAI_CHAT_CONCURRENCY", "8")),
+    "embeddings": int(os.getenv("OPENAI_EMBEDDINGS_CONCURRENCY", "4")),
+}
+
+_client = None
+_async_clients = {}
+_client_lock = threading.Lock()
+
+
+class EndpointLimiter:
+    """
+    Concurrency limit and saturation metrics for one OpenAI endpoint.
+
+    Sync callers share a BoundedSemaphore; async callers get an asyncio.Semaphore
+    per event loop with the same limit. Metrics are shared across both.
+    """
+
+    def __init__(self, endpoint: str, limit: int):
+        self.endpoint = endpoint
+        self.limit = max(limit, 1)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._async_semaphores = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Hold one of the endpoint's concurrency slots for a sync call."""
+        start = time.monotonic()
+        self._semaphore.acquire()
+        self._on_acquire(time.monotonic() - start)
+        try:
+            yield
+        except Exception as e:
+            self._on_error(e)
+            raise
+        finally:
+            self._on_release()
+            self._semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        """Hold one of the endpoint's concurrency slots for an async call."""
+        loop_id = id(asyncio.get_running_loop())
+        semaphore = self._async_semaphores.get(loop_id)
+        if semaphore is None:
+            semaphore = self._async_semaphores.setdefault(loop_id, asyncio.Semaphore(self.limit))
+
+        start = time.monotonic()
+        async with semaphore:
+            self._on_acquire(time.monotonic() - start)
+            try:
+                yield
+            except Exception as e:
+                self._on_error(e)
+                raise
+            finally:
+                self._on_release()
+
+    def _on_acquire(self, wait_seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if wait_seconds > 0.001:
+                self.waited += 1
+                self.total_wait_seconds += wait_seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        if wait_seconds > 1:
+            logging.warning(f"⏳ OpenAI {self.endpoint} limiter saturated, waited {wait_seconds:.2f}s for a slot")
+
+    def _on_release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _on_error(self, error: Exception):
+        with self._lock:
+            self.errors += 1
+            if getattr(error, "status_code", None) == 429:
+                self.rate_limited += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "saturation": round(self.in_flight / self.limit, 2),
+                "calls": self.calls,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "calls_waited": self.waited,
+                "avg_wait_seconds": round(self.total_wait_seconds / self.waited, 3) if self.waited else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+            }
+
+
+_limiters = {endpoint: EndpointLimiter(endpoint, limit) for endpoint, limit in ENDPOINT_CONCURRENCY.items()}
+
+
+def _client_options() -> Dict[str, Any]:
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "max_retries": OPENAI_MAX_RETRIES,
+        "timeout": httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+    }
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS)
+
+
+def get_openai_client() -> OpenAI:
+    """Get the process-wide OpenAI client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(http_client=httpx.Client(limits=_limits()), **_client_options())
+                logging.info(f"Created shared OpenAI client (max_connections={OPENAI_MAX_CONNECTIONS}, "
+                             f"max_retries={OPENAI_MAX_RETRIES})")
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client for the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    client = _async_clients.get(loop_id)
+    if client is None:
+        client = AsyncOpenAI(http_client=httpx.AsyncClient(limits=_limits()), **_client_options())
+        _async_clients[loop_id] = client
+    return client
+
+
+def openai_call_slot(endpoint: str):
+    """Context manager limiting concurrent sync calls to an endpoint ("chat" or "embeddings")."""
+    return _limiters[endpoint].slot()
+
+
+def async_openai_call_slot(endpoint: str):
+    """Async context manager limiting concurrent async calls to an endpoint."""
+    return _limiters[endpoint].async_slot()
+
+
+def get_openai_metrics() -> Dict[str, Dict[str, Any]]:
+    """Saturation metrics per OpenAI endpoint."""
+    return {endpoint: limiter.snapshot() for endpoint, limiter in _limiters.items()}
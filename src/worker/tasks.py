@@ -1,5 +1,7 @@
+import datetime
 import os
 import sys
+import time
 from celery import Celery
 from dotenv import load_dotenv
 import ssl
@@ -227,5 +229,157 @@ def run_auto_booking(self):
         )
         raise
 
+# A launcher queued more than this before its launch time re-queues itself instead of sleeping in the worker
+LAUNCHER_REQUEUE_MIN_SECONDS = int(os.getenv('LAUNCHER_REQUEUE_MIN_SECONDS', '60'))
+# Longest single re-queue; the broker redelivers tasks held past its visibility_timeout
+LAUNCHER_MAX_ETA_SECONDS = int(os.getenv('LAUNCHER_MAX_ETA_SECONDS', '1800'))
+
+@celery_app.task(bind=True, name='launch_booking_window')
+def launch_booking_window_task(self):
+    """
+    Celery task that prepares bookings T-minus BOOKING_LAUNCH_LEAD_SECONDS and fires them at window open.
+    Queue it a few minutes before 9 PM Eastern so the worker's broker polling delay is absorbed.
+    Queued earlier, it re-queues itself for the launch time so it doesn't hold the worker until then.
+    """
+    try:
+        from src.domain.services.bookingLauncherService import launch_booking_window, get_launch_time
+        
+        launch_at = get_launch_time()
+        seconds_early = launch_at.timestamp() - time.time()
+        if seconds_early > LAUNCHER_REQUEUE_MIN_SECONDS:
+            eta = min(launch_at, datetime.datetime.now(datetime.timezone.utc)
+                      + datetime.timedelta(seconds=LAUNCHER_MAX_ETA_SECONDS))
+            self.apply_async(eta=eta)
+            logger.info(f"Booking window launcher queued {seconds_early:.0f}s early, re-queued for {eta.isoformat()}")
+            return {
+                'status': 'RESCHEDULED',
+                'message': f'Launch time is {launch_at.isoformat()}; re-queued for {eta.isoformat()}',
+                'eta': eta.isoformat()
+            }
+        
+        self.update_state(
+            state='PROGRESS',
+            meta={'status': 'Preparing bookings for window open...'}
+        )
+        
+        results = launch_booking_window()
+        
+        successful = len([r for r in results if r.get("status") == "success"])
+        failed = len([r for r in results if r.get("status") == "error"])
+        
+        return {
+            'status': 'SUCCESS',
+            'message': f'Booking window launch completed: {successful} successful, {failed} failed',
+            'results': results,
+            'summary': {
+                'total_processed': len(results),
+                'successful': successful,
+                'failed': failed
+            }
+        }
+        
+    except Exception as e:
+        self.update_state(
+            state='FAILURE',
+            meta={'status': 'FAILURE', 'error': str(e)}
+        )
+        raise
+
+# Only one waitlist watcher chain runs at a time; this key holds the running chain's id
+WAITLIST_CHAIN_KEY = 'waitlist_watcher:chain'
+# The key outlives the next cycle's countdown by this much, covering broker polling and queued tasks
+WAITLIST_CHAIN_GRACE_SECONDS = int(os.getenv('WAITLIST_CHAIN_GRACE_SECONDS', '600'))
+
+def _waitlist_chain_client():
+    """Redis client of the result backend, or None when the backend has none."""
+    return getattr(celery_app.backend, 'client', None)
+
+def _claim_waitlist_chain(chain_id, ttl):
+    """Take (or keep) the watcher chain. Coordination errors fail open so the watcher still runs."""
+    try:
+        client = _waitlist_chain_client()
+        if client is None:
+            return True
+        if client.set(WAITLIST_CHAIN_KEY, chain_id, nx=True, ex=ttl):
+            return True
+        owner = client.get(WAITLIST_CHAIN_KEY)
+        if isinstance(owner, bytes):
+            owner = owner.decode()
+        if owner == chain_id:
+            client.set(WAITLIST_CHAIN_KEY, chain_id, ex=ttl)
+            return True
+        return False
+    except Exception as e:
+        logger.warning(f"Waitlist watcher chain check failed, running anyway: {e}")
+        return True
+
+def _release_waitlist_chain(chain_id):
+    try:
+        client = _waitlist_chain_client()
+        if client is None:
+            return
+        owner = client.get(WAITLIST_CHAIN_KEY)
+        if isinstance(owner, bytes):
+            owner = owner.decode()
+        if owner == chain_id:
+            client.delete(WAITLIST_CHAIN_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to release the waitlist watcher chain: {e}")
+
+@celery_app.task(bind=True, name='run_waitlist_watcher')
+def run_waitlist_watcher_task(self, next_poll=None, chain_id=None):
+    """
+    Celery task for one waitlist watcher cycle: polls the (pool, date) groups that are due,
+    then re-queues itself with a countdown until the next group is due.
+    Each cycle is short, so auto-booking and launch tasks run between cycles on the same worker.
+    A task queued without chain_id (e.g. by the CRON) starts a chain only if none is running.
+    """
+    chain_id = chain_id or self.request.id
+    if not _claim_waitlist_chain(chain_id, WAITLIST_CHAIN_GRACE_SECONDS):
+        return {
+            'status': 'SKIPPED',
+            'message': 'A waitlist watcher is already running'
+        }
+
+    try:
+        from src.domain.services.waitlistService import run_waitlist_cycle
+        
+        self.update_state(
+            state='PROGRESS',
+            meta={'status': 'Polling waitlist entries...'}
+        )
+        
+        summary = run_waitlist_cycle(next_poll)
+        
+        if summary['next_run_in'] is not None:
+            countdown = summary['next_run_in']
+            _claim_waitlist_chain(chain_id, int(countdown) + WAITLIST_CHAIN_GRACE_SECONDS)
+            run_waitlist_watcher_task.apply_async(
+                kwargs={'next_poll': summary['next_poll'], 'chain_id': chain_id},
+                countdown=countdown
+            )
+        else:
+            _release_waitlist_chain(chain_id)
+        
+        return {
+            'status': 'SUCCESS',
+            'message': f"Waitlist watcher cycle completed: {summary['polls']} polls, {len(summary['bookings'])} bookings",
+            'bookings': summary['bookings'],
+            'summary': {
+                'polls': summary['polls'],
+                'booked': len(summary['bookings']),
+                'next_run_in': summary['next_run_in']
+            }
+        }
+        
+    except Exception as e:
+        # The chain stops here; the next CRON call starts a new one
+        _release_waitlist_chain(chain_id)
+        self.update_state(
+            state='FAILURE',
+            meta={'status': 'FAILURE', 'error': str(e)}
+        )
+        raise
+
 if __name__ == '__main__':
     celery_app.start() 
\ No newline at end of file
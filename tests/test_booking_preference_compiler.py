@@ -0,0 +1,20 @@
+from src.domain.services.bookingPreferenceCompiler import compile_booking_command
+
+
+def test_compiles_full_nightly_command():
+    plan = compile_booking_command(
+        "outdoor pool at 7PM for 60 minutes, prefer lanes 5, 2, 4, 3, 6, then 1, "
+        "willing to go a half hour earlier or later, shorten to 30 as last resort"
+    )
+
+    assert plan is not None
+    assert plan["pool"] == "Outdoor Pool"
+    assert plan["time_slot"] == "7:00 PM"
+    assert plan["duration"] == "60 Min"
+    assert plan["lanes"] == ["Lane 5", "Lane 2", "Lane 4", "Lane 3", "Lane 6", "Lane 1"]
+    assert plan["time_offsets"] == [-30, 30]
+    assert plan["fallback_durations"] == ["30 Min"]
+
+
+def test_unbookable_shorter_duration_is_left_to_the_agent():
+    assert compile_booking_command("indoor pool at 6AM for 60 minutes, shorten to 45 if needed") is None
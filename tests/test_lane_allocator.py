@@ -0,0 +1,39 @@
+from src.domain.services import laneAllocatorService
+from src.domain.services.laneAllocatorService import allocate, fetch_availability
+
+CONTEXT = {
+    "ITEMS": {"Indoor Pool": "indoor-item"},
+    "LANES_BY_POOL": {"Indoor Pool": ["Indoor Lane 1", "Indoor Lane 2"]},
+    "TIME_SLOTS": ["7:00 PM", "7:30 PM"],
+}
+
+
+def _options(*lanes):
+    return [({"lane": f"Lane {lane}"}, [("Indoor Pool", f"Indoor Lane {lane}", "7:00 PM")]) for lane in lanes]
+
+
+def test_allocate_swaps_a_contested_first_choice():
+    users = {"A": _options(3, 4), "B": _options(2, 3, 4), "C": _options(3, 2)}
+
+    assignment = allocate(users, {}, set())
+
+    assert {username: candidate["lane"] for username, (_, candidate, _) in assignment.items()} == {
+        "A": "Lane 4", "B": "Lane 2", "C": "Lane 3"
+    }
+
+
+def test_fully_booked_pool_is_not_treated_as_unknown(monkeypatch):
+    monkeypatch.setattr(laneAllocatorService, "fetch_pool_availability",
+                        lambda pool, date, context: {"7:00 PM": [], "7:30 PM": []})
+    free = fetch_availability(["Indoor Pool"], "2026-10-20", CONTEXT)
+
+    assert free["Indoor Pool"] is not None
+    assert allocate({"A": _options(1, 2)}, free, set()) == {}
+
+
+def test_failed_fetch_assumes_unclaimed_lanes_are_free(monkeypatch):
+    monkeypatch.setattr(laneAllocatorService, "fetch_pool_availability", lambda pool, date, context: None)
+    free = fetch_availability(["Indoor Pool"], "2026-10-20", CONTEXT)
+
+    assert free["Indoor Pool"] is None
+    assert allocate({"A": _options(1, 2)}, free, set())["A"][0] == 0
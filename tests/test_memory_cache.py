@@ -0,0 +1,24 @@
+import threading
+
+from src.agent.services.memoryCache import BoundedMemoryCache
+
+
+def _sweeper_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "memory-cache-sweeper"]
+
+
+def test_caches_share_one_sweeper_thread():
+    caches = [BoundedMemoryCache() for _ in range(3)]
+    for cache in caches:
+        cache.start_sweeper()
+
+    assert len(_sweeper_threads()) == 1
+
+
+def test_membership_checks_are_not_lookups():
+    cache = BoundedMemoryCache()
+    cache["a"] = {"value": 1}
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
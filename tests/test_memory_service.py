@@ -0,0 +1,48 @@
+import pytest
+
+from src.agent.services.memoryService import MemoryService, ConversationConflictError
+
+
+@pytest.fixture
+def memory_service(monkeypatch):
+    # memory:// selects the in-process fake Redis
+    monkeypatch.setenv("MEMORY_REDIS_URL", "memory://")
+    return MemoryService(persistence_type="redis")
+
+
+def test_interleaved_conversation_updates_both_survive(memory_service):
+    memory_service.add_to_conversation_memory("s1", {"role": "user", "content": "hello"})
+    attempts = []
+
+    def append_reply(memory):
+        attempts.append(memory.version)
+        if len(attempts) == 1:
+            # Another worker saves its turn between this read and write
+            memory_service.add_to_conversation_memory("s1", {"role": "user", "content": "from worker 2"})
+        memory.messages.append({"role": "assistant", "content": "from worker 1"})
+
+    memory_service.modify_conversation_memory("s1", append_reply)
+
+    stored = memory_service.get_conversation_memory("s1")
+    assert [message["content"] for message in stored.messages] == ["hello", "from worker 2", "from worker 1"]
+    assert attempts == [1, 2]
+    assert stored.version == 3
+
+
+def test_stale_replace_is_rejected(memory_service):
+    read = memory_service.add_to_conversation_memory("s1", {"role": "user", "content": "hello"})
+    memory_service.add_to_conversation_memory("s1", {"role": "user", "content": "from worker 2"})
+
+    with pytest.raises(ConversationConflictError):
+        memory_service.update_conversation_memory("s1", read.messages + [{"role": "assistant", "content": "hi"}],
+                                                  expected_version=read.version)
+    assert len(memory_service.get_conversation_memory("s1").messages) == 2
+
+
+def test_store_failure_is_raised(memory_service, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(memory_service._store, "update", fail)
+    with pytest.raises(ConnectionError):
+        memory_service.add_to_conversation_memory("s1", {"role": "user", "content": "hello"})
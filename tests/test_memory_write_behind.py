@@ -0,0 +1,35 @@
+import threading
+
+from src.agent.services.memoryStores import SqliteMemoryStore
+from src.agent.services.memoryWriteBehind import WriteBehindMemoryStore
+
+
+class SlowSqliteMemoryStore(SqliteMemoryStore):
+    """Blocks put_many until released, to hold a flush in flight."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def put_many(self, records):
+        self.writing.set()
+        self.release.wait(5)
+        super().put_many(records)
+
+
+def test_reads_see_a_batch_while_it_is_flushed(tmp_path):
+    underlying = SlowSqliteMemoryStore(str(tmp_path / "memory.db"))
+    store = WriteBehindMemoryStore(underlying, flush_interval_seconds=60)
+    store.put("conversation:s1", "conversation", 1.0, {"messages": ["hello"]})
+
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    assert underlying.writing.wait(5)
+    assert store.get("conversation:s1") == {"messages": ["hello"]}
+
+    underlying.release.set()
+    flusher.join(5)
+    assert store.get("conversation:s1") == {"messages": ["hello"]}
+    assert underlying.get("conversation:s1") == {"messages": ["hello"]}
+    store.close()